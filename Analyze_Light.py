@@ -1,3 +1,5 @@
+import numpy as np
+
 def analyze_light(light_source, intensity, color_temperature):
     """
     Analyzes a light source based on its intensity, color temperature, 
@@ -47,9 +49,49 @@ def analyze_light(light_source, intensity, color_temperature):
 
     return analysis
 
-# Example usage
-natural_light_analysis = analyze_light("Natural", 70, 5500)
-artificial_light_analysis = analyze_light("Artificial", 60, 2700)
+def analyze_light_batch(light_sources, intensities, color_temperatures):
+    """
+    Analyzes many light sources at once, applying the same warmth and color 
+    rules as `analyze_light`.
+
+    Args:
+        light_sources (array): The potential source of each light ("Natural" or "Artificial").
+        intensities (array): The light intensities on a scale of 0-100.
+        color_temperatures (array): The color temperatures of the lights in Kelvin.
+
+    Returns:
+        A dictionary with arrays of the "warmth" and "color" descriptions of each light.
+    """
+    natural = np.asarray(light_sources) == "Natural"
+    intensities = np.asarray(intensities)
+    color_temperatures = np.asarray(color_temperatures)
+
+    # Warmth analysis
+    warmth = np.select(
+        [natural & (intensities > 80), natural & (intensities > 50), natural,
+         color_temperatures < 3000, color_temperatures < 4000],
+        ["Intense and warm, like the midday sun.",
+         "Pleasant and warm, similar to morning or afternoon sunlight.",
+         "Soft and warm, reminiscent of sunrise or sunset.",
+         "Warm and cozy, like candlelight or incandescent bulbs.",
+         "Neutral and balanced, typical of halogen or some LED lights."],
+        default="Cool and invigorating, similar to fluorescent or daylight LEDs.")
+
+    # Color analysis
+    color = np.select(
+        [natural & (color_temperatures < 5000), natural, color_temperatures < 3000, color_temperatures < 4000],
+        ["Golden or reddish hues, often seen at sunrise or sunset.",
+         "Bluish-white, characteristic of daylight.",
+         "Yellowish or reddish tones, creating a relaxing atmosphere.",
+         "Neutral white, providing a balanced and versatile lighting."],
+        default="Bluish-white, promoting alertness and focus.")
+
+    return {"warmth": warmth, "color": color}
+
+if __name__ == "__main__":
+    # Example usage
+    natural_light_analysis = analyze_light("Natural", 70, 5500)
+    artificial_light_analysis = analyze_light("Artificial", 60, 2700)
 
-print("Natural light analysis:", natural_light_analysis)
-print("Artificial light analysis:", artificial_light_analysis)
\ No newline at end of file
+    print("Natural light analysis:", natural_light_analysis)
+    print("Artificial light analysis:", artificial_light_analysis)
\ No newline at end of file
@@ -1,3 +1,5 @@
+import numpy as np
+
 def discern_light_source(intensity, color_temperature):
     """
     Discerns whether a light source is natural or artificial based on its intensity 
@@ -23,11 +25,32 @@ def discern_light_source(intensity, color_temperature):
     else:
         return "Inconclusive"
 
-# Example usage
-light_source_1 = discern_light_source(85, 7000)  # Likely natural (bright, bluish)
-light_source_2 = discern_light_source(40, 3000)  # Likely artificial (dim, warm)
-light_source_3 = discern_light_source(60, 5000)  # Inconclusive (could be either)
+def discern_light_source_batch(intensities, color_temperatures):
+    """
+    Discerns the source of many lights at once, applying the same rules as 
+    `discern_light_source`.
+
+    Args:
+        intensities (array): The light intensities on a scale of 0-100.
+        color_temperatures (array): The color temperatures of the lights in Kelvin.
+
+    Returns:
+        np.ndarray: The estimated light sources ("Natural", "Artificial" or "Inconclusive").
+    """
+    intensities = np.asarray(intensities)
+    color_temperatures = np.asarray(color_temperatures)
+
+    natural = (intensities > 70) & ((color_temperatures < 4000) | (color_temperatures > 6500))
+    artificial = (intensities <= 70) & (2700 <= color_temperatures) & (color_temperatures <= 6500)
+
+    return np.select([natural, artificial], ["Natural", "Artificial"], default="Inconclusive")
+
+if __name__ == "__main__":
+    # Example usage
+    light_source_1 = discern_light_source(85, 7000)  # Likely natural (bright, bluish)
+    light_source_2 = discern_light_source(40, 3000)  # Likely artificial (dim, warm)
+    light_source_3 = discern_light_source(60, 5000)  # Inconclusive (could be either)
 
-print("Light source 1:", light_source_1)
-print("Light source 2:", light_source_2)
-print("Light source 3:", light_source_3)
\ No newline at end of file
+    print("Light source 1:", light_source_1)
+    print("Light source 2:", light_source_2)
+    print("Light source 3:", light_source_3)
\ No newline at end of file
@@ -70,14 +70,15 @@ def discern_light_source_in_rendering(pixel_data, scene_information):
 
     return estimated_light_source
 
-# Example usage (hypothetical)
-pixel_data = np.random.rand(100, 100, 4)  # Example pixel data (randomized for demo)
-scene_information = {
-    "light_sources": [
-        {"type": "Directional", "intensity": 80},  # Example of sun-like light source
-        {"type": "Point", "intensity": 30},        # Example of an artificial light source
-    ]
-}
+if __name__ == "__main__":
+    # Example usage (hypothetical)
+    pixel_data = np.random.rand(100, 100, 4)  # Example pixel data (randomized for demo)
+    scene_information = {
+        "light_sources": [
+            {"type": "Directional", "intensity": 80},  # Example of sun-like light source
+            {"type": "Point", "intensity": 30},        # Example of an artificial light source
+        ]
+    }
 
-light_source = discern_light_source_in_rendering(pixel_data, scene_information)
-print("Estimated light source:", light_source)
+    light_source = discern_light_source_in_rendering(pixel_data, scene_information)
+    print("Estimated light source:", light_source)
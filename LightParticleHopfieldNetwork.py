@@ -1,13 +1,34 @@
+import collections
+import concurrent.futures
+import time
+from multiprocessing import shared_memory
 import numpy as np
+import checkpoint
+import shared_arrays
 from hmmlearn import hmm
 from scipy.signal import welch
 import matplotlib.pyplot as plt
 
 class LightParticleHopfieldNetwork:
-    def __init__(self, num_neurons, num_hidden_states):
+    def __init__(self, num_neurons, num_hidden_states, storage=None, directory=None, dtype=np.float64):
+        """
+        Args:
+            num_neurons (int): The number of neurons.
+            num_hidden_states (int): The number of hidden states of the HMM.
+            storage (str, optional): "shared_memory" or "memmap" to keep the weights and
+                                     thresholds in shared storage, which worker processes
+                                     attach to (see `shared_arrays.share`) without copying.
+            directory (str, optional): The directory of the memmap files.
+            dtype (np.dtype): The dtype of the weights, thresholds, updates and recall states,
+                              e.g. np.float32 for half the memory. The HMM stays float64.
+        """
         self.num_neurons = num_neurons
-        self.weights = np.random.rand(num_neurons, num_neurons)
-        self.thresholds = np.random.rand(num_neurons)
+        self.dtype = np.dtype(dtype)
+        self.shared_arrays = shared_arrays.SharedArrays(storage, directory) if storage else None
+        self.weights = shared_arrays.place(self.shared_arrays, "weights",
+                                           np.random.rand(num_neurons, num_neurons).astype(self.dtype, copy=False))
+        self.thresholds = shared_arrays.place(self.shared_arrays, "thresholds",
+                                              np.random.rand(num_neurons).astype(self.dtype, copy=False))
         self.hmm_model = hmm.GaussianHMM(n_components=num_hidden_states)
 
     def process_light_pattern(self, light_pattern):
@@ -15,54 +36,439 @@ class LightParticleHopfieldNetwork:
         Processes a light pattern, updates neuron weights, and trains the HMM model.
         """
 
+        # Update neuron weights and adjust neuron thresholds, in place
+        weight_update, threshold_update = self.calculate_updates(light_pattern)
+        self.weights += weight_update
+        self.thresholds += threshold_update
+
+        # Train the HMM model on the light pattern
+        self.hmm_model.fit(np.array(light_pattern).reshape(-1, 1))  # Reshape for HMM input
+
+    def calculate_updates(self, light_pattern):
+        """
+        Calculates the weight and threshold increments of a light pattern, in the network's dtype.
+        """
+
         # Simulate particle behavior (placeholder)
         particle_excitement = self.calculate_particle_excitement(light_pattern)
         particle_flux = self.calculate_particle_flux(light_pattern)
+        weight_update = np.outer(particle_excitement, particle_flux) * 0.1
 
-        # Update neuron weights
-        for i in range(self.num_neurons):
-            for j in range(self.num_neurons):
-                weight_change = particle_excitement[i] * particle_flux[j] * 0.1
-                self.weights[i, j] += weight_change
-
-        # Adjust neuron thresholds
+        # The increment is cast to the network's dtype, since a float64 scalar would upcast it
         overall_intensity = np.mean(light_pattern)
-        for i in range(self.num_neurons):
-            self.thresholds[i] += overall_intensity * 0.01
+        threshold_update = self.dtype.type(overall_intensity * 0.01)
+        return weight_update, threshold_update
 
-        # Train the HMM model on the light pattern
-        self.hmm_model.fit(np.array(light_pattern).reshape(-1, 1))  # Reshape for HMM input
+    def save(self, path):
+        """
+        Saves the network's weights, thresholds and HMM parameters to a checkpoint file.
+
+        Args:
+            path (str): The checkpoint file.
+        """
+        hmm_arrays, hmm_params = checkpoint.hmm_state(self.hmm_model)
+        checkpoint.save_checkpoint(path, type(self).__name__,
+                                   dict(weights=self.weights, thresholds=self.thresholds, **hmm_arrays),
+                                   {"num_neurons": self.num_neurons, "hmm_params": hmm_params})
+
+    @classmethod
+    def load(cls, path, mmap_mode="c"):
+        """
+        Loads a network saved with `save`. Its arrays are memory-mapped from the
+        checkpoint and paged in on use, so loading is instant whatever the size
+        of the network.
+
+        Args:
+            path (str): The checkpoint file.
+            mmap_mode (str, optional): "c" (changes stay in memory), "r" (read-only),
+                                       "r+" (changes are written to the checkpoint), or
+                                       None to read the arrays into memory.
+        """
+        arrays, attributes = checkpoint.load_checkpoint(path, cls.__name__, mmap_mode)
+        network = cls.__new__(cls)
+        network.num_neurons = attributes["num_neurons"]
+        network.dtype = arrays["weights"].dtype
+        network.shared_arrays = None
+        network.weights = arrays["weights"]
+        network.thresholds = arrays["thresholds"]
+        network.hmm_model = checkpoint.restore_hmm(hmm.GaussianHMM, arrays, attributes["hmm_params"])
+        return network
 
     def calculate_particle_excitement(self, light_pattern):
         """
         Placeholder for calculating particle excitement based on light patterns.
         """
         # Example: Calculate excitement as a function of light intensity
-        return np.array([np.mean(light_pattern) for _ in range(self.num_neurons)])
+        return np.full(self.num_neurons, np.mean(light_pattern), dtype=self.dtype)
 
     def calculate_particle_flux(self, light_pattern):
         """
         Placeholder for calculating particle flux based on light patterns.
         """
         # Example: Calculate flux as a function of light intensity variation
-        return np.array([np.std(light_pattern) for _ in range(self.num_neurons)])
+        return np.full(self.num_neurons, np.std(light_pattern), dtype=self.dtype)
+
+    def store_patterns(self, light_patterns, level=0.5):
+        """
+        Stores light patterns as attractors with the Hebbian rule, replacing the
+        current weights, and resets the thresholds to zero.
+
+        Args:
+            light_patterns (np.array): Patterns, one per row, binarized at `level`.
+            level (float): Values at or above it are active (+1), the rest inactive (-1).
+        """
+        states = self.to_states(light_patterns, level)
+        # In place, so shared weights stay shared
+        self.weights[...] = states.T @ states / self.num_neurons
+        np.fill_diagonal(self.weights, 0)
+        self.thresholds[...] = 0
+
+    def to_states(self, light_patterns, level=0.5):
+        """
+        Binarizes light patterns (intensities, 0/1 or -1/+1 values) into bipolar neuron states.
+        """
+        return np.where(np.asarray(light_patterns) >= level, self.dtype.type(1), self.dtype.type(-1))
+
+    def recall_weights(self):
+        """
+        The weights used for recall: symmetrized, without self-connections, so every
+        asynchronous update lowers the energy and recall converges.
+        """
+        weights = (self.weights + self.weights.T) / 2
+        np.fill_diagonal(weights, 0)
+        return weights
+
+    def energy(self, states, weights=None):
+        """
+        Computes the Hopfield energy -1/2 s.W.s + thresholds.s of one or more states.
+
+        Args:
+            states (np.array): One state, or a batch of states (one per row).
+            weights (np.array, optional): The recall weights, if already computed.
+
+        Returns:
+            float or np.array: The energy of each state.
+        """
+        if weights is None:
+            weights = self.recall_weights()
+        states = np.asarray(states, dtype=self.dtype)
+        return -0.5 * np.sum((states @ weights) * states, axis=-1) + states @ self.thresholds
+
+    def recall(self, probes, mode="synchronous", max_iterations=100, level=0.5, seed=None):
+        """
+        Retrieves stored patterns from noisy probes by running the network until
+        its states stop changing.
+
+        Synchronous mode updates all neurons of all probes at once with one
+        matrix product per iteration; probes that settle, or that oscillate
+        between two states, drop out of the remaining iterations. Asynchronous
+        mode updates neurons one at a time in a random order per sweep, all
+        probes together, and always settles into a minimum of the energy.
+
+        Args:
+            probes (np.array): One probe pattern, or a batch of probes (one per row),
+                               binarized at `level`.
+            mode (str): "synchronous" or "asynchronous".
+            max_iterations (int): The maximum number of iterations (sweeps in asynchronous mode).
+            level (float): Values at or above it are active (+1), the rest inactive (-1).
+            seed (int, optional): Seed of the asynchronous update order.
+
+        Returns:
+            dict: The recalled states, their energies, the iterations run and
+                  whether each probe converged.
+        """
+        if mode not in ("synchronous", "asynchronous"):
+            raise ValueError(f"Unknown recall mode: {mode}")
+
+        single = np.ndim(probes) == 1
+        states = np.atleast_2d(self.to_states(probes, level))
+        weights = self.recall_weights()
+        converged = np.zeros(len(states), dtype=bool)
+        iterations = np.zeros(len(states), dtype=int)
+
+        if mode == "synchronous":
+            active = np.arange(len(states))
+            previous = None
+            for _ in range(max_iterations):
+                current = states[active]
+                fields = current @ weights - self.thresholds
+                # A neuron with zero input field keeps its state
+                updated = np.where(fields > 0, 1.0, np.where(fields < 0, -1.0, current))
+                iterations[active] += 1
+
+                # Settled probes are done; probes back at their state of two iterations ago oscillate
+                settled = np.all(updated == current, axis=1)
+                oscillating = np.zeros_like(settled) if previous is None else ~settled & np.all(updated == previous, axis=1)
+                converged[active[settled]] = True
+
+                keep = ~(settled | oscillating)
+                previous = current[keep]
+                states[active] = updated
+                active = active[keep]
+                if len(active) == 0:
+                    break
+        else:
+            rng = np.random.default_rng(seed)
+            active = np.arange(len(states))
+            for _ in range(max_iterations):
+                # Column-major, so each neuron's states across the probes are contiguous
+                batch = np.asfortranarray(states[active])
+                changed = np.zeros(len(active), dtype=bool)
+                # The weights are symmetric, so a neuron's row holds its incoming weights
+                for neuron in rng.permutation(self.num_neurons):
+                    field = batch @ weights[neuron] - self.thresholds[neuron]
+                    state = batch[:, neuron]
+                    updated = np.where(field > 0, 1.0, np.where(field < 0, -1.0, state))
+                    changed |= updated != state
+                    batch[:, neuron] = updated
+
+                states[active] = batch
+                iterations[active] += 1
+                converged[active[~changed]] = True
+                active = active[changed]
+                if len(active) == 0:
+                    break
+
+        recalled = {
+            "states": states,
+            "energy": self.energy(states, weights),
+            "iterations": iterations,
+            "converged": converged,
+        }
+        if single:
+            recalled = {name: value[0] for name, value in recalled.items()}
+        return recalled
+
+class OnlineHiddenStateFilter:
+    """
+    Tracks the hidden state of a trained Gaussian HMM over a live stream, one
+    sample at a time, with the forward algorithm. Each update costs O(K^2) for K
+    hidden states and memory stays constant, instead of re-decoding the history.
 
-def analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+    With a lag L > 0, the filter also gives fixed-lag smoothed posteriors: the
+    posterior of the sample L steps back, given every sample up to the newest.
+    """
+
+    def __init__(self, hmm_model, lag=0):
+        self.lag = lag
+        self.startprob = np.array(hmm_model.startprob_)
+        self.transmat = np.array(hmm_model.transmat_)
+        self.means = np.array(hmm_model.means_)
+
+        # Gaussian emission terms that do not depend on the sample
+        covars = np.array(hmm_model.covars_)
+        self.precisions = np.linalg.inv(covars)
+        self.log_normalizers = -0.5 * (self.means.shape[1] * np.log(2 * np.pi) + np.linalg.slogdet(covars)[1])
+        self.reset()
+
+    def reset(self):
+        """ Forgets the stream, so the next sample is treated as the first. """
+        self.posterior = None
+        self.log_likelihood = 0.0
+        self.samples = 0
+        # The last `lag` filtered posteriors and emission likelihoods, oldest first
+        self.window = collections.deque(maxlen=self.lag + 1)
+        self.smoothed = None
+
+    def emission_likelihoods(self, observation):
+        """
+        Computes the likelihood of one sample under each hidden state, scaled by a
+        common factor for numerical range.
+
+        Returns:
+            tuple: The scaled likelihoods and the log of the scale factor.
+        """
+        differences = np.subtract(observation, self.means)
+        log_likelihoods = self.log_normalizers - 0.5 * np.einsum("kd,kde,ke->k", differences, self.precisions, differences)
+        log_scale = log_likelihoods.max()
+        return np.exp(log_likelihoods - log_scale), log_scale
+
+    def update(self, observation):
+        """
+        Adds one sample to the stream.
+
+        Args:
+            observation (float or np.array): The new sample.
+
+        Returns:
+            np.array: The filtered posterior of each hidden state given the stream so far.
+        """
+        likelihoods, log_scale = self.emission_likelihoods(observation)
+        prior = self.startprob if self.posterior is None else self.posterior @ self.transmat
+        posterior = prior * likelihoods
+        normalizer = posterior.sum()
+        self.posterior = posterior / normalizer
+        self.log_likelihood += np.log(normalizer) + log_scale
+        self.samples += 1
+
+        if self.lag:
+            self.window.append((self.posterior, likelihoods))
+            if len(self.window) > self.lag:
+                self.smoothed = self.smooth_window()[0]
+        return self.posterior
+
+    def smooth_window(self):
+        """
+        Runs the backward pass over the window of recent samples.
+
+        Returns:
+            list: The smoothed posteriors of the samples in the window, oldest first.
+        """
+        backward = np.ones(len(self.startprob))
+        smoothed = [None] * len(self.window)
+        for index in range(len(self.window) - 1, -1, -1):
+            posterior, likelihoods = self.window[index]
+            smoothed[index] = posterior * backward / np.dot(posterior, backward)
+            backward = self.transmat @ (likelihoods * backward)
+            backward /= backward.sum()
+        return smoothed
+
+    def flush(self):
+        """
+        Smooths the samples still within the lag at the end of a stream.
+
+        Returns:
+            np.array: The smoothed posteriors of the last `lag` samples (fewer at the
+                      start of a stream), one per row.
+        """
+        if not self.lag or not self.window:
+            return np.empty((0, len(self.startprob)))
+        smoothed = self.smooth_window()
+        return np.array(smoothed[1:] if len(self.window) > self.lag else smoothed)
+
+    @property
+    def state(self):
+        """ The most probable hidden state of the newest sample. """
+        return int(np.argmax(self.posterior))
+
+# The training sequences shared with a model-selection worker: the shared memory block and its array view
+SHARED_SEQUENCES = None
+
+def attach_shared_sequences(name, shape, dtype):
+    """ Attaches a model-selection worker to the training sequences in shared memory. """
+    global SHARED_SEQUENCES
+    block = shared_memory.SharedMemory(name=name)
+    SHARED_SEQUENCES = (block, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+def fit_hidden_state_candidate(lengths, num_hidden_states, seed, covariance_type):
+    """
+    Trains one candidate GaussianHMM on the shared training sequences and scores it.
+
+    Returns:
+        dict: The model, its log-likelihood, BIC and AIC, and its training time.
+    """
+    samples = SHARED_SEQUENCES[1]
+    start = time.perf_counter()
+    model = hmm.GaussianHMM(n_components=num_hidden_states, covariance_type=covariance_type, random_state=seed)
+    model.fit(samples, lengths)
+    fit_seconds = time.perf_counter() - start
+
+    return {
+        "model": model,
+        "num_hidden_states": num_hidden_states,
+        "seed": seed,
+        "log_likelihood": float(model.score(samples, lengths)),
+        "bic": float(model.bic(samples, lengths)),
+        "aic": float(model.aic(samples, lengths)),
+        "converged": model.monitor_.converged,
+        "fit_seconds": fit_seconds,
+        "total_seconds": time.perf_counter() - start,
+    }
+
+def select_hidden_state_count(light_patterns, state_counts=range(2, 7), restarts=3, criterion="bic",
+                              covariance_type="diag", workers=None):
+    """
+    Chooses the number of hidden states of the Gaussian HMM by training candidates
+    for every state count and random restart in parallel worker processes.
+
+    The patterns are copied once into shared memory, which every worker attaches
+    to, instead of being pickled with each candidate.
+
+    Args:
+        light_patterns (list of lists): The light patterns, each an independent sequence.
+        state_counts (iterable): The numbers of hidden states to try.
+        restarts (int): The number of random initializations per state count.
+        criterion (str): "bic" or "aic"; the candidate with the lowest value wins.
+        covariance_type (str): The covariance type of the candidates.
+        workers (int, optional): The number of worker processes. Defaults to the CPU count.
+
+    Returns:
+        dict: The best model, its number of hidden states, and the scores and
+              timings of every candidate.
+    """
+    if criterion not in ("bic", "aic"):
+        raise ValueError(f"Unknown criterion: {criterion}")
+
+    sequences = [np.asarray(light_pattern, dtype=float).reshape(-1, 1) for light_pattern in light_patterns]
+    lengths = [len(sequence) for sequence in sequences]
+    samples = np.concatenate(sequences)
+
+    block = shared_memory.SharedMemory(create=True, size=samples.nbytes)
+    try:
+        np.ndarray(samples.shape, dtype=samples.dtype, buffer=block.buf)[:] = samples
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=attach_shared_sequences,
+                                                    initargs=(block.name, samples.shape, samples.dtype)) as executor:
+            futures = [executor.submit(fit_hidden_state_candidate, lengths, num_hidden_states, seed, covariance_type)
+                       for num_hidden_states in state_counts for seed in range(restarts)]
+            candidates = [future.result() for future in futures]
+    finally:
+        block.close()
+        block.unlink()
+
+    best = min(candidates, key=lambda candidate: candidate[criterion])
+    return {
+        "model": best["model"],
+        "num_hidden_states": best["num_hidden_states"],
+        "criterion": criterion,
+        "candidates": [{name: value for name, value in candidate.items() if name != "model"} for candidate in candidates],
+    }
+
+def analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations,
+                                                online=False, smoothing_lag=0, num_hidden_states=3, dtype=np.float64):
     """
     Analyzes the interplay of light patterns, particle vibrations, and the HMM-integrated Hopfield network.
+
+    Args:
+        online (bool): Decode the hidden states sample by sample with the forward
+                       filter, as on a live stream, instead of Viterbi over all patterns.
+        smoothing_lag (int): In online mode, decode each sample from the posterior
+                             smoothed over this many later samples.
+        num_hidden_states (int, optional): The number of hidden states of the HMM. If None,
+                                           it is chosen by BIC with `select_hidden_state_count`.
+        dtype (np.dtype): The dtype of the network's weights and thresholds, e.g. np.float32.
     """
 
     # Initialize the network
     num_neurons = len(particle_energy_vibrations)
-    num_hidden_states = 3  # Adjust as needed
-    network = LightParticleHopfieldNetwork(num_neurons, num_hidden_states)
+    model_selection = None
+    if num_hidden_states is None:
+        model_selection = select_hidden_state_count(light_patterns)
+        num_hidden_states = model_selection["num_hidden_states"]
+    network = LightParticleHopfieldNetwork(num_neurons, num_hidden_states, dtype=dtype)
 
     # Process light patterns
     for light_pattern in light_patterns:
         network.process_light_pattern(light_pattern)
 
+    # The selected model was trained on all the patterns, not refitted on the last one
+    if model_selection is not None:
+        network.hmm_model = model_selection["model"]
+
     # Collect results from the HMM model
-    hidden_states = network.hmm_model.predict(np.array(light_patterns).reshape(-1, 1))
+    samples = np.array(light_patterns).reshape(-1, 1)
+    if online:
+        hidden_state_filter = OnlineHiddenStateFilter(network.hmm_model, smoothing_lag)
+        posteriors = []
+        for sample in samples:
+            posterior = hidden_state_filter.update(sample)
+            if not smoothing_lag:
+                posteriors.append(posterior)
+            elif hidden_state_filter.smoothed is not None:
+                posteriors.append(hidden_state_filter.smoothed)
+        posteriors = np.vstack(posteriors + list(hidden_state_filter.flush()))
+        hidden_states = np.argmax(posteriors, axis=1)
+    else:
+        hidden_states = network.hmm_model.predict(samples)
 
     # Prepare analysis output
     analysis = {
@@ -70,26 +476,53 @@ def analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_
         "thresholds": network.thresholds,
         "hidden_states": hidden_states,
     }
+    if online:
+        analysis["hidden_state_posteriors"] = posteriors
+    if model_selection is not None:
+        analysis["model_selection"] = model_selection["candidates"]
 
     return analysis
 
-# Example usage
-light_patterns = [np.random.rand(20) for _ in range(10)]  # Increase simulated data points
-particle_energy_vibrations = np.random.rand(5)  # Example particle energy vibrations
-light_flux_data = np.random.rand(10)  # Example light flux data
-sound_wave_transformations = np.random.rand(10)  # Example sound wave transformations
-# Assuming you have more data points
+if __name__ == "__main__":
+    # Example usage
+    light_patterns = [np.random.rand(20) for _ in range(10)]  # Increase simulated data points
+    particle_energy_vibrations = np.random.rand(5)  # Example particle energy vibrations
+    light_flux_data = np.random.rand(10)  # Example light flux data
+    sound_wave_transformations = np.random.rand(10)  # Example sound wave transformations
+    # Assuming you have more data points
+
+
+    # Initialize the network with a reduced number of neurons or states if necessary
+    num_neurons = min(len(particle_energy_vibrations), 5)  # Ensure it's not too large
+    num_hidden_states = 2  # Adjust as necessary to simplify the model
+
 
+    # Analyze using the Hopfield network
+    analysis = analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
 
-# Initialize the network with a reduced number of neurons or states if necessary
-num_neurons = min(len(particle_energy_vibrations), 5)  # Ensure it's not too large
-num_hidden_states = 2  # Adjust as necessary to simplify the model
+    # Output results
+    print("Weights:", analysis["weights"])
+    print("Thresholds:", analysis["thresholds"])
+    print("Hidden States:", analysis["hidden_states"])
 
+    # Recall stored light patterns from noisy probes
+    recall_network = LightParticleHopfieldNetwork(100, num_hidden_states)
+    stored_patterns = np.random.rand(5, 100)
+    recall_network.store_patterns(stored_patterns)
+    probes = recall_network.to_states(stored_patterns)
+    probes[np.random.rand(*probes.shape) < 0.1] *= -1
+    recalled = recall_network.recall(probes)
+    print("Recalled:", np.all(recalled["states"] == recall_network.to_states(stored_patterns), axis=1))
+    print("Energies:", recalled["energy"])
 
-# Analyze using the Hopfield network
-analysis = analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    # Track the hidden state of a live light stream, smoothing over the next 3 samples
+    streamed = analyze_light_particle_hmm_hopfield_network(light_patterns, particle_energy_vibrations, light_flux_data,
+                                                           sound_wave_transformations, online=True, smoothing_lag=3)
+    print("Streamed Hidden States:", streamed["hidden_states"])
 
-# Output results
-print("Weights:", analysis["weights"])
-print("Thresholds:", analysis["thresholds"])
-print("Hidden States:", analysis["hidden_states"])
+    # Choose the number of hidden states by BIC instead of fixing it
+    selection = select_hidden_state_count(light_patterns, state_counts=range(1, 5), restarts=2)
+    print("Selected Hidden States:", selection["num_hidden_states"])
+    for candidate in selection["candidates"]:
+        print(f"  {candidate['num_hidden_states']} states, seed {candidate['seed']}: "
+              f"BIC {candidate['bic']:.1f}, fit in {candidate['fit_seconds'] * 1000:.1f} ms")
@@ -1,11 +1,28 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+import checkpoint
+import headless_render
+import shared_arrays
 
 class LightParticleNeuralNetwork:
-    def __init__(self, num_neurons):
+    def __init__(self, num_neurons, storage=None, directory=None, dtype=np.float64):
+        """
+        Args:
+            num_neurons (int): The number of neurons.
+            storage (str, optional): "shared_memory" or "memmap" to keep the weights in shared
+                                     storage, which worker processes attach to (see
+                                     `shared_arrays.share`) without copying.
+            directory (str, optional): The directory of the memmap files.
+            dtype (np.dtype): The dtype of the weights, their history and updates,
+                              e.g. np.float32 for half the memory.
+        """
         self.num_neurons = num_neurons
-        self.weights = np.random.rand(num_neurons, num_neurons)  # Initialize weights
+        self.dtype = np.dtype(dtype)
+        self.shared_arrays = shared_arrays.SharedArrays(storage, directory) if storage else None
+        self.weights = shared_arrays.place(self.shared_arrays, "weights",
+                                           np.random.rand(num_neurons, num_neurons).astype(self.dtype, copy=False))  # Initialize weights
         self.weight_history = []  # To track weight changes
 
     def process_light_pattern(self, light_pattern):
@@ -16,8 +33,28 @@ class LightParticleNeuralNetwork:
         Args:
             light_pattern (list): A list of light intensity values.
         """
-        pattern_input = np.array(light_pattern).reshape(-1, 1)
-        self.weights += 0.01 * np.dot(pattern_input, pattern_input.T)  # Dummy weight adjustment
+        self.weights += self.calculate_pattern_update(light_pattern)
+
+    def calculate_pattern_update(self, light_pattern):
+        """
+        Calculate the weight increment of a light pattern, in the network's dtype.
+
+        Args:
+            light_pattern (list): A list of light intensity values.
+        """
+        pattern_input = np.asarray(light_pattern, dtype=self.dtype).reshape(-1, 1)
+        return 0.01 * np.dot(pattern_input, pattern_input.T)  # Dummy weight adjustment
+
+    def calculate_reward_update(self, reward):
+        """
+        Calculate the weight increment of a reward signal, in the network's dtype.
+
+        Args:
+            reward (float): The reward value.
+        """
+        # The rate is cast to the network's dtype, since a float64 scalar would upcast the update
+        learning_rate = self.dtype.type(reward * 0.01)
+        return learning_rate * (self.weights - np.mean(self.weights))  # Adjust learning rate as needed
 
     def induce_neuroplasticity(self, light_patterns, reward_signals):
         """
@@ -33,11 +70,56 @@ class LightParticleNeuralNetwork:
             
             # Track weight changes
             self.weight_history.append(self.weights.copy())
-            self.weights += reward * 0.01 * (self.weights - np.mean(self.weights))  # Adjust learning rate as needed
+            self.weights += self.calculate_reward_update(reward)
 
-    def visualize_neuroplasticity(self):
+    def save(self, path):
+        """
+        Saves the network's weights and weight history to a checkpoint file.
+
+        Args:
+            path (str): The checkpoint file.
+        """
+        checkpoint.save_checkpoint(path, type(self).__name__,
+                                   {"weights": self.weights, "weight_history": self.weight_history},
+                                   {"num_neurons": self.num_neurons})
+
+    @classmethod
+    def load(cls, path, mmap_mode="c"):
+        """
+        Loads a network saved with `save`. Its arrays are memory-mapped from the
+        checkpoint and paged in on use, so loading is instant whatever the size
+        of the network.
+
+        Args:
+            path (str): The checkpoint file.
+            mmap_mode (str, optional): "c" (changes stay in memory), "r" (read-only),
+                                       "r+" (changes are written to the checkpoint), or
+                                       None to read the arrays into memory.
+        """
+        arrays, attributes = checkpoint.load_checkpoint(path, cls.__name__, mmap_mode)
+        network = cls.__new__(cls)
+        network.num_neurons = attributes["num_neurons"]
+        network.dtype = arrays["weights"].dtype
+        network.shared_arrays = None
+        network.weights = arrays["weights"]
+        # Each snapshot is a view of the mapped history
+        network.weight_history = list(arrays["weight_history"])
+        return network
+
+    def visualize_neuroplasticity(self, output_path=None, max_lines=2000, max_points=500):
         """
         Visualizes the network's neuroplasticity by plotting weight changes over time.
+
+        All weight trajectories are drawn as a single line collection. At most 
+        `max_lines` neuron pairs are drawn (a fixed random subset), and each 
+        trajectory is min/max decimated to about `max_points` points, so the 
+        artist count stays constant as the network grows.
+
+        Args:
+            output_path (str, optional): If given, render headlessly with Agg to this 
+                                         file (PNG, SVG, ...) instead of showing the figure.
+            max_lines (int): The maximum number of neuron pairs drawn.
+            max_points (int): The maximum number of points per drawn trajectory.
         """
         # Convert weight history to numpy array for easier manipulation
         weight_history = np.array(self.weight_history)
@@ -45,33 +127,48 @@ class LightParticleNeuralNetwork:
         # Create a time array for x-axis
         time = np.arange(weight_history.shape[0])  # Shape: (num_light_patterns, num_neurons, num_neurons)
 
+        # One trajectory per neuron pair, capped and decimated
+        trajectories = weight_history.reshape(len(time), -1).T
+        pairs = np.arange(trajectories.shape[0])[headless_render.cap_points(trajectories.shape[0], max_lines)]
+        indices, values = headless_render.decimate_min_max(trajectories[pairs], max(max_points // 2, 1))
+        source_neurons = pairs // self.num_neurons
+
+        segments = np.stack((time[indices], np.broadcast_to(source_neurons[:, None], values.shape), values), axis=-1)
+        lines = Line3DCollection(segments, cmap='viridis', alpha=0.5)
+        lines.set_array(source_neurons)
+
         # 3D plot of weights over time
-        fig = plt.figure()
+        fig = headless_render.new_figure() if output_path else plt.figure()
         ax = fig.add_subplot(111, projection='3d')
+        ax.add_collection3d(lines)
 
-        # Plotting weight changes for each neuron
-        for i in range(self.num_neurons):
-            for j in range(self.num_neurons):
-                ax.plot(time, [i] * len(time), weight_history[:, i, j], label=f'Neuron {i+1} to Neuron {j+1}' if j==0 else "", alpha=0.5)
+        # Collections do not autoscale the axes
+        ax.set_xlim(0, max(len(time) - 1, 1))
+        ax.set_ylim(0, max(self.num_neurons - 1, 1))
+        ax.set_zlim(np.min(values), np.max(values))
 
         ax.set_xlabel('Time Steps')
         ax.set_ylabel('Neuron Index')
         ax.set_zlabel('Weight Value')
         ax.set_title('Neuroplasticity Visualization: Weight Changes Over Time')
-        ax.legend()
+        fig.colorbar(lines, ax=ax, label='Source Neuron')
 
-        plt.show()
+        if output_path:
+            headless_render.save_figure(fig, output_path)
+        else:
+            plt.show()
 
-# Example usage
-num_neurons = 5
-network = LightParticleNeuralNetwork(num_neurons)
+if __name__ == "__main__":
+    # Example usage
+    num_neurons = 5
+    network = LightParticleNeuralNetwork(num_neurons)
 
-# Simulated light patterns and rewards
-light_patterns = [np.random.rand(num_neurons) for _ in range(10)]
-reward_signals = np.random.rand(10)  # Random reward signals
+    # Simulated light patterns and rewards
+    light_patterns = [np.random.rand(num_neurons) for _ in range(10)]
+    reward_signals = np.random.rand(10)  # Random reward signals
 
-# Induce neuroplasticity
-network.induce_neuroplasticity(light_patterns, reward_signals)
+    # Induce neuroplasticity
+    network.induce_neuroplasticity(light_patterns, reward_signals)
 
-# Visualize neuroplasticity
-network.visualize_neuroplasticity()
+    # Visualize neuroplasticity
+    network.visualize_neuroplasticity()
@@ -1,6 +1,27 @@
 import datetime
 import astral
 import ephem
+import numpy as np
+
+SEASONS = ("Spring", "Summer", "Autumn", "Winter")
+TIMES_OF_DAY = ("Day", "Night")
+
+# Base light levels indexed by (birth season, season, time of day)
+BASE_LIGHT_LEVELS = np.array([
+  # Spring,   Summer,   Autumn,   Winter   (Day, Night)
+  [[60, 30], [70, 20], [50, 40], [40, 50]],  # Born in Spring
+  [[70, 20], [80, 10], [60, 30], [50, 40]],  # Born in Summer
+  [[50, 40], [60, 30], [40, 50], [30, 60]],  # Born in Autumn
+  [[40, 50], [50, 40], [30, 60], [20, 70]]   # Born in Winter
+], dtype=np.float32)
+
+# Adjustment when the birth time doesn't match the time of day, indexed by
+# (birth time, time of day); the last row is for an unknown birth time
+BIRTH_TIME_FACTORS = np.array([
+  [1.0, 0.8],  # Born during the Day
+  [0.8, 1.0],  # Born at Night
+  [1.0, 1.0]
+])
 
 def natural_light_patterns_by_birth(latitude, longitude, birth_season, birth_time):
   """
@@ -17,44 +38,84 @@ def natural_light_patterns_by_birth(latitude, longitude, birth_season, birth_tim
     A dictionary containing light patterns for each season, separated into day and night.
   """
 
-  # Base light levels based on birth season and time
-  base_levels_day = {
-    "Spring": {"Spring": 60, "Summer": 70, "Autumn": 50, "Winter": 40},
-    "Summer": {"Spring": 70, "Summer": 80, "Autumn": 60, "Winter": 50},
-    "Autumn": {"Spring": 50, "Summer": 60, "Autumn": 40, "Winter": 30},
-    "Winter": {"Spring": 40, "Summer": 50, "Autumn": 30, "Winter": 20}
-  }
-  base_levels_night = {
-    "Spring": {"Spring": 30, "Summer": 20, "Autumn": 40, "Winter": 50},
-    "Summer": {"Spring": 20, "Summer": 10, "Autumn": 30, "Winter": 40},
-    "Autumn": {"Spring": 40, "Summer": 30, "Autumn": 50, "Winter": 60},
-    "Winter": {"Spring": 50, "Summer": 40, "Autumn": 60, "Winter": 70}
-  }
-
-  # Adjust base levels if birth time doesn't match current time
-  if birth_time == "Day":
-    base_levels_night = {season: {time: level * 0.8 for time, level in levels.items()} 
-                        for season, levels in base_levels_night.items()}
-  elif birth_time == "Night":
-    base_levels_day = {season: {time: level * 0.8 for time, level in levels.items()} 
-                       for season, levels in base_levels_day.items()}
+  # Base light levels for the birth season, adjusted if birth time doesn't match the time of day
+  levels = BASE_LIGHT_LEVELS[SEASONS.index(birth_season)] * BIRTH_TIME_FACTORS[encode_birth_times(birth_time)[0]]
 
   # Get patterns for the given birth season
   patterns = {
-    "Day": base_levels_day[birth_season],
-    "Night": base_levels_night[birth_season]
+    time_of_day: dict(zip(SEASONS, levels[:, code].tolist())) for code, time_of_day in enumerate(TIMES_OF_DAY)
   }
 
   return patterns
 
-# Example usage
-latitude = 40.7128  # New York City
-longitude = -74.0060
-birth_season = "Summer"
-birth_time = "Day"
-
-light_patterns = natural_light_patterns_by_birth(latitude, longitude, birth_season, birth_time)
-for time_of_day, pattern in light_patterns.items():
-  print(f"\nLight patterns for {time_of_day}:")
-  for season, intensity in pattern.items():
-    print(f"  {season}: {intensity}")
\ No newline at end of file
+def natural_light_patterns_by_birth_batch(birth_seasons, birth_times, time_of_day):
+  """
+  Generates the seasonal light patterns of many people at once.
+
+  Args:
+    birth_seasons: The birth season of each person, as names or codes indexing `SEASONS`.
+    birth_times: The birth time of each person, as names or codes indexing `TIMES_OF_DAY`.
+    time_of_day: "Day" or "Night", or one boolean per person that is True at night.
+
+  Returns:
+    An (N, 4) float32 array of light levels per person and season, in `SEASONS` order.
+  """
+
+  season_codes = encode_seasons(birth_seasons)
+  birth_time_codes = encode_birth_times(birth_times)
+
+  if isinstance(time_of_day, str):
+    time_codes = np.full(len(season_codes), TIMES_OF_DAY.index(time_of_day))
+  else:
+    time_codes = np.asarray(time_of_day, dtype=np.intp)
+
+  factors = BIRTH_TIME_FACTORS[birth_time_codes, time_codes]
+  levels = BASE_LIGHT_LEVELS[season_codes, :, time_codes] * factors[:, None]
+
+  return levels.astype(np.float32)
+
+def encode_seasons(seasons):
+  """
+  Encode season names as codes indexing `SEASONS`; integer codes pass through unchanged.
+  """
+  seasons = np.atleast_1d(seasons)
+  if seasons.dtype.kind in "iu":
+    return seasons.astype(np.intp)
+
+  # Vectorized name lookup through the alphabetically sorted names
+  sorted_names = np.array(sorted(SEASONS))
+  sorted_codes = np.array([SEASONS.index(name) for name in sorted_names])
+  positions = np.clip(np.searchsorted(sorted_names, seasons), 0, len(SEASONS) - 1)
+  if not np.all(sorted_names[positions] == seasons):
+    raise ValueError(f"Seasons must be one of {SEASONS}.")
+
+  return sorted_codes[positions]
+
+def encode_birth_times(birth_times):
+  """
+  Encode birth times as rows of `BIRTH_TIME_FACTORS`; unknown times use the last row.
+  """
+  birth_times = np.atleast_1d(birth_times)
+  if birth_times.dtype.kind in "iu":
+    return birth_times.astype(np.intp)
+
+  return np.select([birth_times == time for time in TIMES_OF_DAY], range(len(TIMES_OF_DAY)),
+                   default=len(TIMES_OF_DAY))
+
+if __name__ == "__main__":
+  # Example usage
+  latitude = 40.7128  # New York City
+  longitude = -74.0060
+  birth_season = "Summer"
+  birth_time = "Day"
+
+  light_patterns = natural_light_patterns_by_birth(latitude, longitude, birth_season, birth_time)
+  for time_of_day, pattern in light_patterns.items():
+    print(f"\nLight patterns for {time_of_day}:")
+    for season, intensity in pattern.items():
+      print(f"  {season}: {intensity}")
+
+  # Light levels of a whole cohort at night
+  rng = np.random.default_rng(0)
+  cohort_levels = natural_light_patterns_by_birth_batch(rng.choice(SEASONS, 100000), rng.choice(TIMES_OF_DAY, 100000), "Night")
+  print(f"\nCohort night levels: {cohort_levels.shape} {cohort_levels.dtype}, mean {cohort_levels.mean(axis=0)}")
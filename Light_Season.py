@@ -1,10 +1,10 @@
 import datetime
-from astral import LocationInfo
-from astral.sun import sun
 import ephem
 import math
+import day_night
+import instrumentation
 
-def natural_light_by_season(latitude, longitude, date=None):
+def natural_light_by_season(latitude, longitude, date=None, at=None):
     """
     Estimates natural light intensity per season, considering both sunlight 
     during the day and moonlight at night.
@@ -13,22 +13,23 @@ def natural_light_by_season(latitude, longitude, date=None):
         latitude: The latitude of the location (degrees).
         longitude: The longitude of the location (degrees).
         date: Optional datetime.date object to calculate for a specific date. 
-              If None, uses the current date.
+              If None, uses the date of `at` in the location's timezone.
+        at: Optional datetime.datetime object for the moment that decides between day 
+            and night. Naive datetimes are taken as UTC. If None, uses the current time.
 
     Returns:
         A dictionary mapping season names to estimated light intensity levels (0-100).
     """
 
+    now = day_night.resolve_time(at)
     if date is None:
-        date = datetime.date.today()
+        date = day_night.local_date(latitude, longitude, now)
 
-    # Get sun information for the location and date
-    location = LocationInfo("", "", "UTC", latitude, longitude)
-    s = sun(location.observer, date=date)
+    # Get sunrise and sunset for the location and local date (cached, or from a sun table)
+    sunrise, sunset = day_night.local_sun_times(latitude, longitude, date)
 
-    # Determine if it's day or night
-    now = datetime.datetime.now(location.tzinfo)
-    is_night = now < s['sunrise'] or now > s['sunset']
+    # Determine if it's day or night at the requested moment
+    is_night = now.timestamp() < sunrise or now.timestamp() > sunset
 
     # Determine season based on month
     month = date.month
@@ -43,7 +44,7 @@ def natural_light_by_season(latitude, longitude, date=None):
 
     if not is_night:
         # Daylight calculations
-        day_length_hours = (s['sunset'] - s['sunrise']).total_seconds() / 3600
+        day_length_hours = (sunset - sunrise) / 3600
 
         light_levels = {
             "Spring": 50 + (day_length_hours - 12) * 2, 
@@ -75,6 +76,7 @@ def natural_light_by_season(latitude, longitude, date=None):
         observer.date = date
 
         moon = ephem.Moon()
+        instrumentation.count("ephem")
         moon.compute(observer)
 
         # Simplified moonlight estimation based on moon phase
@@ -109,6 +111,7 @@ def calculate_solar_elevation(latitude, longitude, time):
     observer.date = time
 
     sun = ephem.Sun()
+    instrumentation.count("ephem")
     sun.compute(observer)
 
     return math.degrees(sun.alt)
@@ -118,15 +121,15 @@ latitude = 40.7128  # New York City
 longitude = -74.0060
 
 # Test for daytime
-day_time = datetime.datetime(2023, 6, 21, 12, 0)  # Noon on summer solstice
-light_estimate = natural_light_by_season(latitude, longitude, day_time.date())
+day_time = datetime.datetime(2023, 6, 21, 16, 0)  # Noon EDT on summer solstice, as UTC
+light_estimate = natural_light_by_season(latitude, longitude, at=day_time)
 print(f"Daytime (Summer Solstice):")
 for season, intensity in light_estimate.items():
     print(f"{season}: {intensity:.1f}")
 
 # Test for nighttime
-night_time = datetime.datetime(2023, 6, 21, 0, 0)  # Midnight on summer solstice
-light_estimate = natural_light_by_season(latitude, longitude, night_time.date())
+night_time = datetime.datetime(2023, 6, 21, 4, 0)  # Midnight EDT on summer solstice, as UTC
+light_estimate = natural_light_by_season(latitude, longitude, at=night_time)
 print(f"\nNighttime (Summer Solstice):")
 for season, intensity in light_estimate.items():
     print(f"{season}: {intensity:.1f}")
@@ -1,7 +1,6 @@
 import datetime
 import math
-from astral import LocationInfo
-from astral.sun import sun
+import day_night
 
 def natural_light_by_season(latitude, longitude, date=None):
     """
@@ -12,21 +11,21 @@ def natural_light_by_season(latitude, longitude, date=None):
         latitude: The latitude of the location (degrees).
         longitude: The longitude of the location (degrees).
         date: Optional datetime.date object to calculate for a specific date. 
-              If None, uses the current date.
+              If None, uses the current date in the location's timezone.
 
     Returns:
         A dictionary mapping season names to estimated light intensity levels (0-100).
     """
 
     if date is None:
-        date = datetime.date.today()
+        date = day_night.local_date(latitude, longitude)
 
-    # Get sun information for the location and date
-    location = LocationInfo("", "", "UTC", latitude, longitude)
-    s = sun(location.observer, date=date)
+    # Get sun information for the location and local date (cached, or from a sun table)
+    sunrise, sunset = day_night.local_sun_times(latitude, longitude, date)
+    noon = datetime.datetime.fromtimestamp(day_night.solar_noon(latitude, longitude, date), datetime.timezone.utc)
 
     # Calculate day length
-    day_length_hours = (s['sunset'] - s['sunrise']).total_seconds() / 3600
+    day_length_hours = (sunset - sunrise) / 3600
 
     # Determine season based on month
     month = date.month
@@ -58,7 +57,7 @@ def natural_light_by_season(latitude, longitude, date=None):
         light_levels[season] *= weather_factor
 
     # Solar elevation adjustment
-    noon_elevation = calculate_solar_elevation(latitude, longitude, s['noon'])
+    noon_elevation = calculate_solar_elevation(latitude, longitude, noon)
     elevation_factor = math.sin(math.radians(noon_elevation))
     light_levels[season] *= elevation_factor
 
@@ -1,3 +1,12 @@
+import os
+import tempfile
+import numpy as np
+
+SEASONS = ("Spring", "Summer", "Autumn", "Winter")
+
+# Basic estimations based on typical seasonal patterns, in `SEASONS` order
+BASE_LIGHT_LEVELS = np.array([50, 90, 40, 20], dtype=np.float32)
+
 def natural_light_by_season(latitude):
     """
     Estimates natural light intensity per season based on seasonal patterns and night cycles.
@@ -24,8 +33,94 @@ def natural_light_by_season(latitude):
 
     return light_levels
 
+def natural_light_by_season_array(latitude, out=None):
+    """
+    Estimates natural light intensity per season for an array of latitudes of 
+    any shape, such as every cell of a raster, like `natural_light_by_season`.
+
+    Args:
+        latitude: An array of latitudes (degrees), e.g. an np.memmap raster.
+        out: Optional preallocated array of shape (4,) + latitude.shape to write into.
+
+    Returns:
+        An array of shape (4,) + latitude.shape with one band per season, in `SEASONS` order.
+    """
+
+    latitude = np.asarray(latitude)
+    if out is None:
+        out = np.empty((len(SEASONS),) + latitude.shape, dtype=np.float32)
+
+    # Latitude factor (1 - |latitude| / 90), computed in place in the first band
+    latitude_factor = out[0]
+    np.abs(latitude, out=latitude_factor)
+    latitude_factor *= -1 / 90
+    latitude_factor += 1
+
+    # Scale the other bands from it first, then the first band itself
+    for band in range(1, len(SEASONS)):
+        np.multiply(latitude_factor, BASE_LIGHT_LEVELS[band], out=out[band])
+    latitude_factor *= BASE_LIGHT_LEVELS[0]
+
+    return out
+
+def natural_light_raster(latitude, out, chunk_rows=1024):
+    """
+    Estimates natural light intensity per season for a whole latitude raster, 
+    one block of rows at a time, so memory use stays constant for rasters 
+    larger than memory.
+
+    Args:
+        latitude: A 2-D latitude raster of shape (rows, columns), e.g. an np.memmap.
+        out: The output raster of shape (4, rows, columns), e.g. an np.memmap.
+        chunk_rows: The number of rows processed per block.
+
+    Returns:
+        The output raster.
+    """
+
+    for start in range(0, latitude.shape[0], chunk_rows):
+        stop = min(start + chunk_rows, latitude.shape[0])
+        natural_light_by_season_array(latitude[start:stop], out=out[:, start:stop])
+
+        # Write finished blocks back so they don't accumulate as dirty pages
+        if isinstance(out, np.memmap):
+            out.flush()
+
+    return out
+
+def natural_light_raster_file(latitude_path, output_path, chunk_rows=1024):
+    """
+    Estimates natural light intensity per season from a latitude raster stored 
+    as a .npy file, writing the (4, rows, columns) float32 bands to another .npy file.
+
+    Args:
+        latitude_path: The path of the 2-D latitude raster.
+        output_path: The path of the output raster.
+        chunk_rows: The number of rows processed per block.
+    """
+
+    latitude = np.load(latitude_path, mmap_mode="r")
+    out = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32,
+                                    shape=(len(SEASONS),) + latitude.shape)
+    natural_light_raster(latitude, out, chunk_rows)
+    del out
+
 # Example usage
 latitude = 41.0  # Findlay, Ohio
 light_estimates = natural_light_by_season(latitude)
 for season, intensity in light_estimates.items():
-    print(f"{season}: {intensity:.1f}")
\ No newline at end of file
+    print(f"{season}: {intensity:.1f}")
+
+# Global 0.1 degree raster, processed from disk in blocks
+with tempfile.TemporaryDirectory() as directory:
+    latitude_path = os.path.join(directory, "latitude.npy")
+    output_path = os.path.join(directory, "light_levels.npy")
+
+    latitudes = np.linspace(90, -90, 1800, dtype=np.float32)
+    np.save(latitude_path, np.repeat(latitudes[:, None], 3600, axis=1))
+
+    natural_light_raster_file(latitude_path, output_path, chunk_rows=256)
+    light_levels = np.load(output_path, mmap_mode="r")
+    for season, band in zip(SEASONS, light_levels):
+        print(f"{season} (global mean): {band.mean():.1f}")
+    del light_levels
@@ -1,10 +1,13 @@
 import datetime
-from astral import LocationInfo
-from astral.sun import sun
 import ephem
 import math
+import numpy as np
+import day_night
+import instrumentation
+from Light_Patterns import (BASE_LIGHT_LEVELS, BIRTH_TIME_FACTORS, SEASONS, TIMES_OF_DAY,
+                            encode_birth_times, natural_light_patterns_by_birth_batch)
 
-def natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, date=None):
+def natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, date=None, at=None):
     """
     Estimates natural light intensity per season based on seasonal patterns, 
     night cycles, day length, and birth season/time, with separate patterns 
@@ -16,71 +19,99 @@ def natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_t
         birth_season: The season in which the individual was born ("Spring", "Summer", "Autumn", "Winter").
         birth_time: The approximate time of day the individual was born ("Day", "Night").
         date: Optional datetime.date object to calculate for a specific date. 
-              If None, uses the current date.
+              If None, uses the date of `at` in the location's timezone.
+        at: Optional datetime.datetime object for the moment that decides between day 
+            and night. Naive datetimes are taken as UTC. If None, uses the current time.
 
     Returns:
         A dictionary mapping season names to estimated light intensity levels (0-100),
         with separate values for day and night.
     """
 
+    now = day_night.resolve_time(at)
     if date is None:
-        date = datetime.date.today()
-
-    # Get sun information for the location and date
-    location = LocationInfo("", "", "UTC", latitude, longitude)
-    s = sun(location.observer, date=date)
-
-    # Determine if it's day or night
-    now = datetime.datetime.now(location.tzinfo)
-    is_night = now < s['sunrise'] or now > s['sunset']
-
-    # Base light levels based on season and birth season/time
-    base_light_levels_day = {
-        "Spring": {"Spring": 60, "Summer": 70, "Autumn": 50, "Winter": 40},
-        "Summer": {"Spring": 70, "Summer": 80, "Autumn": 60, "Winter": 50},
-        "Autumn": {"Spring": 50, "Summer": 60, "Autumn": 40, "Winter": 30},
-        "Winter": {"Spring": 40, "Summer": 50, "Autumn": 30, "Winter": 20}
-    }
-
-    base_light_levels_night = {
-        "Spring": {"Spring": 30, "Summer": 20, "Autumn": 40, "Winter": 50},
-        "Summer": {"Spring": 20, "Summer": 10, "Autumn": 30, "Winter": 40},
-        "Autumn": {"Spring": 40, "Summer": 30, "Autumn": 50, "Winter": 60},
-        "Winter": {"Spring": 50, "Summer": 40, "Autumn": 60, "Winter": 70}
-    }
-
-    # Select base levels based on current time (day/night) and birth time
-    if is_night:
-        if birth_time == "Day":
-            base_light_levels = {season: {s: levels[s] * 0.8 for s in levels} for season, levels in base_light_levels_night.items()}
-        else:
-            base_light_levels = base_light_levels_night
-    else:
-        if birth_time == "Night":
-            base_light_levels = {season: {s: levels[s] * 0.8 for s in levels} for season, levels in base_light_levels_day.items()}
-        else:
-            base_light_levels = base_light_levels_day
+        date = day_night.local_date(latitude, longitude, now)
+
+    # Shared adjustments for the location and moment
+    is_night, offset, scale = calculate_light_adjustment(latitude, longitude, date, now)
+
+    # Base levels for the birth season, adjusted if birth time doesn't match the time of day
+    time_code = int(is_night)
+    base_light_levels = BASE_LIGHT_LEVELS[SEASONS.index(birth_season), :, time_code] * \
+        BIRTH_TIME_FACTORS[encode_birth_times(birth_time)[0], time_code]
+
+    # Ensure light levels are within 0-100 range
+    light_levels = np.clip((base_light_levels + offset) * scale, 0, 100)
+
+    return dict(zip(SEASONS, light_levels.tolist()))
+
+def natural_light_by_season_and_birth_batch(latitude, longitude, birth_seasons, birth_times, date=None, at=None):
+    """
+    Estimates natural light intensity per season for many people at the same 
+    location and moment. The astronomical adjustments are computed once and 
+    applied to all base levels at once.
+
+    Args:
+        latitude: The latitude of the location (degrees).
+        longitude: The longitude of the location (degrees).
+        birth_seasons: The birth season of each person, as names or codes indexing `SEASONS`.
+        birth_times: The birth time of each person, as names or codes indexing `TIMES_OF_DAY`.
+        date: Optional datetime.date object to calculate for a specific date. 
+              If None, uses the date of `at` in the location's timezone.
+        at: Optional datetime.datetime object for the moment that decides between day 
+            and night. Naive datetimes are taken as UTC. If None, uses the current time.
+
+    Returns:
+        An (N, 4) float32 array of light levels (0-100) per person and season, in `SEASONS` order.
+    """
+
+    now = day_night.resolve_time(at)
+    if date is None:
+        date = day_night.local_date(latitude, longitude, now)
+
+    is_night, offset, scale = calculate_light_adjustment(latitude, longitude, date, now)
+    time_of_day = TIMES_OF_DAY[int(is_night)]
 
-    # Get base level for the current season based on birth season
-    light_levels = base_light_levels[birth_season]
+    light_levels = natural_light_patterns_by_birth_batch(birth_seasons, birth_times, time_of_day)
+    light_levels += np.float32(offset)
+    light_levels *= np.float32(scale)
+    return np.clip(light_levels, 0, 100, out=light_levels)
+
+def calculate_light_adjustment(latitude, longitude, date, now):
+    """
+    Calculate the adjustment shared by all base light levels at a location and moment, 
+    so that adjusted level = (base level + offset) * scale.
+
+    Args:
+        latitude: The latitude of the location (degrees).
+        longitude: The longitude of the location (degrees).
+        date: The local datetime.date of the sunrise, sunset and moon phase.
+        now: The timezone-aware datetime.datetime that decides between day and night.
+
+    Returns:
+        A tuple of (is_night, offset, scale).
+    """
+
+    # Get sunrise and sunset for the location and local date (cached, or from a sun table)
+    sunrise, sunset = day_night.local_sun_times(latitude, longitude, date)
+
+    # Determine if it's day or night at the requested moment
+    is_night = now.timestamp() < sunrise or now.timestamp() > sunset
 
     if not is_night:
         # Daylight adjustments
-        day_length_hours = (s['sunset'] - s['sunrise']).total_seconds() / 3600
-        for season in light_levels:
-            light_levels[season] += (day_length_hours - 12) * 2  # Adjust as needed
+        day_length_hours = (sunset - sunrise) / 3600
+        offset = (day_length_hours - 12) * 2  # Adjust as needed
 
         # Latitude and weather adjustments
         latitude_factor = 1 - abs(latitude) / 90 
         weather_factor = 0.8  # Example: cloudy day reduces light by 20%
-        for season in light_levels:
-            light_levels[season] *= latitude_factor * weather_factor
 
         # Solar elevation adjustment
         solar_elevation = calculate_solar_elevation(latitude, longitude, now)
         elevation_factor = math.sin(math.radians(solar_elevation))
-        for season in light_levels:
-            light_levels[season] *= elevation_factor
+
+        scale = latitude_factor * weather_factor * elevation_factor
 
     else:
         # Moonlight calculations
@@ -90,17 +121,14 @@ def natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_t
         observer.date = date
 
         moon = ephem.Moon()
+        instrumentation.count("ephem")
         moon.compute(observer)
 
         illuminated_fraction = moon.phase / 100 
-        for season in light_levels:
-            light_levels[season] += illuminated_fraction * 20  # Adjust as needed
-
-    # Ensure light levels are within 0-100 range
-    for season in light_levels:
-        light_levels[season] = max(0, min(100, light_levels[season]))
+        offset = illuminated_fraction * 20  # Adjust as needed
+        scale = 1
 
-    return light_levels
+    return is_night, offset, scale
 
 def calculate_solar_elevation(latitude, longitude, time):
     """
@@ -120,6 +148,7 @@ def calculate_solar_elevation(latitude, longitude, time):
     observer.date = time
 
     sun = ephem.Sun()
+    instrumentation.count("ephem")
     sun.compute(observer)
 
     return math.degrees(sun.alt)
@@ -131,15 +160,15 @@ birth_season = "Summer"
 birth_time = "Night"
 
 # Test for daytime
-day_time = datetime.datetime(2023, 6, 21, 12, 0)  # Noon on summer solstice
-light_estimates = natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, day_time.date())
+day_time = datetime.datetime(2023, 6, 21, 16, 0)  # Noon EDT on summer solstice, as UTC
+light_estimates = natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, at=day_time)
 print(f"Daytime (Summer Solstice):")
 for season, intensity in light_estimates.items():
     print(f"{season}: {intensity:.1f}")
 
 # Test for nighttime
-night_time = datetime.datetime(2023, 6, 21, 0, 0)  # Midnight on summer solstice
-light_estimates = natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, night_time.date())
+night_time = datetime.datetime(2023, 6, 21, 4, 0)  # Midnight EDT on summer solstice, as UTC
+light_estimates = natural_light_by_season_and_birth(latitude, longitude, birth_season, birth_time, at=night_time)
 print(f"\nNighttime (Summer Solstice):")
 for season, intensity in light_estimates.items():
     print(f"{season}: {intensity:.1f}")
@@ -153,4 +182,10 @@ for month in [3, 6, 9, 12]:  # March, June, September, December
     for season, intensity in day_light.items():
         print(f"{season} (Day): {intensity:.1f}")
     for season, intensity in night_light.items():
-        print(f"{season} (Night): {intensity:.1f}")
\ No newline at end of file
+        print(f"{season} (Night): {intensity:.1f}")
+
+# Light levels of a whole cohort at the same location and moment
+rng = np.random.default_rng(0)
+cohort_levels = natural_light_by_season_and_birth_batch(latitude, longitude, rng.choice(SEASONS, 100000), 
+                                                        rng.choice(TIMES_OF_DAY, 100000), at=day_time)
+print(f"\nCohort levels: {cohort_levels.shape} {cohort_levels.dtype}, mean {cohort_levels.mean(axis=0)}")
@@ -1,14 +1,17 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import hsv_to_rgb
+import headless_render
 
-def visualize_particle_resonance(analysis_data):
+def visualize_particle_resonance(analysis_data, output_path=None):
     """
     Visualizes the frequency flux and particle resonance data, reflecting the 
     multidimensionality and color scheme of the patterns.
 
     Args:
         analysis_data (dict): The output from the `analyze_particle_resonance_flux` function.
+        output_path (str, optional): If given, render headlessly with Agg to this file 
+                                     (PNG, SVG, ...) instead of showing the figure.
     """
 
     # Extract data
@@ -25,7 +28,8 @@ def visualize_particle_resonance(analysis_data):
     color = hsv_to_rgb([hue, saturation, value])
 
     # Visualize the data
-    fig, ax = plt.subplots()
+    fig = headless_render.new_figure() if output_path else plt.figure()
+    ax = fig.add_subplot(111)
 
     # Plot base resonance as a horizontal line
     ax.axhline(y=base_resonance, color='gray', linestyle='--', label='Base Resonance')
@@ -45,7 +49,10 @@ def visualize_particle_resonance(analysis_data):
     ax.set_title('Particle Resonance and Flux Visualization')
     ax.legend()
 
-    plt.show()
+    if output_path:
+        headless_render.save_figure(fig, output_path)
+    else:
+        plt.show()
 
 # Example usage (hypothetical data)
 analysis_data = {
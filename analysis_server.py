@@ -0,0 +1,369 @@
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import itertools
+import json
+import multiprocessing
+import time
+import numpy as np
+from Analyze_Light import analyze_light_batch
+from Artificial_and_Natural_Light import discern_light_source_batch
+from analyze_light_aura_interaction import analyze_light_aura_interaction
+
+# Parameters every request of a method must provide
+METHOD_PARAMS = {
+    "analyze_light": ("light_source", "intensity", "color_temperature"),
+    "discern_light_source": ("intensity", "color_temperature"),
+    "analyze_light_aura_interaction": ("latitude", "longitude", "birth_season", "birth_time", "brainwave_data",
+                                       "light_source", "intensity", "color_temperature"),
+}
+
+def run_analyze_light(requests):
+    """ Analyze a batch of `analyze_light` requests with the vectorized implementation. """
+    analysis = analyze_light_batch([request["light_source"] for request in requests],
+                                   [request["intensity"] for request in requests],
+                                   [request["color_temperature"] for request in requests])
+    return [{"warmth": warmth, "color": color} for warmth, color in zip(analysis["warmth"].tolist(),
+                                                                      analysis["color"].tolist())]
+
+def run_discern_light_source(requests):
+    """ Discern a batch of `discern_light_source` requests with the vectorized implementation. """
+    return discern_light_source_batch([request["intensity"] for request in requests],
+                                      [request["color_temperature"] for request in requests]).tolist()
+
+def run_analyze_light_aura_interaction(requests):
+    """
+    Analyze a batch of `analyze_light_aura_interaction` requests, in a worker
+    process. Dates and moments are given as ISO 8601 strings. A failing request
+    yields an error entry instead of failing the whole batch.
+    """
+    results = []
+    for request in requests:
+        params = dict(request)
+        try:
+            if params.get("date") is not None:
+                params["date"] = datetime.date.fromisoformat(params["date"])
+            if params.get("at") is not None:
+                params["at"] = datetime.datetime.fromisoformat(params["at"])
+            analysis = analyze_light_aura_interaction(**params)
+            results.append({name: float(value) for name, value in analysis.items()})
+        except Exception as error:
+            results.append(BatchError(f"{type(error).__name__}: {error}"))
+    return results
+
+class BatchError:
+    """ Marks the result of a single request that failed within a batch. """
+
+    def __init__(self, message):
+        self.message = message
+
+class MicroBatcher:
+    """
+    Groups single requests into batches: a batch is dispatched once it holds
+    `max_batch_size` requests or its oldest request has waited `max_delay`
+    seconds, whichever comes first. When a batch fails, its requests are retried
+    one at a time, so a malformed request only fails itself.
+    """
+
+    def __init__(self, process_batch, executor=None, max_batch_size=1024, max_delay=0.002, latency_window=10000):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.pending = []
+        self.in_flight = 0
+        self.flush_handle = None
+        self.batches = 0
+        self.items = 0
+        self.latencies = collections.deque(maxlen=latency_window)
+
+    @property
+    def queue_depth(self):
+        """ The number of requests waiting for or being processed in a batch. """
+        return len(self.pending) + self.in_flight
+
+    async def submit(self, request):
+        """
+        Queue a request and wait for its result.
+
+        Args:
+            request (dict): The parameters of the request.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((request, future, time.perf_counter()))
+
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        """ Dispatch the pending requests as one batch. """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, []
+        self.in_flight += len(batch)
+        asyncio.get_running_loop().create_task(self.run_batch(batch))
+
+    async def process(self, requests):
+        """ Process requests inline, or in the executor if there is one. """
+        if self.executor is None:
+            return self.process_batch(requests)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.process_batch, requests)
+
+    async def run_batch(self, batch):
+        requests = [request for request, _, _ in batch]
+        try:
+            results = await self.process(requests)
+        except Exception as error:
+            # A malformed request fails the whole vectorized call: process the requests
+            # one by one so that only the bad ones fail
+            results = [error]
+            if len(requests) > 1:
+                results = []
+                for request in requests:
+                    try:
+                        results.extend(await self.process([request]))
+                    except Exception as request_error:
+                        results.append(request_error)
+        finally:
+            self.in_flight -= len(batch)
+
+        self.batches += 1
+        self.items += len(batch)
+        finished = time.perf_counter()
+        for (_, future, enqueued), result in zip(batch, results):
+            self.latencies.append(finished - enqueued)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            elif isinstance(result, BatchError):
+                future.set_exception(ValueError(result.message))
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        """
+        Returns:
+            dict: The queue depth, batch counts and latency percentiles (milliseconds)
+            over the most recent requests.
+        """
+        stats = {
+            "queue_depth": self.queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+        }
+        if self.latencies:
+            percentiles = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99, 100])
+            stats["latency_ms"] = dict(zip(("p50", "p90", "p99", "max"), percentiles.tolist()))
+        return stats
+
+class AnalysisServer:
+    """
+    Local server for single light analysis requests, micro-batched per method.
+
+    The protocol is newline-delimited JSON over a Unix socket or a localhost TCP
+    port. A request is `{"id": ..., "method": ..., "params": {...}}` and gets a
+    response `{"id": ..., "result": ...}` or `{"id": ..., "error": ...}`; responses
+    on a connection may arrive out of order. The "stats" method returns the
+    queue depth and latency percentiles of every method.
+    """
+
+    def __init__(self, max_batch_size=1024, max_delay=0.002, workers=None):
+        # Workers start from a fork server, so they do not inherit the sockets of open connections
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("forkserver"))
+        self.batchers = {
+            "analyze_light": MicroBatcher(run_analyze_light, None, max_batch_size, max_delay),
+            "discern_light_source": MicroBatcher(run_discern_light_source, None, max_batch_size, max_delay),
+            "analyze_light_aura_interaction": MicroBatcher(run_analyze_light_aura_interaction, self.executor,
+                                                           max_batch_size, max_delay),
+        }
+        self.servers = []
+        self.connections = set()
+
+    def stats(self):
+        return {method: batcher.stats() for method, batcher in self.batchers.items()}
+
+    async def handle_request(self, request):
+        if not isinstance(request, dict):
+            return {"id": None, "error": "A request must be a JSON object."}
+
+        response = {"id": request.get("id")}
+        method = request.get("method")
+        params = request.get("params", {})
+        try:
+            if not isinstance(params, dict):
+                raise ValueError("The parameters must be a JSON object.")
+            if method == "stats":
+                response["result"] = self.stats()
+            elif method in self.batchers:
+                missing = [name for name in METHOD_PARAMS[method] if name not in params]
+                if missing:
+                    raise ValueError(f"Missing parameters: {', '.join(missing)}")
+                response["result"] = await self.batchers[method].submit(params)
+            else:
+                raise ValueError(f"Unknown method: {method}")
+        except Exception as error:
+            response["error"] = str(error)
+        return response
+
+    async def handle_connection(self, reader, writer):
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        tasks = set()
+
+        async def respond(request):
+            response = await self.handle_request(request)
+            writer.write(json.dumps(response, default=to_json).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    writer.write(json.dumps({"id": None, "error": f"Invalid JSON: {error}"}).encode() + b"\n")
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+            self.connections.discard(connection)
+
+    async def serve_unix(self, path):
+        """ Start listening on a Unix socket. """
+        server = await asyncio.start_unix_server(self.handle_connection, path, limit=1 << 20)
+        self.servers.append(server)
+        return server
+
+    async def serve_tcp(self, host="127.0.0.1", port=0):
+        """ Start listening on a local TCP port; port 0 picks a free one. """
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=1 << 20)
+        self.servers.append(server)
+        return server
+
+    async def close(self, timeout=1.0):
+        """ Stop listening, give open connections `timeout` seconds to finish, then shut down. """
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+
+        if self.connections:
+            _, unfinished = await asyncio.wait(self.connections, timeout=timeout)
+            for connection in unfinished:
+                connection.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        self.executor.shutdown()
+
+def to_json(value):
+    """ Convert numpy values for JSON encoding. """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__} as JSON.")
+
+class AnalysisClient:
+    """
+    Asyncio client of an `AnalysisServer`, pipelining concurrent calls over one connection.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.waiting = {}
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path, limit=1 << 20))
+
+    @classmethod
+    async def connect_tcp(cls, host, port):
+        return cls(*await asyncio.open_connection(host, port, limit=1 << 20))
+
+    async def receive(self):
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                # Errors without a matching call (e.g. for a line the server could not parse) are ignored
+                future = self.waiting.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response["result"])
+        finally:
+            # The connection is gone: calls still waiting will never get a response
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("The connection to the analysis server was closed."))
+            self.waiting.clear()
+
+    async def call(self, method, **params):
+        """
+        Send one request and wait for its result.
+
+        Args:
+            method (str): The method, e.g. "analyze_light" or "stats".
+            params: The parameters of the method.
+        """
+        if self.receiver.done():
+            raise ConnectionError("The connection to the analysis server was closed.")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(json.dumps({"id": request_id, "method": method, "params": params}).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+if __name__ == "__main__":
+    # Example usage: many concurrent single requests from one service
+    import os
+    import tempfile
+
+    async def main():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "analysis.sock")
+            server = AnalysisServer()
+            await server.serve_unix(path)
+            client = await AnalysisClient.connect_unix(path)
+
+            rng = np.random.default_rng(0)
+            start = time.perf_counter()
+            calls = [client.call("analyze_light", light_source=str(rng.choice(["Natural", "Artificial"])),
+                                 intensity=int(rng.integers(0, 101)), color_temperature=int(rng.integers(1500, 10000)))
+                     for _ in range(20000)]
+            calls += [client.call("discern_light_source", intensity=int(rng.integers(0, 101)),
+                                  color_temperature=int(rng.integers(1500, 10000))) for _ in range(20000)]
+            calls += [client.call("analyze_light_aura_interaction", latitude=40.7128, longitude=-74.0060,
+                                  birth_season="Summer", birth_time="Day", brainwave_data=[10, 12, 9, 11],
+                                  light_source="Natural", intensity=70, color_temperature=5500,
+                                  at=f"2023-06-21T{hour:02d}:00:00") for hour in rng.integers(0, 24, 200)]
+            results = await asyncio.gather(*calls)
+            print(f"{len(results)} requests in {time.perf_counter() - start:.2f} s")
+            print(results[0], results[20000], results[-1], sep="\n")
+            print(json.dumps(await client.call("stats"), indent=2))
+
+            await client.close()
+            await server.close()
+
+    asyncio.run(main())
@@ -1,11 +1,81 @@
 import datetime
-from astral import LocationInfo
-from astral.sun import sun
+import os
+import tempfile
 import ephem
+import day_night
 import numpy as np
 
+# Category tables of the batch analysis; unknown values map to the last code
+BIRTH_SEASONS = ("Spring", "Summer", "Autumn", "Winter")
+BIRTH_TIMES = ("Day", "Night")
+LIGHT_SOURCES = ("Natural", "Artificial")
+
+# Base resonance offsets indexed by birth season and birth time codes
+BIRTH_SEASON_OFFSETS = np.array([5, 10, -5, -10, 0], dtype=float)
+BIRTH_TIME_OFFSETS = np.array([0, 3, 0], dtype=float)
+
+class RaggedSamples:
+    """
+    Compact storage for many variable-length recordings, such as brainwave 
+    samples or (frequency, amplitude) sound samples: all values in one flat 
+    float32 array plus an offsets array marking where each recording starts 
+    and ends. Recording i is `values[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_sequences(cls, sequences, width=None):
+        """
+        Build the container from a list of variable-length sequences.
+
+        Args:
+            sequences (list): The recordings to store.
+            width (int, optional): The number of values per sample, e.g. 2 for (frequency, amplitude) pairs.
+        """
+        lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        shape = (offsets[-1],) if width is None else (offsets[-1], width)
+        values = np.empty(shape, dtype=np.float32)
+        for sequence, start, end in zip(sequences, offsets[:-1], offsets[1:]):
+            values[start:end] = sequence
+
+        return cls(values, offsets)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        Load a container saved with `save`, memory-mapping both arrays by default.
+
+        Args:
+            path (str): The path prefix the container was saved under.
+            mmap_mode (str, optional): The numpy memory-map mode, or None to read into memory.
+        """
+        values = np.load(f"{path}_values.npy", mmap_mode=mmap_mode)
+        offsets = np.load(f"{path}_offsets.npy", mmap_mode=mmap_mode)
+        return cls(values, offsets)
+
+    def save(self, path):
+        """
+        Save the container as a pair of .npy files, `<path>_values.npy` and `<path>_offsets.npy`.
+
+        Args:
+            path (str): The path prefix to save under.
+        """
+        np.save(f"{path}_values.npy", self.values)
+        np.save(f"{path}_offsets.npy", self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
 def analyze_aura_vibrations(latitude, longitude, birth_season, birth_time, 
-                            brainwave_data, light_source, intensity, color_temperature, sound_data, date=None):
+                            brainwave_data, light_source, intensity, color_temperature, sound_data, date=None, at=None):
     """
     Analyzes the vibrational state of the aura, considering particle excitement, 
     flux, and responsiveness to light and sound, based on location, birth 
@@ -21,24 +91,19 @@ def analyze_aura_vibrations(latitude, longitude, birth_season, birth_time,
         light_source (str): The source of the light ("Natural" or "Artificial").
         intensity (int): The light intensity on a scale of 0-100.
         color_temperature (int): The color temperature of the light in Kelvin.
-        sound_data (list): A list of sound frequency and amplitude values.
+        sound_data (list): A list of sound frequency and amplitude values, or an 
+                           (n, 2) array such as a row of a `RaggedSamples` container.
         date (datetime.date, optional): The date for which to calculate light levels. 
-                                        Defaults to the current date.
+                                        Defaults to the date of `at` in the location's timezone.
+        at (datetime.datetime, optional): The moment that decides between day and night. 
+                                          Naive datetimes are taken as UTC. Defaults to the current time.
 
     Returns:
         A dictionary containing insights into the aura's vibrational state.
     """
 
-    if date is None:
-        date = datetime.date.today()
-
-    # Initialize astronomical information using astral
-    location = LocationInfo(latitude=latitude, longitude=longitude)
-    s = sun(location.observer, date=date)
-
     # Determine if it's night or day based on sunrise/sunset
-    current_time = datetime.datetime.now().time()
-    is_night = not (s['sunrise'].time() <= current_time <= s['sunset'].time())
+    is_night = day_night.is_night(latitude, longitude, at, date)
 
     # Base resonance depending on birth season and time
     base_resonance = 50  # Arbitrary default value
@@ -82,7 +147,8 @@ def analyze_aura_vibrations(latitude, longitude, birth_season, birth_time,
     particle_flux += np.std(brainwave_data) * 2  # Higher variability, more flux
 
     # Sound influence
-    sound_frequencies, sound_amplitudes = zip(*sound_data)
+    sound_data = np.asarray(sound_data, dtype=float)
+    sound_frequencies, sound_amplitudes = sound_data[:, 0], sound_data[:, 1]
     particle_excitement += np.mean(sound_frequencies) / 1000  # Higher frequencies, more excitement
     particle_flux += np.mean(sound_amplitudes) * 0.5  # Higher amplitudes, more flux
 
@@ -98,6 +164,165 @@ def analyze_aura_vibrations(latitude, longitude, birth_season, birth_time,
     return analysis
 
 
+def analyze_aura_vibrations_batch(latitude, longitude, birth_season, birth_time, 
+                                  brainwave_data, light_source, intensity, color_temperature, sound_data, date=None, at=None):
+    """
+    Analyzes the vibrational state of the aura for a whole cohort at once, 
+    applying the same scoring as `analyze_aura_vibrations` with array lookups 
+    instead of per-profile branching.
+
+    Args:
+        latitude (array): The latitude of each profile's location.
+        longitude (array): The longitude of each profile's location.
+        birth_season (array): Birth season names, or codes indexing `BIRTH_SEASONS`.
+        birth_time (array): Birth time names, or codes indexing `BIRTH_TIMES`.
+        brainwave_data (list or RaggedSamples): One list of brainwave frequency values (Hz) per profile.
+        light_source (array): Light source names, or codes indexing `LIGHT_SOURCES`.
+        intensity (array): The light intensity of each profile on a scale of 0-100.
+        color_temperature (array): The color temperature of each profile's light in Kelvin.
+        sound_data (list or RaggedSamples): One list of (frequency, amplitude) values per profile.
+        date (datetime.date, optional): The date for which to calculate light levels. 
+                                        Defaults to the date of each profile's moment in
+                                        its location's timezone.
+        at (datetime.datetime or array, optional): The moment that decides between day and 
+                                                   night, or one datetime64 timestamp (UTC) per 
+                                                   profile. Defaults to the current time.
+
+    Returns:
+        A dictionary of per-profile arrays: aura resonance, particle excitement 
+        and particle flux.
+    """
+
+    latitude = np.asarray(latitude, dtype=float)
+    longitude = np.asarray(longitude, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+    color_temperature = np.asarray(color_temperature, dtype=float)
+
+    # Encode categorical inputs as integer codes
+    birth_season_codes = encode_categories(birth_season, BIRTH_SEASONS)
+    birth_time_codes = encode_categories(birth_time, BIRTH_TIMES)
+    is_natural = encode_categories(light_source, LIGHT_SOURCES) == 0
+
+    # Sunrise and sunset only depend on the location, so resolve day or night per distinct location
+    locations, location_index = np.unique(np.column_stack((latitude, longitude)), axis=0, return_inverse=True)
+    location_index = location_index.ravel()
+    if at is None or isinstance(at, datetime.datetime):
+        is_night = np.array([day_night.is_night(lat, lon, at, date) for lat, lon in locations])[location_index]
+    else:
+        timestamps = np.broadcast_to(np.asarray(at, dtype="datetime64[s]"), latitude.shape)
+        is_night = np.empty(latitude.shape, dtype=bool)
+        # Group the profiles by location in one sort instead of scanning them per location
+        order = np.argsort(location_index, kind="stable")
+        groups = np.split(order, np.cumsum(np.bincount(location_index, minlength=len(locations)))[:-1])
+        for (lat, lon), members in zip(locations, groups):
+            is_night[members] = day_night.is_night_batch(lat, lon, timestamps[members], date)
+
+    # Base resonance depending on birth season and time
+    base_resonance = 50 + BIRTH_SEASON_OFFSETS[birth_season_codes] + BIRTH_TIME_OFFSETS[birth_time_codes]
+
+    # Particle excitement from natural light (sunlight or moonlight) and artificial light
+    natural_excitement = intensity * 0.3 + np.where(is_night, 3, np.where(color_temperature < 5000, 15, 8))
+    artificial_excitement = np.select([color_temperature < 3000, color_temperature < 4000], [5, 3], default=1)
+    particle_excitement = np.where(is_natural, natural_excitement, artificial_excitement)
+
+    # Brainwave influence
+    brainwave_values, brainwave_offsets = flatten_ragged(brainwave_data)
+    brainwave_mean, brainwave_std = ragged_mean_std(brainwave_values, brainwave_offsets)
+    particle_excitement += brainwave_mean / 20
+    particle_flux = brainwave_std * 2
+
+    # Sound influence
+    sound_values, sound_offsets = flatten_ragged(sound_data, width=2)
+    sound_frequency_mean, _ = ragged_mean_std(sound_values[:, 0], sound_offsets)
+    sound_amplitude_mean, _ = ragged_mean_std(sound_values[:, 1], sound_offsets)
+    particle_excitement += sound_frequency_mean / 1000
+    particle_flux += sound_amplitude_mean * 0.5
+
+    analysis = {
+        "aura_resonance": base_resonance + particle_excitement + particle_flux,
+        "particle_excitement": particle_excitement,
+        "particle_flux": particle_flux
+    }
+
+    return analysis
+
+def encode_categories(values, categories):
+    """
+    Encode categorical values as integer codes indexing `categories`.
+
+    Args:
+        values (array): Category names, or integer codes which are returned unchanged.
+        categories (tuple): The known category names.
+
+    Returns:
+        np.array: The integer codes; unknown names map to len(categories).
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.integer):
+        return values
+
+    # Look every value up among the sorted category names at once
+    order = np.argsort(categories)
+    sorted_categories = np.asarray(categories)[order]
+    positions = np.minimum(np.searchsorted(sorted_categories, values), len(categories) - 1)
+    return np.where(sorted_categories[positions] == values, order[positions], len(categories))
+
+def flatten_ragged(sequences, width=None):
+    """
+    Flatten a list of variable-length sequences into one array plus start offsets.
+
+    Args:
+        sequences (list or RaggedSamples): The sequences to flatten. A `RaggedSamples` 
+                                           container is used as is, without copying.
+        width (int, optional): The number of values per item, e.g. 2 for (frequency, amplitude) pairs.
+
+    Returns:
+        tuple: The flat values and the offset at which each sequence starts.
+    """
+    if isinstance(sequences, RaggedSamples):
+        return sequences.values, sequences.offsets[:-1]
+
+    lengths = np.fromiter(map(len, sequences), dtype=np.intp, count=len(sequences))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.intp)
+
+    values = np.concatenate([np.asarray(sequence, dtype=float).ravel() for sequence in sequences] or [np.empty(0)])
+    if width is not None:
+        values = values.reshape(-1, width)
+
+    return values, offsets
+
+def ragged_mean_std(values, offsets):
+    """
+    Calculate the mean and (population) standard deviation of every segment of a ragged array.
+
+    Args:
+        values (np.array): The flat values of all segments.
+        offsets (np.array): The offset at which each segment starts.
+
+    Returns:
+        tuple: The per-segment means and standard deviations; NaN for empty segments.
+    """
+    offsets = np.asarray(offsets, dtype=np.intp)
+    lengths = np.diff(np.append(offsets, len(values)))
+    mean = np.full(len(offsets), np.nan)
+    std = np.full(len(offsets), np.nan)
+
+    # reduceat would return the next value for an empty segment, so only reduce the others:
+    # each one then runs up to the start of the next non-empty segment
+    nonempty = lengths > 0
+    if not nonempty.any():
+        return mean, std
+    starts = offsets[nonempty]
+    counts = lengths[nonempty]
+
+    # Accumulate in float64 even for compact float32 storage; the variance is the mean of
+    # squared deviations, which unlike E[x^2] - E[x]^2 does not cancel for large values
+    mean[nonempty] = np.add.reduceat(values, starts, dtype=float) / counts
+    deviations = values - np.repeat(mean[nonempty], counts)
+    std[nonempty] = np.sqrt(np.add.reduceat(np.square(deviations), starts) / counts)
+
+    return mean, std
+
 # Example usage (hypothetical data)
 latitude = 40.7128
 longitude = -74.0060
@@ -112,3 +337,34 @@ sound_data = [(400, 0.5), (1000, 0.8), (500, 0.3)]  # (frequency, amplitude)
 analysis = analyze_aura_vibrations(latitude, longitude, birth_season, birth_time, 
                                    brainwave_data, light_source, intensity, color_temperature, sound_data)
 print(analysis)
+
+# Batch analysis of a synthetic cohort sharing the example location
+cohort_size = 10000
+rng = np.random.default_rng(0)
+cohort = analyze_aura_vibrations_batch(
+    np.full(cohort_size, latitude), np.full(cohort_size, longitude),
+    rng.choice(BIRTH_SEASONS, cohort_size), rng.choice(BIRTH_TIMES, cohort_size),
+    [rng.normal(14, 3, rng.integers(5, 50)) for _ in range(cohort_size)],
+    rng.choice(LIGHT_SOURCES, cohort_size), rng.integers(0, 101, cohort_size), rng.integers(2000, 7000, cohort_size),
+    [rng.uniform((100, 0), (2000, 1), (rng.integers(3, 30), 2)) for _ in range(cohort_size)]
+)
+print(f"Mean aura resonance over {cohort_size} profiles: {np.mean(cohort['aura_resonance']):.2f}")
+
+# Store the cohort's recordings compactly and analyze them straight from memory-mapped files
+rng = np.random.default_rng(1)
+brainwave_samples = RaggedSamples.from_sequences([rng.normal(14, 3, rng.integers(5, 50)) for _ in range(cohort_size)])
+sound_samples = RaggedSamples.from_sequences(
+    [rng.uniform((100, 0), (2000, 1), (rng.integers(3, 30), 2)) for _ in range(cohort_size)], width=2)
+
+with tempfile.TemporaryDirectory() as directory:
+    brainwave_samples.save(os.path.join(directory, "brainwaves"))
+    sound_samples.save(os.path.join(directory, "sounds"))
+
+    cohort = analyze_aura_vibrations_batch(
+        np.full(cohort_size, latitude), np.full(cohort_size, longitude),
+        rng.integers(0, 4, cohort_size), rng.integers(0, 2, cohort_size),
+        RaggedSamples.load(os.path.join(directory, "brainwaves")),
+        rng.integers(0, 2, cohort_size), rng.integers(0, 101, cohort_size), rng.integers(2000, 7000, cohort_size),
+        RaggedSamples.load(os.path.join(directory, "sounds"))
+    )
+    print(f"Mean aura resonance from memory-mapped samples: {np.mean(cohort['aura_resonance']):.2f}")
@@ -1,12 +1,10 @@
-import datetime
-from astral import LocationInfo
-from astral.sun import sun
 import ephem
 import numpy as np
-import pytz  # For timezone handling
+import day_night
+import instrumentation
 
 def analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time, 
-                                   brainwave_data, light_source, intensity, color_temperature, date=None):
+                                   brainwave_data, light_source, intensity, color_temperature, date=None, at=None):
     """
     Analyzes the interaction between natural/artificial light, human aura, 
     and brainwave patterns based on location, birth information, and light 
@@ -23,31 +21,23 @@ def analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time
         intensity (int): The light intensity on a scale of 0-100.
         color_temperature (int): The color temperature of the light in Kelvin.
         date (datetime.date, optional): The date for which to calculate light levels. 
-                                        Defaults to the current date.
+                                        Defaults to the date of `at` in the location's timezone.
+        at (datetime.datetime, optional): The moment that decides between day and night. 
+                                          Naive datetimes are taken as UTC. Defaults to the current time.
 
     Returns:
         A dictionary containing insights into the light-aura-brainwave interaction.
     """
 
+    at = day_night.resolve_time(at)
     if date is None:
-        date = datetime.date.today()
+        date = day_night.local_date(latitude, longitude, at)
 
-    # Get sunrise and sunset times using astral
-    location = LocationInfo(latitude=latitude, longitude=longitude)
-    s = sun(location.observer, date=date)
-
-    # Get the correct timezone from astral LocationInfo
-    timezone = pytz.timezone(location.timezone)
-
-    # Make the current time timezone-aware
-    now = datetime.datetime.now(timezone)
-
-    # Convert sunrise and sunset to timezone-aware datetimes if they are naive
-    sunrise = s['sunrise'].astimezone(timezone)
-    sunset = s['sunset'].astimezone(timezone)
+    # Get sunrise and sunset of the local date (cached, or from a sun table), as UTC epoch seconds
+    sunrise, sunset = day_night.local_sun_times(latitude, longitude, date)
 
     # Determine if it's day or night
-    is_night = now < sunrise or now > sunset
+    is_night = day_night.is_night(latitude, longitude, at, date)
 
     # Base aura resonance based on birth season and time
     base_aura_resonance_day = {
@@ -75,12 +65,13 @@ def analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time
             observer.date = date
 
             moon = ephem.Moon()
+            instrumentation.count("ephem")
             moon.compute(observer)
             illuminated_fraction = moon.phase / 100
             light_influence = illuminated_fraction * 20
         else:
             # Sunlight calculations (simplified)
-            day_length_hours = (sunset - sunrise).seconds / 3600
+            day_length_hours = (sunset - sunrise) / 3600
             light_influence = (day_length_hours - 12) * 2 + intensity * 0.5 - abs(color_temperature - 5000) / 1000
     else:  # Artificial light
         light_influence = intensity * 0.3 - abs(color_temperature - 4000) / 2000
@@ -101,16 +92,17 @@ def analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time
     return analysis
 
 
-# Example usage (hypothetical data)
-latitude = 40.7128  # New York City
-longitude = -74.0060
-birth_season = "Summer"
-birth_time = "Day"
-brainwave_data = [10, 12, 9, 11]  # Example alpha wave frequencies
-light_source = "Natural"
-intensity = 70
-color_temperature = 5500
-
-analysis = analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time, 
-                                          brainwave_data, light_source, intensity, color_temperature)
-print(analysis)
+if __name__ == "__main__":
+    # Example usage (hypothetical data)
+    latitude = 40.7128  # New York City
+    longitude = -74.0060
+    birth_season = "Summer"
+    birth_time = "Day"
+    brainwave_data = [10, 12, 9, 11]  # Example alpha wave frequencies
+    light_source = "Natural"
+    intensity = 70
+    color_temperature = 5500
+
+    analysis = analyze_light_aura_interaction(latitude, longitude, birth_season, birth_time, 
+                                              brainwave_data, light_source, intensity, color_temperature)
+    print(analysis)
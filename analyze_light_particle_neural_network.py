@@ -1,22 +1,41 @@
 import numpy as np
-from sklearn.decomposition import PCA
+import shared_arrays
 from matplotlib.colors import hsv_to_rgb
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+import headless_render
 
 class LightParticleNeuralNetwork:
-    def __init__(self, num_neurons):
+    def __init__(self, num_neurons, storage=None, directory=None, dtype=np.float64):
+        """
+        Args:
+            num_neurons (int): The number of neurons.
+            storage (str, optional): "shared_memory" or "memmap" to keep the weights and thresholds in
+                                     shared storage, which worker processes attach to
+                                     (see `shared_arrays.share`) without copying.
+            directory (str, optional): The directory of the memmap files.
+            dtype (np.dtype): The dtype of the weights, thresholds and updates, e.g.
+                              np.float32 for half the memory.
+        """
         self.num_neurons = num_neurons
-        self.weights = np.random.rand(num_neurons, num_neurons)
-        self.thresholds = np.random.rand(num_neurons)
+        self.dtype = np.dtype(dtype)
+        self.shared_arrays = shared_arrays.SharedArrays(storage, directory) if storage else None
+        self.weights = shared_arrays.place(self.shared_arrays, "weights",
+                                           np.random.rand(num_neurons, num_neurons).astype(self.dtype, copy=False))
+        self.thresholds = shared_arrays.place(self.shared_arrays, "thresholds",
+                                              np.random.rand(num_neurons).astype(self.dtype, copy=False))
     
     def process_light_pattern(self, light_pattern):
         """ Update weights and thresholds based on the light pattern. """
         if len(light_pattern) != self.num_neurons:
             raise ValueError("Light pattern length must match the number of neurons.")
-        # Update weights based on the light pattern
-        self.weights += np.outer(light_pattern, light_pattern)
-        self.thresholds += np.array(light_pattern)
+        # Update weights based on the light pattern, in the network's dtype
+        weight_update, threshold_update = self.calculate_updates(light_pattern)
+        self.weights += weight_update
+        self.thresholds += threshold_update
+
+    def calculate_updates(self, light_pattern):
+        """ Calculate the weight and threshold increments of a light pattern, in the network's dtype. """
+        light_pattern = np.asarray(light_pattern, dtype=self.dtype)
+        return np.outer(light_pattern, light_pattern), light_pattern
 
 def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
     """ Analyze the particle resonance and flux from provided data. """
@@ -30,7 +49,9 @@ def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data,
         "frequency_flux": frequency_flux
     }
 
-def analyze_light_particle_neural_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+def analyze_light_particle_neural_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations,
+                                          embedding_path=None, plot_sample_size=None, output_path=None, 
+                                          max_plot_points=100_000, compute_only=False, dtype=np.float64):
     """
     Analyzes the interplay of light patterns, particle vibrations, and neural network dynamics.
     
@@ -39,18 +60,28 @@ def analyze_light_particle_neural_network(light_patterns, particle_energy_vibrat
         particle_energy_vibrations (list): A list of energy vibration frequencies of the particles.
         light_flux_data (list): A list of light flux intensity values across various frequencies.
         sound_wave_transformations (list): A list of sound wave transformation data.
+        embedding_path (str, optional): Where to store the 3D projection as a float32 .npy 
+                                        memmap, computed out of core instead of in memory.
+        plot_sample_size (int, optional): The number of points (a reservoir sample) plotted 
+                                          from an out-of-core projection.
+        output_path (str, optional): If given, render headlessly with Agg to this file 
+                                     (PNG, SVG, ...) instead of showing the figure.
+        max_plot_points (int): The maximum number of points drawn in the scatter plot.
+        compute_only (bool): If True, skip the PCA and the figure, and return the data 
+                             needed to draw it later under "plot_data".
+        dtype (np.dtype): The dtype of the network's weights and thresholds, e.g. np.float32.
 
     Returns:
         A dictionary containing insights into particle resonance, frequency flux,
         neural network weights, and a 3D visualization of the combined data.
     """
     # Validate inputs
-    if not (light_patterns and particle_energy_vibrations and light_flux_data and sound_wave_transformations):
+    if not all(len(data) for data in (light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)):
         raise ValueError("All input data must be provided and non-empty.")
 
     # Initialize the neural network
     num_neurons = len(particle_energy_vibrations)  # Number of neurons based on particle data
-    neural_network = LightParticleNeuralNetwork(num_neurons)
+    neural_network = LightParticleNeuralNetwork(num_neurons, dtype=dtype)
 
     # Process light patterns and update neuron weights
     for light_pattern in light_patterns:
@@ -71,26 +102,13 @@ def analyze_light_particle_neural_network(light_patterns, particle_energy_vibrat
     color = hsv_to_rgb((hue, saturation, value))
 
     # Prepare data for visualization without weights
-    combined_data = np.column_stack((
-        particle_energy_vibrations, 
-        light_flux_data, 
-        sound_wave_transformations,
-        neural_network.thresholds
-    ))
-
-    # Dimensionality reduction using PCA
-    pca = PCA(n_components=3)
-    reduced_data = pca.fit_transform(combined_data)
-
-    # 3D visualization
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    ax.scatter(reduced_data[:, 0], reduced_data[:, 1], reduced_data[:, 2], c=color, marker='o')
-    ax.set_xlabel('Principal Component 1')
-    ax.set_ylabel('Principal Component 2')
-    ax.set_zlabel('Principal Component 3')
-    ax.set_title('3D Visualization of Light Particle Interplay')
-    plt.show()
+    columns = [particle_energy_vibrations, light_flux_data, sound_wave_transformations, neural_network.thresholds]
+
+    # Dimensionality reduction using PCA and 3D visualization, deferred in compute-only mode
+    plot_data = headless_render.ProjectionPlot(columns, color, title='3D Visualization of Light Particle Interplay')
+    embedding = None
+    if not compute_only:
+        embedding = plot_data.render(output_path, max_plot_points, embedding_path, plot_sample_size)
 
     # Interpret the results
     analysis = {
@@ -98,15 +116,20 @@ def analyze_light_particle_neural_network(light_patterns, particle_energy_vibrat
         "neural_network_weights": neural_network.weights.tolist(),  # Include weights in the result
         "visualization": "3D scatter plot reflecting the interplay of light patterns, particle vibrations, and neural network dynamics"
     }
+    if compute_only:
+        analysis["plot_data"] = plot_data
+    if embedding is not None:
+        analysis["embedding"] = embedding
 
     return analysis
 
-# Example usage
-light_patterns = [[80, 70, 90], [60, 50, 70], [95, 85, 75]]  # Example light patterns
-particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
-light_flux_data = [0.5, 0.6, 0.4]
-sound_wave_transformations = [0.1, 0.2, 0.3]  # Placeholder for sound data
+if __name__ == "__main__":
+    # Example usage
+    light_patterns = [[80, 70, 90], [60, 50, 70], [95, 85, 75]]  # Example light patterns
+    particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
+    light_flux_data = [0.5, 0.6, 0.4]
+    sound_wave_transformations = [0.1, 0.2, 0.3]  # Placeholder for sound data
 
-# Run the analysis
-analysis = analyze_light_particle_neural_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
-print(analysis)
+    # Run the analysis
+    analysis = analyze_light_particle_neural_network(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    print(analysis)
@@ -3,40 +3,134 @@ from qiskit import QuantumCircuit
 from qiskit_aer import AerSimulator  # Use AerSimulator for quantum computations
 from qiskit.circuit.library import QFT  # Quantum Fourier Transform
 import numpy as np
+import instrumentation
+import shared_arrays
 
 # ... (other necessary imports from previous scripts)
 
 class LightParticleNeuralNetwork:
-    def __init__(self, num_neurons):
+    def __init__(self, num_neurons, storage=None, directory=None, dtype=np.float64):
+        """
+        Args:
+            num_neurons (int): The number of neurons.
+            storage (str, optional): "shared_memory" or "memmap" to keep the weights and thresholds in
+                                     shared storage, which worker processes attach to
+                                     (see `shared_arrays.share`) without copying.
+            directory (str, optional): The directory of the memmap files.
+            dtype (np.dtype): The dtype of the weights, thresholds and updates, e.g.
+                              np.float32 for half the memory.
+        """
         self.num_neurons = num_neurons
-        self.weights = np.random.rand(num_neurons, num_neurons)
-        self.thresholds = np.random.rand(num_neurons)
+        self.dtype = np.dtype(dtype)
+        self.shared_arrays = shared_arrays.SharedArrays(storage, directory) if storage else None
+        self.weights = shared_arrays.place(self.shared_arrays, "weights",
+                                           np.random.rand(num_neurons, num_neurons).astype(self.dtype, copy=False))
+        self.thresholds = shared_arrays.place(self.shared_arrays, "thresholds",
+                                              np.random.rand(num_neurons).astype(self.dtype, copy=False))
 
     def process_light_pattern(self, light_pattern):
-        # Simple processing: update weights based on light pattern
-        self.weights += np.outer(light_pattern, light_pattern)
-        self.thresholds += np.array(light_pattern)
+        # Simple processing: update weights based on light pattern, in the network's dtype
+        weight_update, threshold_update = self.calculate_updates(light_pattern)
+        self.weights += weight_update
+        self.thresholds += threshold_update
 
-def construct_hypervector(particle_analysis, weights, thresholds, quantum_amplitudes):
-    # Normalize the quantum amplitudes
-    normalized_quantum_amplitudes = quantum_amplitudes / np.linalg.norm(quantum_amplitudes)
+    def calculate_updates(self, light_pattern):
+        """ Calculate the weight and threshold increments of a light pattern, in the network's dtype. """
+        light_pattern = np.asarray(light_pattern, dtype=self.dtype)
+        return np.outer(light_pattern, light_pattern), light_pattern
 
-    # Normalize weights and thresholds
-    normalized_weights = weights.flatten() / np.linalg.norm(weights)
-    normalized_thresholds = thresholds / np.linalg.norm(thresholds)
-
-    # Concatenate the normalized components into a single hypervector
-    hypervector = np.concatenate((normalized_quantum_amplitudes, normalized_weights, normalized_thresholds))
-
-    # Ensure the hypervector is normalized
-    hypervector /= np.linalg.norm(hypervector)
-
-    return hypervector
+class Hypervector:
+    """
+    A hypervector kept as its unscaled blocks plus one scale per block, with the
+    norms, sums and per-block maxima computed once at construction. Statistics are derived from
+    them without materializing the (n² + n + k) values; `materialize` writes the
+    scaled blocks into a single buffer only when the values themselves are needed.
+    """
 
+    def __init__(self, blocks, norms):
+        self.blocks = blocks
+        self.norms = np.asarray(norms, dtype=float)
+
+        # Each block is scaled to unit norm, then the whole vector to unit norm
+        self.scales = 1 / (self.norms * np.sqrt(len(blocks)))
+        self.size = sum(len(block) for block in blocks)
+        self.block_sums = np.array([np.sum(block) for block in blocks]) * self.scales
+        self.sum_of_squares = np.sum((self.norms * self.scales) ** 2)
+
+        # The largest scaled value of each block and its index in the hypervector
+        self.block_maxima = np.full(len(blocks), -np.inf)
+        self.block_argmaxima = np.zeros(len(blocks), dtype=np.intp)
+        offset = 0
+        for position, (block, scale) in enumerate(zip(blocks, self.scales)):
+            if len(block):
+                index = np.argmax(block) if scale >= 0 else np.argmin(block)
+                self.block_maxima[position] = block[index] * scale
+                self.block_argmaxima[position] = offset + index
+            offset += len(block)
+
+    def __len__(self):
+        return self.size
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.materialize()
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def sum(self):
+        """ The sum of the hypervector's values. """
+        return np.sum(self.block_sums)
+
+    def mean(self):
+        """ The mean of the hypervector's values. """
+        return self.sum() / self.size
+
+    def var(self):
+        """ The variance of the hypervector's values. """
+        return self.sum_of_squares / self.size - self.mean() ** 2
+
+    def argmax(self):
+        """ The index of the hypervector's largest value, from the per-block maxima. """
+        return int(self.block_argmaxima[np.argmax(self.block_maxima)])
+
+    def materialize(self, out=None):
+        """
+        Write the scaled blocks into one contiguous array.
+
+        Args:
+            out (np.array, optional): A preallocated 1-D buffer of length `len(self)` to write into.
+
+        Returns:
+            np.array: The hypervector values.
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=np.result_type(*self.blocks, float))
+        offset = 0
+        for block, scale in zip(self.blocks, self.scales):
+            np.multiply(block, scale, out=out[offset:offset + len(block)])
+            offset += len(block)
+        return out
+
+@instrumentation.instrumented("quantum.hypervector")
+def construct_hypervector(particle_analysis, weights, thresholds, quantum_amplitudes, out=None, lazy=False):
+    # Component blocks as views of the inputs, without copying the weights
+    blocks = [np.asarray(quantum_amplitudes), np.asarray(weights).reshape(-1), np.asarray(thresholds)]
+
+    # Normalize each component once, then the concatenated hypervector
+    hypervector = Hypervector(blocks, [np.linalg.norm(block) for block in blocks])
+
+    # Lazily, only the norms and sums are computed; otherwise the scaled blocks are written into `out`
+    if lazy:
+        return hypervector
+    return hypervector.materialize(out)
+
+@instrumentation.instrumented("quantum.color_patterns")
 def analyze_color_patterns(hypervector):
     # Example logic: Calculate mean and variance from the hypervector
-    mean_value = np.mean(hypervector)
-    variance_value = np.var(hypervector)
+    if isinstance(hypervector, Hypervector):
+        mean_value = hypervector.mean()
+        variance_value = hypervector.var()
+    else:
+        mean_value = np.mean(hypervector)
+        variance_value = np.var(hypervector)
 
     # Generate a color representation based on mean and variance
     color_representation = {
@@ -47,10 +141,15 @@ def analyze_color_patterns(hypervector):
 
     return color_representation
 
+@instrumentation.instrumented("quantum.overall_effect")
 def interpret_overall_effect(hypervector):
     # Example interpretation logic based on hypervector components
-    total_energy = np.sum(hypervector)
-    dominant_feature_index = np.argmax(hypervector)
+    if isinstance(hypervector, Hypervector):
+        total_energy = hypervector.sum()
+        dominant_feature_index = hypervector.argmax()
+    else:
+        total_energy = np.sum(hypervector)
+        dominant_feature_index = np.argmax(hypervector)
     overall_effect_description = ""
 
     if total_energy > 1:
@@ -64,6 +163,7 @@ def interpret_overall_effect(hypervector):
         "description": overall_effect_description
     }
 
+@instrumentation.instrumented("quantum.resonance_flux")
 def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
     # Placeholder function for particle resonance and flux analysis
     base_resonance = np.mean(particle_energy_vibrations)
@@ -93,7 +193,9 @@ def manual_qft(qc, n):
     for i in range(n // 2):
         qc.swap(i, n - i - 1)
 
-def analyze_light_particle_neural_network_quantum(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+@instrumentation.instrumented("quantum")
+def analyze_light_particle_neural_network_quantum(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations,
+                                                  dtype=np.float64):
     """
     Analyzes the interplay of light patterns, particle vibrations, and neural network dynamics, 
     leveraging CuPy for GPU acceleration and Qiskit Aer for quantum computations.
@@ -103,6 +205,7 @@ def analyze_light_particle_neural_network_quantum(light_patterns, particle_energ
         particle_energy_vibrations (list): A list of energy vibration frequencies of the particles.
         light_flux_data (list): A list of light flux intensity values across various frequencies.
         sound_wave_transformations (list): A list of sound wave transformation data.
+        dtype (np.dtype): The dtype of the network's weights and thresholds, e.g. np.float32.
 
     Returns:
         A dictionary containing insights into the particle resonance, frequency flux,
@@ -112,12 +215,13 @@ def analyze_light_particle_neural_network_quantum(light_patterns, particle_energ
 
     # Initialize the neural network
     num_neurons = len(particle_energy_vibrations)
-    neural_network = LightParticleNeuralNetwork(num_neurons)
+    neural_network = LightParticleNeuralNetwork(num_neurons, dtype=dtype)
 
     # Process light patterns and update neuron weights (using CuPy for GPU acceleration)
-    light_patterns_gpu = cp.array(light_patterns)
-    for light_pattern in light_patterns_gpu:
-        neural_network.process_light_pattern(light_pattern.get())  # Transfer data back to CPU for processing
+    with instrumentation.stage("quantum.weight_updates"):
+        light_patterns_gpu = cp.array(light_patterns)
+        for light_pattern in light_patterns_gpu:
+            neural_network.process_light_pattern(light_pattern.get())  # Transfer data back to CPU for processing
 
     # Analyze particle resonance and flux (using CuPy for GPU acceleration)
     particle_energy_vibrations_gpu = cp.array(particle_energy_vibrations)
@@ -160,11 +264,13 @@ def analyze_light_particle_neural_network_quantum(light_patterns, particle_energ
     qc.measure_all()  # Measure all qubits
 
     # Transpile the quantum circuit
-    transpiled_circuit = transpile(qc)
+    with instrumentation.stage("quantum.transpile"):
+        transpiled_circuit = transpile(qc)
 
     # Execute the quantum circuit using AerSimulator
-    simulator = AerSimulator()
-    result = simulator.run(transpiled_circuit).result()  # Run the transpiled circuit directly
+    with instrumentation.stage("quantum.simulation"):
+        simulator = AerSimulator()
+        result = simulator.run(transpiled_circuit).result()  # Run the transpiled circuit directly
 
     # Get the counts of the results
     counts = result.get_counts(transpiled_circuit)
@@ -181,7 +287,8 @@ def analyze_light_particle_neural_network_quantum(light_patterns, particle_energ
         particle_analysis, 
         neural_network.weights, 
         neural_network.thresholds, 
-        quantum_amplitudes  # Using the converted NumPy array
+        quantum_amplitudes,  # Using the converted NumPy array
+        lazy=True  # The analyses below only need the precomputed norms and sums
     )
 
     # Analyze color patterns and overall effect
@@ -199,12 +306,13 @@ def analyze_light_particle_neural_network_quantum(light_patterns, particle_energ
 
     return analysis
 
-# Example usage
-light_patterns = [[80, 70, 90], [60, 50, 70], [95, 85, 75]]  # Example light patterns
-particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
-light_flux_data = [0.5, 0.6, 0.4]
-sound_wave_transformations = [0.1, 0.2, 0.3]  # Placeholder for sound data
+if __name__ == "__main__":
+    # Example usage
+    light_patterns = [[80, 70, 90], [60, 50, 70], [95, 85, 75]]  # Example light patterns
+    particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
+    light_flux_data = [0.5, 0.6, 0.4]
+    sound_wave_transformations = [0.1, 0.2, 0.3]  # Placeholder for sound data
 
-# Run the analysis
-analysis = analyze_light_particle_neural_network_quantum(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
-print(analysis)
+    # Run the analysis
+    analysis = analyze_light_particle_neural_network_quantum(light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    print(analysis)
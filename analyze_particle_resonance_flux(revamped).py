@@ -1,7 +1,12 @@
 import numpy as np
-from scipy import signal
+from scipy import fft, signal
+import instrumentation
 
-def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+# Bump when the results of `analyze_particle_resonance_flux` change, to invalidate cached results
+ANALYSIS_VERSION = 1
+
+@instrumentation.instrumented("resonance_flux")
+def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations, cache=None):
     """
     Analyzes the frequency flux of particle resonance, considering particle-energy vibrations, 
     light flux in invisible light fields, and their interaction with sound wave transformations.
@@ -10,6 +15,8 @@ def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data,
         particle_energy_vibrations (list): A list of energy vibration frequencies of the particles.
         light_flux_data (list): A list of light flux intensity values in the invisible light field.
         sound_wave_transformations (list): A list of sound wave transformation data.
+        cache (result_cache.ResultCache, optional): Cache of results by input content; 
+                                                     re-analyzing a cached capture only reads the result.
 
     Returns:
         A dictionary containing insights into the particle resonance and frequency flux.
@@ -20,6 +27,16 @@ def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data,
     light_flux_data = np.array(light_flux_data)
     sound_wave_transformations = np.array(sound_wave_transformations)
 
+    # Reuse the results of a capture analyzed before
+    if cache is None:
+        return calculate_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    key = cache.key("analyze_particle_resonance_flux(revamped)", ANALYSIS_VERSION,
+                    particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    return cache.get_or_compute(key, lambda: calculate_resonance_flux(
+        particle_energy_vibrations, light_flux_data, sound_wave_transformations))
+
+def calculate_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+    """Compute the analysis of `analyze_particle_resonance_flux` from its input arrays."""
     # Calculate base particle resonance frequency
     base_resonance_frequency = np.mean(particle_energy_vibrations)
 
@@ -56,6 +73,7 @@ def analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data,
 
     return analysis
 
+@instrumentation.instrumented("resonance_flux.welch")
 def calculate_sound_influence(sound_wave_transformations):
     """
     Calculate the influence of sound waves on particle resonance.
@@ -77,6 +95,108 @@ def calculate_sound_influence(sound_wave_transformations):
     
     return influence
 
+class WelchPlan:
+    """
+    Precomputed Welch power spectrum plan for captures that all share the same 
+    length and sampling configuration. The window, its scaling, the segment 
+    layout and the FFT workspace are set up once, and whole stacks of captures 
+    are then transformed in a single vectorized call. With the default 
+    arguments the result matches `signal.welch`.
+    """
+
+    def __init__(self, num_samples, fs=1.0, window="hann", nperseg=256, noverlap=None, workers=None):
+        """
+        Args:
+            num_samples (int): The length of every capture.
+            fs (float): The sampling frequency.
+            window (str): The window applied to each segment.
+            nperseg (int): The segment length; captures shorter than this are one segment.
+            noverlap (int, optional): The overlap between segments, less than the segment length.
+                                      Defaults to half a segment.
+            workers (int, optional): The number of threads the FFT may use.
+        """
+        self.num_samples = num_samples
+        self.nperseg = min(nperseg, num_samples)
+        self.noverlap = self.nperseg // 2 if noverlap is None else noverlap
+        if self.noverlap >= self.nperseg:
+            raise ValueError("noverlap must be less than nperseg.")
+        self.step = self.nperseg - self.noverlap
+        self.num_segments = (num_samples - self.nperseg) // self.step + 1
+        self.workers = workers
+
+        self.window = signal.get_window(window, self.nperseg)
+        self.frequencies = np.fft.rfftfreq(self.nperseg, 1 / fs)
+
+        # Density scaling, doubled for every bin folded over from negative frequencies
+        self.scale = np.full(len(self.frequencies), 1 / (fs * np.sum(self.window ** 2) * self.num_segments))
+        if self.nperseg % 2:
+            self.scale[1:] *= 2
+        else:
+            self.scale[1:-1] *= 2
+
+        self.workspace = np.empty((0, self.num_segments, self.nperseg))
+
+    def power_spectra(self, captures):
+        """
+        Calculate the Welch power spectrum of every capture.
+
+        Args:
+            captures (np.array): A 2-D array with one capture per row.
+
+        Returns:
+            np.array: One power spectrum per row, over `self.frequencies`.
+        """
+        captures = np.atleast_2d(np.asarray(captures, dtype=float))
+        if captures.shape[1] != self.num_samples:
+            raise ValueError(f"Captures must have {self.num_samples} samples, got {captures.shape[1]}.")
+
+        # Reuse the segment workspace across calls with the same number of captures
+        if self.workspace.shape[0] != captures.shape[0]:
+            self.workspace = np.empty((captures.shape[0], self.num_segments, self.nperseg))
+        segments = self.workspace
+
+        # Cut the overlapping segments, remove their mean and apply the window
+        windows = np.lib.stride_tricks.sliding_window_view(captures, self.nperseg, axis=1)[:, ::self.step]
+        np.subtract(windows, windows.mean(axis=2, keepdims=True), out=segments)
+        segments *= self.window
+
+        spectrum = fft.rfft(segments, axis=2, workers=self.workers)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        return power.sum(axis=1) * self.scale
+
+    def dominant_frequency_and_power(self, captures):
+        """
+        Find the dominant frequency and total power of every capture.
+
+        Args:
+            captures (np.array): A 2-D array with one capture per row.
+
+        Returns:
+            tuple: The dominant frequency and the total spectral power of each row.
+        """
+        power_spectra = self.power_spectra(captures)
+        return self.frequencies[np.argmax(power_spectra, axis=1)], np.sum(power_spectra, axis=1)
+
+def calculate_sound_influence_batch(sound_wave_transformations, plan=None):
+    """
+    Calculate the influence of sound waves on particle resonance for many captures at once.
+
+    Args:
+        sound_wave_transformations (np.array): A 2-D array with one capture per row.
+        plan (WelchPlan, optional): A plan for the captures' length, reused across calls.
+
+    Returns:
+        np.array: The influence of each capture, as `calculate_sound_influence` computes it.
+    """
+    sound_wave_transformations = np.atleast_2d(sound_wave_transformations)
+    if plan is None:
+        plan = WelchPlan(sound_wave_transformations.shape[1])
+
+    dominant_frequency, total_power = plan.dominant_frequency_and_power(sound_wave_transformations)
+    return dominant_frequency * total_power * 0.001
+
+@instrumentation.instrumented("resonance_flux.harmonic_resonance")
 def calculate_harmonic_resonance(particle_energy_vibrations, light_flux_data):
     """
     Calculate the harmonic resonance between particle vibrations and light flux.
@@ -99,6 +219,7 @@ def calculate_harmonic_resonance(particle_energy_vibrations, light_flux_data):
     
     return harmonic_resonance
 
+@instrumentation.instrumented("resonance_flux.anomalies")
 def detect_anomalies(particle_energy_vibrations):
     """
     Detect anomalies in the particle energy vibrations.
@@ -118,6 +239,159 @@ def detect_anomalies(particle_energy_vibrations):
     
     return anomalies.tolist()
 
+class RollingAnomalyDetector:
+    """
+    Incremental anomaly detection for long particle-energy vibration captures. 
+    Each new value is compared with the mean and standard deviation of the 
+    `window_size` values before it; values more than `threshold` standard 
+    deviations away are anomalies. Anomalies are kept as compact int64 arrays 
+    of sample indices and timestamps, sorted by time for range queries.
+    """
+
+    def __init__(self, window_size, threshold=3.0):
+        self.window_size = window_size
+        self.threshold = threshold
+
+        # Ring buffer of the most recent values, shifted by the first value for precision
+        self.window = np.zeros(window_size)
+        self.shift = None
+        self.window_sum = 0.0
+        self.window_square_sum = 0.0
+        self.num_samples = 0
+
+        # Growable anomaly storage; only the first `num_anomalies` entries are valid
+        self.anomaly_indices = np.empty(64, dtype=np.int64)
+        self.anomaly_timestamps = np.empty(64, dtype=np.int64)
+        self.num_anomalies = 0
+
+    def add(self, value, timestamp=None):
+        """
+        Add one sample, in O(1) amortized time.
+
+        Args:
+            value (float): The particle energy vibration.
+            timestamp (int, optional): The sample time, e.g. epoch nanoseconds. Defaults to the sample index.
+
+        Returns:
+            bool: True if the sample is an anomaly.
+        """
+        if self.shift is None:
+            self.shift = value
+        value -= self.shift
+
+        is_anomaly = False
+        if self.num_samples >= self.window_size:
+            mean = self.window_sum / self.window_size
+            variance = max(self.window_square_sum / self.window_size - mean * mean, 0)
+            is_anomaly = abs(value - mean) > self.threshold * variance ** 0.5
+            if is_anomaly:
+                self.record_anomalies([self.num_samples], [self.num_samples if timestamp is None else timestamp])
+
+        # Slide the window: replace the oldest value with the new one
+        position = self.num_samples % self.window_size
+        oldest = self.window[position]
+        self.window[position] = value
+        self.window_sum += value - oldest
+        self.window_square_sum += value * value - oldest * oldest
+        self.num_samples += 1
+
+        # Recompute the running sums once per window to stop rounding errors from accumulating
+        if position == self.window_size - 1:
+            self.window_sum = np.sum(self.window)
+            self.window_square_sum = np.dot(self.window, self.window)
+
+        return is_anomaly
+
+    def extend(self, values, timestamps=None):
+        """
+        Add many samples at once, with vectorized rolling statistics.
+
+        Args:
+            values (np.array): The particle energy vibrations.
+            timestamps (np.array, optional): The sample times. Defaults to the sample indices.
+
+        Returns:
+            np.array: The sample indices of the anomalies found among the new values.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        if self.shift is None:
+            self.shift = values[0]
+
+        # Prepend the current window, oldest first, so every new value sees its full history
+        history_length = min(self.num_samples, self.window_size)
+        history = np.roll(self.window, -(self.num_samples % self.window_size))[self.window_size - history_length:]
+        series = np.concatenate((history, values - self.shift))
+
+        cumulative = np.concatenate(([0.0], np.cumsum(series)))
+        cumulative_squares = np.concatenate(([0.0], np.cumsum(series * series)))
+
+        # Rolling statistics of the window before each new value with a full window
+        positions = np.arange(history_length, len(series))
+        positions = positions[positions >= self.window_size]
+        window_sum = cumulative[positions] - cumulative[positions - self.window_size]
+        window_square_sum = cumulative_squares[positions] - cumulative_squares[positions - self.window_size]
+        mean = window_sum / self.window_size
+        std = np.sqrt(np.maximum(window_square_sum / self.window_size - mean * mean, 0))
+
+        anomalous = np.abs(series[positions] - mean) > self.threshold * std
+        indices = (positions[anomalous] - history_length + self.num_samples).astype(np.int64)
+        if timestamps is None:
+            anomaly_timestamps = indices
+        else:
+            anomaly_timestamps = np.asarray(timestamps, dtype=np.int64)[indices - self.num_samples]
+        self.record_anomalies(indices, anomaly_timestamps)
+
+        # Keep the last window of values in ring-buffer order
+        self.num_samples += len(values)
+        tail = series[-self.window_size:]
+        positions = (np.arange(self.num_samples - len(tail), self.num_samples)) % self.window_size
+        self.window[positions] = tail
+        self.window_sum = np.sum(self.window)
+        self.window_square_sum = np.dot(self.window, self.window)
+
+        return indices
+
+    def record_anomalies(self, indices, timestamps):
+        """
+        Append anomalies, doubling the storage whenever it is full.
+        """
+        count = len(indices)
+        if self.num_anomalies + count > len(self.anomaly_indices):
+            capacity = max(2 * len(self.anomaly_indices), self.num_anomalies + count)
+            self.anomaly_indices = np.resize(self.anomaly_indices, capacity)
+            self.anomaly_timestamps = np.resize(self.anomaly_timestamps, capacity)
+
+        self.anomaly_indices[self.num_anomalies:self.num_anomalies + count] = indices
+        self.anomaly_timestamps[self.num_anomalies:self.num_anomalies + count] = timestamps
+        self.num_anomalies += count
+
+    def anomalies(self):
+        """
+        Get all anomalies so far.
+
+        Returns:
+            tuple: The sample indices and timestamps of the anomalies.
+        """
+        return self.anomaly_indices[:self.num_anomalies], self.anomaly_timestamps[:self.num_anomalies]
+
+    def anomalies_between(self, start, stop):
+        """
+        Get the anomalies with timestamps in [start, stop), by binary search.
+
+        Args:
+            start (int): The first timestamp of the range.
+            stop (int): The end of the range (exclusive).
+
+        Returns:
+            tuple: The sample indices and timestamps of the anomalies in the range.
+        """
+        indices, timestamps = self.anomalies()
+        first, last = np.searchsorted(timestamps, [start, stop])
+        return indices[first:last], timestamps[first:last]
+
+@instrumentation.instrumented("resonance_flux.coherence")
 def calculate_coherence(particle_energy_vibrations, light_flux_data):
     """
     Calculate the coherence between particle vibrations and light flux.
@@ -135,10 +409,26 @@ def calculate_coherence(particle_energy_vibrations, light_flux_data):
     # Return the maximum coherence value
     return np.max(coherence)
 
-# Example usage
-particle_energy_vibrations = np.random.normal(1e15, 1e14, 1000)  # Example: 1000 measurements around 1 PeV
-light_flux_data = np.random.normal(0.5, 0.1, 1000)  # Example: 1000 measurements of light flux
-sound_wave_transformations = np.random.normal(0, 1, 1000)  # Example: 1000 measurements of sound wave data
+if __name__ == "__main__":
+    # Example usage
+    particle_energy_vibrations = np.random.normal(1e15, 1e14, 1000)  # Example: 1000 measurements around 1 PeV
+    light_flux_data = np.random.normal(0.5, 0.1, 1000)  # Example: 1000 measurements of light flux
+    sound_wave_transformations = np.random.normal(0, 1, 1000)  # Example: 1000 measurements of sound wave data
+
+    analysis = analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    print(analysis)
+
+    # Sound influence of many captures sharing one spectral plan
+    captures = np.random.normal(0, 1, (500, 1000))
+    plan = WelchPlan(captures.shape[1])
+    influences = calculate_sound_influence_batch(captures, plan)
+    print("Batch sound influence matches:", np.allclose(influences[0], calculate_sound_influence(captures[0])))
 
-analysis = analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
-print(analysis)
\ No newline at end of file
+    # Rolling anomaly detection over a long capture with injected spikes
+    capture = np.random.normal(1e15, 1e14, 1_000_000)
+    capture[::50_000] += 1e15
+    timestamps = np.arange(len(capture), dtype=np.int64) * 1_000_000  # 1 kHz, in nanoseconds
+    detector = RollingAnomalyDetector(window_size=10_000)
+    detector.extend(capture, timestamps)
+    indices, _ = detector.anomalies_between(0, 500 * 1_000_000_000)
+    print(f"{detector.num_anomalies} rolling anomalies, {len(indices)} in the first 500 seconds")
@@ -55,16 +55,17 @@ def calculate_sound_influence(sound_wave_transformations):
     Returns:
         float: The calculated influence of sound waves on particle resonance.
     """
-    if not sound_wave_transformations:
+    if len(sound_wave_transformations) == 0:
         return 0.0  # Return 0 if no sound data is provided
     
     # Example calculation (adjust based on your specific requirements)
     return np.mean(sound_wave_transformations) * 0.05
 
-# Example usage
-particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
-light_flux_data = [0.5, 0.6, 0.4]
-sound_wave_transformations = [0.1, 0.2, 0.3]  # Example sound data
+if __name__ == "__main__":
+    # Example usage
+    particle_energy_vibrations = [1e15, 1.2e15, 0.9e15]
+    light_flux_data = [0.5, 0.6, 0.4]
+    sound_wave_transformations = [0.1, 0.2, 0.3]  # Example sound data
 
-analysis = analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
-print(analysis)
\ No newline at end of file
+    analysis = analyze_particle_resonance_flux(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    print(analysis)
\ No newline at end of file
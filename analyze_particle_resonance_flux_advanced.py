@@ -1,15 +1,56 @@
 import numpy as np
 from scipy.signal import welch
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.colors import hsv_to_rgb
-def analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+import headless_render
+
+# Bump when the results of `calculate_resonance_flux_features` change, to invalidate cached results
+ANALYSIS_VERSION = 1
+
+def analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_flux_data, sound_wave_transformations,
+                                             embedding_path=None, plot_sample_size=None, output_path=None, 
+                                             max_plot_points=100_000, compute_only=False, cache=None):
     """
     Analyzes the frequency flux of particle resonance, incorporating advanced concepts 
     like dynamic means, tri-cosinal wave interactions, and hypervector states, with 
     enhanced detail and visualization.
+
+    For captures too large to stack in memory, pass `embedding_path` and/or 
+    `plot_sample_size`: the 3D projection is then computed out of core into a 
+    float32 memmap and only a reservoir sample of it is plotted.
+
+    Pass `output_path` to render the figure headlessly with Agg to a PNG/SVG 
+    file instead of showing it; at most `max_plot_points` points are drawn.
+
+    With `compute_only`, the PCA and the figure are skipped entirely and the 
+    data needed to draw it later is returned under "plot_data".
+
+    Pass a `result_cache.ResultCache` as `cache` to reuse the numeric results of 
+    captures analyzed before; only the visualization is then redone.
     """
+    # Reuse the numeric results of a capture analyzed before
+    if cache is None:
+        analysis = calculate_resonance_flux_features(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    else:
+        key = cache.key("analyze_particle_resonance_flux_advanced", ANALYSIS_VERSION,
+                        particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+        analysis = cache.get_or_compute(key, lambda: calculate_resonance_flux_features(
+            particle_energy_vibrations, light_flux_data, sound_wave_transformations))
+
+    plot_data = headless_render.ProjectionPlot([particle_energy_vibrations, light_flux_data, sound_wave_transformations], 
+                                               analysis["color_patterns"])
+    embedding = None
+    if not compute_only:
+        embedding = plot_data.render(output_path, max_plot_points, embedding_path, plot_sample_size)
+
+    if compute_only:
+        analysis["plot_data"] = plot_data
+    if embedding is not None:
+        analysis["embedding"] = embedding
+
+    return analysis
+
+def calculate_resonance_flux_features(particle_energy_vibrations, light_flux_data, sound_wave_transformations):
+    """Compute the numeric part of the advanced analysis, everything but the visualization."""
     # Main function remains mostly unchanged
     dynamic_mean_particles = calculate_dynamic_mean(particle_energy_vibrations)
     dynamic_mean_light = calculate_dynamic_mean(light_flux_data)
@@ -29,18 +70,7 @@ def analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_f
     frequencies, power_spectrum = welch(particle_energy_vibrations)
     dominant_frequencies = frequencies[np.argpartition(power_spectrum, -3)[-3:]]
 
-    pca = PCA(n_components=3)
-    reduced_data = pca.fit_transform(np.column_stack((particle_energy_vibrations, light_flux_data, sound_wave_transformations)))
-
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    ax.scatter(reduced_data[:, 0], reduced_data[:, 1], reduced_data[:, 2], c=color_patterns)
-    ax.set_xlabel('Principal Component 1')
-    ax.set_ylabel('Principal Component 2')
-    ax.set_zlabel('Principal Component 3')
-    plt.show()
-
-    analysis = {
+    return {
         "flux_ratio": flux_ratio,
         "color_patterns": color_patterns,
         "overall_effect": overall_effect,
@@ -48,8 +78,6 @@ def analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_f
         "visualization": "3D scatter plot reflecting particle resonance and flux"
     }
 
-    return analysis
-
 def calculate_dynamic_mean(data):
     """Calculate the dynamic mean of the data using exponential moving average."""
     alpha = 0.2  # Smoothing factor
@@ -109,10 +137,11 @@ def interpret_overall_effect(hypervector):
     else:
         return "Weak or negligible resonance effect"
 
-# Example usage
-particle_energy_vibrations = np.random.rand(100) * 1e15
-light_flux_data = np.random.rand(100)
-sound_wave_transformations = np.random.rand(100)
+if __name__ == "__main__":
+    # Example usage
+    particle_energy_vibrations = np.random.rand(100) * 1e15
+    light_flux_data = np.random.rand(100)
+    sound_wave_transformations = np.random.rand(100)
 
-analysis = analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
-print(analysis)
\ No newline at end of file
+    analysis = analyze_particle_resonance_flux_advanced(particle_energy_vibrations, light_flux_data, sound_wave_transformations)
+    print(analysis)
\ No newline at end of file
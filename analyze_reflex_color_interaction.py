@@ -1,5 +1,12 @@
 import numpy as np
 
+# Overall effect descriptions, indexed by the effect codes of the windowed analysis
+OVERALL_EFFECTS = (
+    " a subdued and introspective mood.",
+    " a calm and focused state of mind.",
+    " heightened awareness and a sense of exhilaration."
+)
+
 def analyze_reflex_color_interaction(light_flux_data, frequency_patterns):
     """
     Analyzes the interplay between reflex responses and color light flux, 
@@ -26,11 +33,11 @@ def analyze_reflex_color_interaction(light_flux_data, frequency_patterns):
 
     # Determine overall effect based on color quality and reflex response
     if color_quality > 80 and reflex_response_intensity > 50:
-        overall_effect = " heightened awareness and a sense of exhilaration."
+        overall_effect = OVERALL_EFFECTS[2]
     elif color_quality > 50 and reflex_response_intensity > 30:
-        overall_effect = " a calm and focused state of mind."
+        overall_effect = OVERALL_EFFECTS[1]
     else:
-        overall_effect = " a subdued and introspective mood."
+        overall_effect = OVERALL_EFFECTS[0]
 
     # Interpret the results
     analysis = {
@@ -41,9 +48,98 @@ def analyze_reflex_color_interaction(light_flux_data, frequency_patterns):
 
     return analysis
 
+def analyze_reflex_color_interaction_windowed(light_flux_data, frequency_patterns, window_size, step=1):
+    """
+    Analyzes the reflex-color interaction over rolling time windows of long 
+    recordings, applying the same rules as `analyze_reflex_color_interaction` 
+    to every window in O(n) time.
+
+    Args:
+        light_flux_data (array): A time series of color light flux intensities.
+        frequency_patterns (array): A time series of reflex frequencies, sampled 
+                                    alongside the light flux data.
+        window_size (int): The number of samples in each window.
+        step (int): The number of samples between the starts of consecutive windows.
+
+    Returns:
+        A dictionary of per-window arrays: the rolling color quality, the rolling 
+        reflex response intensity and compact effect codes that index into 
+        `OVERALL_EFFECTS`.
+    """
+
+    color_intensities = np.asarray(light_flux_data, dtype=float)
+    reflex_frequencies = np.asarray(frequency_patterns, dtype=float)
+
+    if color_intensities.shape != reflex_frequencies.shape or color_intensities.ndim != 1:
+        raise ValueError("Light flux data and frequency patterns must be 1-D series of equal length.")
+    if not 1 <= window_size <= len(color_intensities):
+        raise ValueError("Window size must be between 1 and the length of the series.")
+
+    # Rolling color quality from the difference of cumulative sums
+    cumulative = np.concatenate(([0.0], np.cumsum(color_intensities)))
+    color_quality = (cumulative[window_size:] - cumulative[:-window_size]) / window_size
+
+    # Rolling reflex response intensity
+    reflex_response_intensity = rolling_max(reflex_frequencies, window_size)
+
+    color_quality = color_quality[::step]
+    reflex_response_intensity = reflex_response_intensity[::step]
+
+    # Determine the overall effect code of every window
+    effect_codes = np.zeros(len(color_quality), dtype=np.uint8)
+    effect_codes[(color_quality > 50) & (reflex_response_intensity > 30)] = 1
+    effect_codes[(color_quality > 80) & (reflex_response_intensity > 50)] = 2
+
+    analysis = {
+        "window_starts": np.arange(0, len(color_intensities) - window_size + 1, step),
+        "color_quality": color_quality,
+        "reflex_response_intensity": reflex_response_intensity,
+        "effect_codes": effect_codes
+    }
+
+    return analysis
+
+def rolling_max(data, window_size):
+    """
+    Calculate the maximum of every window of `window_size` consecutive samples.
+
+    Uses the van Herk/Gil-Werman scheme: running maxima from the start and from 
+    the end of fixed blocks, so the cost is O(n) regardless of the window size.
+
+    Args:
+        data (np.array): A 1-D array of values.
+        window_size (int): The number of samples in each window.
+
+    Returns:
+        np.array: The rolling maxima, one per window (len(data) - window_size + 1 values).
+    """
+    num_windows = len(data) - window_size + 1
+    num_blocks = -(-len(data) // window_size)
+
+    blocks = np.full(num_blocks * window_size, -np.inf)
+    blocks[:len(data)] = data
+    blocks = blocks.reshape(num_blocks, window_size)
+
+    prefix_max = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix_max = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    return np.maximum(suffix_max[:num_windows], prefix_max[window_size - 1:window_size - 1 + num_windows])
+
 # Example usage (hypothetical data)
 light_flux_data = [80, 75, 90, 60]  # Red, Green, Blue, Yellow intensities
 frequency_patterns = [40, 55, 30, 45]  # Corresponding reflex frequencies
 
 analysis = analyze_reflex_color_interaction(light_flux_data, frequency_patterns)
-print(analysis)
\ No newline at end of file
+print(analysis)
+
+# Windowed analysis of an hour-long 1 kHz recording with one-second windows
+sampling_rate = 1000
+recording_length = 3600 * sampling_rate
+light_flux_series = 65 + 20 * np.sin(np.linspace(0, 40 * np.pi, recording_length))
+frequency_series = 40 + 15 * np.random.rand(recording_length)
+
+windowed_analysis = analyze_reflex_color_interaction_windowed(light_flux_series, frequency_series, 
+                                                              window_size=sampling_rate, step=sampling_rate)
+codes, counts = np.unique(windowed_analysis["effect_codes"], return_counts=True)
+for code, count in zip(codes, counts):
+    print(f"{count} windows:{OVERALL_EFFECTS[code]}")
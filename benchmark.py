@@ -0,0 +1,318 @@
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+
+# Benchmark sizes, from the toy inputs of the examples up to production scale
+DEFAULT_SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+
+# Largest default size of the cases that cannot reach production scale: full-mode
+# np.correlate is O(n^2) (about 2 s at 10**5), and recall holds every probe in memory
+MAX_DEFAULT_SIZES = {
+    "resonance_flux_revamped": 10**5,
+    "hopfield_recall": 10**5,
+    "hopfield_recall_async": 10**5,
+    "hopfield_recall_float32": 10**5,
+}
+
+# Seconds allowed per case and size
+DEFAULT_TIMEOUT = 600
+
+# Recall is benchmarked on a network of this many neurons storing this many patterns
+RECALL_NEURONS = 1000
+RECALL_PATTERNS = 50
+
+# Results of a reference run, compared against unless another baseline is given
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+def load_function(filename, function_name):
+    """
+    Load a function from one of the repository's scripts by file name, which also
+    works for scripts whose names are not valid module names.
+
+    Args:
+        filename (str): The script, relative to the repository root.
+        function_name (str): The function to load.
+
+    Returns:
+        callable: The function.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    module_name = os.path.splitext(filename)[0].replace("(", "_").replace(")", "")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function_name)
+
+def generate_light_readings(size, rng):
+    """ `size` light sources, intensities (0-100) and color temperatures (K). """
+    return (rng.choice(["Natural", "Artificial"], size).tolist(), rng.integers(0, 101, size).tolist(),
+            rng.integers(1500, 10000, size).tolist())
+
+def generate_rendering(size, rng):
+    """ A square RGBA image of about `size` pixels and a scene with two lights. """
+    side = max(math.isqrt(size), 1)
+    scene_information = {
+        "light_sources": [
+            {"type": "Directional", "intensity": 80},
+            {"type": "Point", "intensity": 30},
+        ]
+    }
+    return rng.random((side, side, 4)), scene_information
+
+def generate_resonance_capture(size, rng):
+    """ `size` samples of particle vibrations, light flux and sound data. """
+    return rng.normal(1e15, 1e14, size), rng.normal(0.5, 0.1, size), rng.normal(0, 1, size)
+
+def generate_network_inputs(size, rng, num_patterns=3):
+    """ Inputs to a network of sqrt(`size`) neurons, i.e. `size` weights. """
+    num_neurons = max(math.isqrt(size), 2)
+    particle_energy_vibrations, light_flux_data, sound_wave_transformations = generate_resonance_capture(num_neurons, rng)
+    light_patterns = rng.random((num_patterns, num_neurons))
+    return light_patterns, particle_energy_vibrations, light_flux_data, sound_wave_transformations
+
+def run_analyze_light(size, rng):
+    analyze_light = load_function("Analyze_Light.py", "analyze_light")
+    readings = list(zip(*generate_light_readings(size, rng)))
+    return lambda: [analyze_light(*reading) for reading in readings]
+
+def run_discern_light_source(size, rng):
+    discern_light_source = load_function("Artificial_and_Natural_Light.py", "discern_light_source")
+    _, intensities, color_temperatures = generate_light_readings(size, rng)
+    return lambda: [discern_light_source(*reading) for reading in zip(intensities, color_temperatures)]
+
+def run_discern_light_source_in_rendering(size, rng):
+    discern_light_source_in_rendering = load_function("Illuminate.py", "discern_light_source_in_rendering")
+    pixel_data, scene_information = generate_rendering(size, rng)
+    return lambda: discern_light_source_in_rendering(pixel_data, scene_information)
+
+def run_resonance_flux(size, rng):
+    analyze_particle_resonance_flux = load_function("analyze_particle_resonance_flux.py", "analyze_particle_resonance_flux")
+    capture = generate_resonance_capture(size, rng)
+    return lambda: analyze_particle_resonance_flux(*capture)
+
+def run_resonance_flux_revamped(size, rng):
+    analyze_particle_resonance_flux = load_function("analyze_particle_resonance_flux(revamped).py",
+                                                    "analyze_particle_resonance_flux")
+    capture = generate_resonance_capture(size, rng)
+    return lambda: analyze_particle_resonance_flux(*capture)
+
+def run_resonance_flux_advanced(size, rng):
+    analyze_particle_resonance_flux_advanced = load_function("analyze_particle_resonance_flux_advanced.py",
+                                                             "analyze_particle_resonance_flux_advanced")
+    capture = generate_resonance_capture(size, rng)
+    return lambda: analyze_particle_resonance_flux_advanced(*capture, compute_only=True)
+
+def run_light_particle_neural_network(size, rng):
+    analyze_light_particle_neural_network = load_function("analyze_light_particle_neural_network.py",
+                                                          "analyze_light_particle_neural_network")
+    inputs = generate_network_inputs(size, rng)
+    return lambda: analyze_light_particle_neural_network(*inputs, compute_only=True)
+
+def run_neuroplasticity(size, rng, dtype=np.float64):
+    network_class = load_function("LightParticleNeuralNetwork.py", "LightParticleNeuralNetwork")
+    light_patterns = generate_network_inputs(size, rng)[0]
+    reward_signals = rng.random(len(light_patterns))
+
+    def run():
+        network = network_class(light_patterns.shape[1], dtype=dtype)
+        network.induce_neuroplasticity(light_patterns, reward_signals)
+    return run
+
+def run_neuroplasticity_float32(size, rng):
+    return run_neuroplasticity(size, rng, dtype=np.float32)
+
+def run_hopfield_hmm(size, rng):
+    analyze_light_particle_hmm_hopfield_network = load_function("LightParticleHopfieldNetwork.py",
+                                                                "analyze_light_particle_hmm_hopfield_network")
+    inputs = generate_network_inputs(size, rng)
+    return lambda: analyze_light_particle_hmm_hopfield_network(*inputs)
+
+def run_hopfield_recall(size, rng, mode="synchronous", dtype=np.float64):
+    network_class = load_function("LightParticleHopfieldNetwork.py", "LightParticleHopfieldNetwork")
+    network = network_class(RECALL_NEURONS, 3, dtype=dtype)
+    stored_patterns = rng.random((RECALL_PATTERNS, RECALL_NEURONS))
+    network.store_patterns(stored_patterns)
+
+    # Probes are stored patterns with 10% of their neurons flipped
+    probes = network.to_states(stored_patterns[rng.integers(0, RECALL_PATTERNS, size)])
+    probes[rng.random(probes.shape) < 0.1] *= -1
+    return lambda: network.recall(probes, mode=mode, seed=0)
+
+def run_hopfield_recall_async(size, rng):
+    return run_hopfield_recall(size, rng, mode="asynchronous")
+
+def run_hopfield_recall_float32(size, rng):
+    return run_hopfield_recall(size, rng, dtype=np.float32)
+
+def run_quantum(size, rng):
+    analyze_light_particle_neural_network_quantum = load_function("analyze_light_particle_neural_network_quantum.py",
+                                                                  "analyze_light_particle_neural_network_quantum")
+    inputs = generate_network_inputs(size, rng)
+    return lambda: analyze_light_particle_neural_network_quantum(*inputs)
+
+# Benchmark cases: each maps a size and a seeded generator to a call of its entry point.
+# Sizes count readings for the per-reading functions, pixels for renderings, samples
+# for captures, weights (neurons squared) for the networks and probes for recall.
+CASES = {
+    "analyze_light": run_analyze_light,
+    "discern_light_source": run_discern_light_source,
+    "discern_light_source_in_rendering": run_discern_light_source_in_rendering,
+    "resonance_flux": run_resonance_flux,
+    "resonance_flux_revamped": run_resonance_flux_revamped,
+    "resonance_flux_advanced": run_resonance_flux_advanced,
+    "light_particle_neural_network": run_light_particle_neural_network,
+    "neuroplasticity": run_neuroplasticity,
+    "neuroplasticity_float32": run_neuroplasticity_float32,
+    "hopfield_hmm": run_hopfield_hmm,
+    "hopfield_recall": run_hopfield_recall,
+    "hopfield_recall_async": run_hopfield_recall_async,
+    "hopfield_recall_float32": run_hopfield_recall_float32,
+    "quantum": run_quantum,
+}
+
+def peak_rss_bytes():
+    """ The peak resident set size of this process so far. """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_case(case, size, seed=0, repeat=3):
+    """
+    Benchmark one case at one size in this process.
+
+    Args:
+        case (str): The name of the case in `CASES`.
+        size (int): The input size.
+        seed (int): The seed of the synthetic data.
+        repeat (int): The number of timed runs; the fastest one is reported.
+
+    Returns:
+        dict: The wall time, throughput and peak RSS of the case, or why it was skipped.
+    """
+    result = {"case": case, "size": size, "seed": seed}
+    try:
+        run = CASES[case](size, np.random.default_rng(seed))
+    except ImportError as error:
+        result["skipped"] = f"missing dependency: {error}"
+        return result
+
+    setup_rss = peak_rss_bytes()
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        wall_times.append(time.perf_counter() - start)
+
+    result["wall_time_s"] = min(wall_times)
+    result["wall_times_s"] = wall_times
+    result["throughput_per_s"] = size / min(wall_times)
+    result["setup_rss_bytes"] = setup_rss
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+def run_isolated(case, size, seed=0, repeat=3, timeout=None):
+    """
+    Benchmark one case in a fresh interpreter, so peak RSS is measured per case
+    and a crash or timeout does not end the whole run.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-one", case, str(size),
+               "--seed", str(seed), "--repeat", str(repeat)]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": case, "size": size, "seed": seed, "error": f"timed out after {timeout} s"}
+
+    if completed.returncode != 0:
+        return {"case": case, "size": size, "seed": seed, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Flag results that are slower or use more memory than the baseline by more than `tolerance`.
+
+    Args:
+        results (list): The results of this run.
+        baseline (list): The results of the reference run.
+        tolerance (float): The allowed relative increase.
+
+    Returns:
+        list: One entry per regression, with the metric and both values.
+    """
+    reference = {(entry["case"], entry["size"]): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        expected = reference.get((result["case"], result["size"]))
+        if expected is None:
+            continue
+        for metric in ("wall_time_s", "peak_rss_bytes"):
+            if metric in result and metric in expected and result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append({"case": result["case"], "size": result["size"], "metric": metric,
+                                    "baseline": expected[metric], "value": result[metric],
+                                    "ratio": result[metric] / expected[metric]})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis entry points on seeded synthetic data.")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        help="Input sizes. Defaults to DEFAULT_SIZES, capped per case by MAX_DEFAULT_SIZES.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds allowed per case and size.")
+    parser.add_argument("--output", help="Write the JSON report here instead of standard output.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Results to compare against, if the file exists.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--run-one", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        case, size = args.run_one
+        print(json.dumps(run_case(case, int(size), args.seed, args.repeat)))
+        return 0
+
+    results = []
+    for case in args.cases:
+        sizes = args.sizes or [size for size in DEFAULT_SIZES if size <= MAX_DEFAULT_SIZES.get(case, size)]
+        timed_out = False
+        for size in sorted(sizes):
+            # Larger inputs would only time out as well
+            if timed_out:
+                result = {"case": case, "size": size, "seed": args.seed, "skipped": "a smaller size timed out"}
+            else:
+                result = run_isolated(case, size, args.seed, args.repeat, args.timeout)
+                timed_out = "timed out" in str(result.get("error", ""))
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            report["regressions"] = compare_to_baseline(results, json.load(file)["results"], args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    # Example usage: python benchmark.py --cases resonance_flux --sizes 1000 1000000 --output report.json
+    sys.exit(main())
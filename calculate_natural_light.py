@@ -1,10 +1,8 @@
-import datetime
-from astral import LocationInfo
-from astral.sun import sun
 import ephem
-import pytz
+import day_night
+import instrumentation
 
-def calculate_natural_light(latitude, longitude, birth_season, birth_time, date=None):
+def calculate_natural_light(latitude, longitude, birth_season, birth_time, date=None, at=None):
     """
     Calculates estimated natural light levels based on location, birth season, 
     birth time, and current date/time, considering both sunlight and moonlight.
@@ -16,33 +14,23 @@ def calculate_natural_light(latitude, longitude, birth_season, birth_time, date=
                             ("Spring", "Summer", "Autumn", "Winter").
         birth_time (str): The time of day the person was born ("Day", "Night").
         date (datetime.date, optional): The date for which to calculate light levels. 
-                                        Defaults to the current date.
+                                        Defaults to the date of `at` in the location's timezone.
+        at (datetime.datetime, optional): The moment that decides between day and night. 
+                                          Naive datetimes are taken as UTC. Defaults to the current time.
 
     Returns:
         float: The estimated natural light level (0-100).
     """
 
+    at = day_night.resolve_time(at)
     if date is None:
-        date = datetime.date.today()
+        date = day_night.local_date(latitude, longitude, at)
 
-    # Create location info for astral to calculate sun times
-    location = LocationInfo(latitude=latitude, longitude=longitude)
-    
-    # Get sunrise and sunset times using astral and calculate the sun times for the given date
-    s = sun(location.observer, date=date)
-
-    # Get the correct timezone from astral LocationInfo
-    timezone = pytz.timezone(location.timezone)
-
-    # Make the current time timezone-aware
-    now = datetime.datetime.now(timezone)
-
-    # Convert sunrise and sunset to timezone-aware datetimes
-    sunrise = s['sunrise'].astimezone(timezone)
-    sunset = s['sunset'].astimezone(timezone)
+    # Get sunrise and sunset of the local date (cached, or from a sun table), as UTC epoch seconds
+    sunrise, sunset = day_night.local_sun_times(latitude, longitude, date)
 
     # Determine if it's day or night
-    is_night = now < sunrise or now > sunset
+    is_night = day_night.is_night(latitude, longitude, at, date)
 
     # Base light levels based on birth season and time
     base_levels_day = {
@@ -62,7 +50,7 @@ def calculate_natural_light(latitude, longitude, birth_season, birth_time, date=
 
     if not is_night:
         # Daylight adjustments
-        day_length_hours = (sunset - sunrise).seconds / 3600
+        day_length_hours = (sunset - sunrise) / 3600
         light_level = base_level + (day_length_hours - 12) * 2 
 
         # Latitude and weather adjustments (simplified)
@@ -79,6 +67,7 @@ def calculate_natural_light(latitude, longitude, birth_season, birth_time, date=
         observer.date = date
 
         moon = ephem.Moon()
+        instrumentation.count("ephem")
         moon.compute(observer)
 
         illuminated_fraction = moon.phase / 100 
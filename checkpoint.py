@@ -0,0 +1,171 @@
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+# Layout of a checkpoint: a fixed header, a JSON description of the network (its
+# class, scalar attributes and arrays), then the raw bytes of each array, aligned
+# to ALIGNMENT bytes so every array can be memory-mapped in place
+MAGIC = b"LPNCKPT\0"
+VERSION = 1
+HEADER_FORMAT = "<8sIQ"
+ALIGNMENT = 64
+
+def save_checkpoint(path, kind, arrays, attributes=None):
+    """
+    Write a checkpoint, through a temporary file and a rename so a crash never
+    leaves a partial checkpoint behind.
+
+    Args:
+        path (str): The checkpoint file.
+        kind (str): What is saved, e.g. the class name; checked on load.
+        arrays (dict): The arrays to save, by name. A list of equally shaped arrays is
+                       saved as one stacked array without stacking it in memory.
+                       None values are skipped.
+        attributes (dict, optional): JSON-serializable values saved with the arrays.
+    """
+    # Every entry becomes a list of equally shaped parts, written back to back
+    parts = {}
+    for name, array in arrays.items():
+        if array is None:
+            continue
+        if isinstance(array, (list, tuple)):
+            parts[name] = [np.asarray(part) for part in array]
+        else:
+            parts[name] = [np.asarray(array)]
+
+    # Arrays are laid out one after another, each starting on an aligned offset
+    descriptors = {}
+    offset = 0
+    for name, array_parts in parts.items():
+        first = array_parts[0] if array_parts else np.empty(0)
+        if any(part.shape != first.shape or part.dtype != first.dtype for part in array_parts):
+            raise ValueError(f"The parts of {name!r} differ in shape or dtype.")
+        if first.dtype.hasobject:
+            raise TypeError(f"Cannot checkpoint {name!r} with object dtype.")
+        stacked = isinstance(arrays[name], (list, tuple))
+        shape = (len(array_parts),) + first.shape if stacked else first.shape
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        descriptors[name] = {"dtype": first.dtype.str, "shape": shape, "offset": offset}
+        offset += first.nbytes * len(array_parts)
+
+    metadata = json.dumps({"kind": kind, "attributes": attributes or {}, "arrays": descriptors}).encode()
+    data_start = -(-(struct.calcsize(HEADER_FORMAT) + len(metadata)) // ALIGNMENT) * ALIGNMENT
+
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(metadata)))
+            file.write(metadata)
+            for name, array_parts in parts.items():
+                file.seek(data_start + descriptors[name]["offset"])
+                # Contiguous arrays (and memmaps) are written straight from their buffer
+                for part in array_parts:
+                    file.write(np.ascontiguousarray(part).data)
+            file.truncate(data_start + offset)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+def load_checkpoint(path, kind=None, mmap_mode="c"):
+    """
+    Open a checkpoint. With a memory-map mode, only the header is read: arrays are
+    mapped in place and paged in as they are used, so loading takes the same
+    time whatever the size of the network.
+
+    Args:
+        path (str): The checkpoint file.
+        kind (str, optional): The expected kind; a checkpoint of another kind is rejected.
+        mmap_mode (str, optional): "c" (copy-on-write: changes stay in memory), "r"
+                                   (read-only), "r+" (changes are written to the
+                                   checkpoint), or None to read the arrays into memory.
+
+    Returns:
+        tuple: The arrays, by name, and the saved attributes.
+    """
+    with open(path, "rb") as file:
+        magic, version, metadata_length = struct.unpack(HEADER_FORMAT, file.read(struct.calcsize(HEADER_FORMAT)))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a network checkpoint.")
+        if version != VERSION:
+            raise ValueError(f"{path} is a version {version} checkpoint; only version {VERSION} can be read.")
+        metadata = json.loads(file.read(metadata_length))
+
+    if kind is not None and metadata["kind"] != kind:
+        raise ValueError(f"{path} holds a {metadata['kind']}, not a {kind}.")
+
+    data_start = -(-(struct.calcsize(HEADER_FORMAT) + metadata_length) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, descriptor in metadata["arrays"].items():
+        dtype = np.dtype(descriptor["dtype"])
+        shape = tuple(descriptor["shape"])
+        offset = data_start + descriptor["offset"]
+        if mmap_mode is None:
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        elif int(np.prod(shape)) == 0:
+            # Empty arrays cannot be memory-mapped
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape)
+    return arrays, metadata["attributes"]
+
+def hmm_state(hmm_model):
+    """
+    The parameters of a GaussianHMM, as checkpoint arrays and attributes.
+
+    Returns:
+        tuple: The fitted parameters (empty if the model is untrained), by name,
+               and the constructor parameters.
+    """
+    params = {name: value for name, value in hmm_model.get_params().items()
+              if value is None or isinstance(value, (bool, int, float, str))}
+    arrays = {}
+    if hasattr(hmm_model, "means_"):
+        arrays = {
+            "hmm.startprob": hmm_model.startprob_,
+            "hmm.transmat": hmm_model.transmat_,
+            "hmm.means": hmm_model.means_,
+            # Stored in the model's own layout for its covariance type
+            "hmm.covars": hmm_model._covars_,
+        }
+    return arrays, params
+
+def restore_hmm(hmm_class, arrays, params):
+    """
+    Rebuild a GaussianHMM from the output of `hmm_state`.
+
+    Args:
+        hmm_class (type): The HMM class, e.g. hmm.GaussianHMM.
+        arrays (dict): The checkpoint arrays; the "hmm." ones are used.
+        params (dict): The constructor parameters.
+    """
+    hmm_model = hmm_class(**params)
+    if "hmm.means" in arrays:
+        hmm_model.startprob_ = np.array(arrays["hmm.startprob"])
+        hmm_model.transmat_ = np.array(arrays["hmm.transmat"])
+        hmm_model.means_ = np.array(arrays["hmm.means"])
+        hmm_model.n_features = hmm_model.means_.shape[1]
+        hmm_model.covars_ = arrays["hmm.covars"]
+    return hmm_model
+
+if __name__ == "__main__":
+    # Example usage: resume a large network without retraining it
+    import time
+    from LightParticleHopfieldNetwork import LightParticleHopfieldNetwork
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "network.ckpt")
+        network = LightParticleHopfieldNetwork(4000, 3)
+        network.hmm_model.fit(np.random.rand(200, 1))
+
+        start = time.perf_counter()
+        network.save(path)
+        print(f"Saved {os.path.getsize(path) / 1e6:.0f} MB in {time.perf_counter() - start:.3f} s")
+
+        start = time.perf_counter()
+        restored = LightParticleHopfieldNetwork.load(path)
+        print(f"Loaded in {(time.perf_counter() - start) * 1000:.2f} ms")
+        print("Weights match:", np.array_equal(restored.weights, network.weights))
+        print("HMM means match:", np.allclose(restored.hmm_model.means_, network.hmm_model.means_))
@@ -0,0 +1,235 @@
+import datetime
+import functools
+from astral import LocationInfo
+from astral.sun import noon, sunrise, sunset
+import numpy as np
+import instrumentation
+import sun_table
+import timezones
+
+# Optional precomputed sun table consulted instead of astral, see `use_sun_table`
+SUN_TABLE = None
+
+def use_sun_table(table):
+    """
+    Look sunrise, sunset and solar noon up in a precomputed table instead of
+    calculating them with astral.
+
+    Args:
+        table (sun_table.SunTable): The memory-mapped table, or None to go back to astral.
+    """
+    global SUN_TABLE
+    SUN_TABLE = table
+    sun_times.cache_clear()
+    solar_noon.cache_clear()
+
+@functools.lru_cache(maxsize=4096)
+def sun_times(latitude, longitude, date, timezone_name="UTC"):
+    """
+    Calculate the sunrise and sunset of a location on a date. Results are cached,
+    since they only depend on the location, the date and its timezone.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        date (datetime.date): The date of the sunrise and sunset.
+        timezone_name (str, optional): The timezone in which `date` is a calendar day;
+                                       the sunrise and sunset are the ones falling within
+                                       that day. Use `local_sun_times` for the location's own zone.
+
+    Returns:
+        tuple: The sunrise and sunset as UTC epoch seconds.
+    """
+    if SUN_TABLE is not None:
+        return SUN_TABLE.sun_times(latitude, longitude, date, timezone_name)
+
+    instrumentation.count("astral", 2)
+    location = LocationInfo("", "", timezone_name, latitude, longitude)
+    try:
+        return (sunrise(location.observer, date=date, tzinfo=location.tzinfo).timestamp(),
+                sunset(location.observer, date=date, tzinfo=location.tzinfo).timestamp())
+    except ValueError:
+        # The sun does not rise or set that day (polar day or night): use the NOAA
+        # equations, which give a 24 or 0 hour day around solar noon, as the sun table does
+        events = sun_table.calculate_sun_events(latitude, longitude, date.timetuple().tm_yday)
+        midnight = datetime.datetime(date.year, date.month, date.day, tzinfo=datetime.timezone.utc).timestamp()
+        return midnight + float(events[0]) * 60, midnight + float(events[1]) * 60
+
+def local_date(latitude, longitude, at=None):
+    """
+    Get the calendar date of a moment in the timezone of a location.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        at (datetime.datetime, optional): The moment. Naive datetimes are taken as UTC.
+                                          Defaults to the current time.
+
+    Returns:
+        datetime.date: The local date.
+    """
+    timezone = timezones.timezone_at(latitude, longitude)
+    return resolve_time(at).astimezone(timezone).date()
+
+def local_sun_times(latitude, longitude, date):
+    """
+    Calculate the sunrise and sunset of a location on a calendar day in its own
+    timezone, so both fall within that day wherever the location is.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        date (datetime.date): The local date, e.g. from `local_date`.
+
+    Returns:
+        tuple: The sunrise and sunset as UTC epoch seconds.
+    """
+    return sun_times(latitude, longitude, date, timezones.timezone_name_at(latitude, longitude))
+
+def local_dates(epoch_seconds, timezone_name):
+    """
+    Get the calendar dates of many moments in one timezone.
+
+    Args:
+        epoch_seconds (np.array): The moments as UTC epoch seconds.
+        timezone_name (str): The IANA timezone name.
+
+    Returns:
+        np.array: The local dates, as datetime64[D] values.
+    """
+    epoch_seconds = np.asarray(epoch_seconds, dtype=np.int64)
+    if epoch_seconds.size == 0:
+        return np.empty(epoch_seconds.shape, dtype="datetime64[D]")
+
+    # A moment's local date is its UTC date or one of its neighbours; find the last
+    # local midnight at or before each moment among those candidate days
+    utc_days = epoch_seconds // 86400
+    days = np.unique(np.concatenate((utc_days.ravel() - 1, utc_days.ravel(), utc_days.ravel() + 1)))
+    days = days.astype("datetime64[D]")
+    timezone = timezones.get_timezone(timezone_name)
+    midnights = np.array([timezone.localize(datetime.datetime.combine(day, datetime.time())).timestamp()
+                          for day in days.tolist()])
+    return days[np.searchsorted(midnights, epoch_seconds, side="right") - 1]
+
+@functools.lru_cache(maxsize=4096)
+def solar_noon(latitude, longitude, date):
+    """
+    Calculate the solar noon of a location on a date. Results are cached.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        date (datetime.date): The date of the solar noon.
+
+    Returns:
+        float: The solar noon as UTC epoch seconds.
+    """
+    if SUN_TABLE is not None:
+        return SUN_TABLE.solar_noon(latitude, longitude, date)
+
+    instrumentation.count("astral")
+    location = LocationInfo("", "", "UTC", latitude, longitude)
+    return noon(location.observer, date=date).timestamp()
+
+def resolve_time(at=None):
+    """
+    Resolve the moment of a day/night decision.
+
+    Args:
+        at (datetime.datetime, optional): The moment to use. Naive datetimes are
+                                          taken as UTC. Defaults to the current time.
+
+    Returns:
+        datetime.datetime: A timezone-aware datetime.
+    """
+    if at is None:
+        return datetime.datetime.now(datetime.timezone.utc)
+    if at.tzinfo is None:
+        return at.replace(tzinfo=datetime.timezone.utc)
+    return at
+
+def is_night(latitude, longitude, at=None, date=None):
+    """
+    Determine whether it is night at a location at a given moment.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        at (datetime.datetime, optional): The moment to check. Naive datetimes are
+                                          taken as UTC. Defaults to the current time.
+        date (datetime.date, optional): The local date whose sunrise and sunset are compared
+                                        against. Defaults to the date of `at` in the
+                                        location's timezone.
+
+    Returns:
+        bool: True if `at` lies outside the sunrise-sunset interval.
+    """
+    at = resolve_time(at)
+    if date is None:
+        date = local_date(latitude, longitude, at)
+
+    sunrise_time, sunset_time = local_sun_times(latitude, longitude, date)
+    now = at.timestamp()
+    return now < sunrise_time or now > sunset_time
+
+def is_night_batch(latitude, longitude, timestamps, dates=None):
+    """
+    Determine whether it is night at a location for many moments at once.
+
+    Each moment is compared against the sunrise and sunset of its date in the
+    location's timezone. They are looked up once per distinct date, and the
+    comparisons run on UTC epoch seconds.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+        timestamps (array): The moments to check, as numpy datetime64 values (UTC)
+                            or anything np.datetime64 accepts.
+        dates (array, optional): The local date whose sunrise and sunset each moment is
+                                 compared against. Defaults to the date of each moment
+                                 in the location's timezone.
+
+    Returns:
+        np.array: A boolean array, True where the moment is at night.
+    """
+    timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+    epoch_seconds = timestamps.astype(np.int64)
+    timezone_name = timezones.timezone_name_at(latitude, longitude)
+
+    if dates is None:
+        dates = local_dates(epoch_seconds, timezone_name)
+    else:
+        dates = np.broadcast_to(np.asarray(dates, dtype="datetime64[D]"), timestamps.shape)
+
+    unique_dates, date_index = np.unique(dates, return_inverse=True)
+    events = np.array([sun_times(latitude, longitude, date.item(), timezone_name) for date in unique_dates])
+    events = events.reshape(-1, 2)
+    sunrise_times = events[date_index.reshape(timestamps.shape), 0]
+    sunset_times = events[date_index.reshape(timestamps.shape), 1]
+
+    return (epoch_seconds < sunrise_times) | (epoch_seconds > sunset_times)
+
+if __name__ == "__main__":
+    # Example usage
+    latitude = 51.5074  # London
+    longitude = -0.1278
+
+    noon = datetime.datetime(2023, 6, 21, 12, 0)  # Noon in London, as UTC
+    print("Night at noon:", is_night(latitude, longitude, noon))
+
+    # Western and eastern hemisphere locations, whose local days straddle UTC midnight
+    locations = {
+        "New York City": (40.7128, -74.0060, [(17, False), (0, False), (3, True)]),  # 13:00, 20:00, 23:00 EDT
+        "Tokyo": (35.6762, 139.6503, [(3, False), (12, True), (20, False)]),  # 12:00, 21:00, 05:00 JST
+    }
+    for name, (lat, lon, moments) in locations.items():
+        for hour, expected in moments:
+            at = datetime.datetime(2023, 6, 21 if hour else 22, hour, 0)
+            assert is_night(lat, lon, at) == expected, (name, at)
+        night = is_night_batch(lat, lon, np.arange("2023-01-01", "2024-01-01", dtype="datetime64[h]"))
+        print(f"Night hours in 2023 in {name}: {np.count_nonzero(night)} of {len(night)}")
+
+    # Hourly day/night split over a year of historical timestamps
+    timestamps = np.arange("2023-01-01", "2024-01-01", dtype="datetime64[h]")
+    night = is_night_batch(latitude, longitude, timestamps)
+    print(f"Night hours in 2023: {np.count_nonzero(night)} of {len(timestamps)}")
@@ -1,3 +1,5 @@
+import math
+import time
 import numpy as np
 
 def discern_particles(frequency_data, movement_pattern_data):
@@ -26,7 +28,7 @@ def discern_particles(frequency_data, movement_pattern_data):
         return "Subatomic"
 
     # Analyze movement pattern characteristics
-    pattern_complexity = calculate_pattern_complexity(movement_pattern_data)  # Implement this function
+    pattern_complexity = calculate_pattern_complexity(movement_pattern_data)
 
     # Energy particles often exhibit more complex and unpredictable movement patterns
     if pattern_complexity > 0.8:
@@ -39,20 +41,124 @@ def discern_particles(frequency_data, movement_pattern_data):
     # If both analyses are inconclusive, further investigation is needed
     return "Inconclusive"
 
-# Helper function to calculate pattern complexity (implementation depends on data format)
-def calculate_pattern_complexity(movement_pattern_data):
-    # ... (Implement logic to analyze pattern complexity)
-    pass
+def discern_particles_batch(frequency_data, movement_pattern_data):
+    """
+    Discerns the particle type of many particles at once, applying the same 
+    frequency and movement pattern rules as `discern_particles`.
+
+    Args:
+        frequency_data (array): A 2-D array of shape (num_particles, num_frequencies) 
+                                with each particle's vibration frequencies (Hz).
+        movement_pattern_data (array): A 2-D array of shape (num_particles, num_samples) 
+                                       with each particle's movement trace.
+
+    Returns:
+        np.ndarray: An array of estimated particle types ("Energy", "Subatomic" or "Inconclusive").
+    """
+
+    frequency_data = np.asarray(frequency_data, dtype=float)
+    movement_pattern_data = np.asarray(movement_pattern_data, dtype=float)
+
+    # Analyze frequency characteristics for every particle in one pass
+    mean_frequency = np.mean(frequency_data, axis=1)
+    frequency_range = np.ptp(frequency_data, axis=1)
+
+    is_energy = (mean_frequency > 1e12) & (frequency_range > 1e10)
+    is_subatomic = (mean_frequency < 1e12) & (frequency_range < 1e10)
+
+    # Only particles left undecided by their frequencies need a movement analysis
+    undecided = ~(is_energy | is_subatomic)
+    pattern_complexity = np.full(len(frequency_data), np.nan)
+    if np.any(undecided):
+        pattern_complexity[undecided] = calculate_pattern_complexity(movement_pattern_data[undecided])
+
+    particle_types = np.full(len(frequency_data), "Inconclusive", dtype=object)
+    particle_types[undecided & (pattern_complexity < 0.8)] = "Subatomic"
+    particle_types[undecided & (pattern_complexity > 0.8)] = "Energy"
+    particle_types[is_subatomic] = "Subatomic"
+    particle_types[is_energy] = "Energy"
+
+    return particle_types
+
+def calculate_pattern_complexity(movement_pattern_data, order=3, delay=1):
+    """
+    Calculates the complexity of a movement pattern as its normalized permutation 
+    entropy: how evenly the trace spreads over the possible orderings of 
+    `order` consecutive samples.
+
+    Args:
+        movement_pattern_data (array): A movement trace, or a 2-D array with one trace per row.
+        order (int): The number of samples compared in each ordinal pattern.
+        delay (int): The spacing between the compared samples.
+
+    Returns:
+        float or np.ndarray: The complexity between 0 (perfectly regular) and 
+        1 (completely unpredictable), one value per trace for 2-D input.
+    """
+
+    movement_pattern_data = np.asarray(movement_pattern_data, dtype=float)
+    traces = np.atleast_2d(movement_pattern_data)
+
+    span = (order - 1) * delay + 1
+    if traces.shape[1] < span:
+        raise ValueError("Movement pattern must contain at least (order - 1) * delay + 1 samples.")
+
+    # Embed each trace into overlapping windows without copying the data
+    windows = np.lib.stride_tricks.sliding_window_view(traces, span, axis=1)[:, :, ::delay]
+
+    # Encode the ordinal pattern of every window as a single integer
+    ranks = np.argsort(windows, axis=2, kind="stable")
+    codes = ranks @ (order ** np.arange(order - 1, -1, -1))
+
+    # Count the patterns of all traces at once by offsetting each row into its own range
+    num_codes = order ** order
+    num_traces, num_windows = codes.shape
+    offsets = np.arange(num_traces)[:, None] * num_codes
+    counts = np.bincount((codes + offsets).ravel(), minlength=num_traces * num_codes)
+    probabilities = counts.reshape(num_traces, num_codes) / num_windows
+
+    # Shannon entropy normalized by the maximum over all order! permutations
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.sum(np.where(probabilities > 0, probabilities * np.log(probabilities), 0.0), axis=1)
+    complexity = entropy / np.log(math.factorial(order))
+
+    if movement_pattern_data.ndim == 1:
+        return float(complexity[0])
+    return complexity
 
 # Example usage (hypothetical data)
+rng = np.random.default_rng(0)
+
 frequency_data_1 = [1e15, 1.2e15, 0.9e15]  # High frequencies, wide range
-movement_pattern_data_1 = ...  # Complex, unpredictable pattern
+movement_pattern_data_1 = rng.normal(size=1000)  # Complex, unpredictable pattern
 
 frequency_data_2 = [1e9, 1.1e9, 0.95e9]   # Lower frequencies, narrow range
-movement_pattern_data_2 = ...  # Regular, predictable pattern
+movement_pattern_data_2 = np.sin(np.linspace(0, 20 * np.pi, 1000))  # Regular, predictable pattern
 
 particle_type_1 = discern_particles(frequency_data_1, movement_pattern_data_1)
 particle_type_2 = discern_particles(frequency_data_2, movement_pattern_data_2)
 
 print("Particle type 1:", particle_type_1)
-print("Particle type 2:", particle_type_2)
\ No newline at end of file
+print("Particle type 2:", particle_type_2)
+print("Pattern complexity 1:", calculate_pattern_complexity(movement_pattern_data_1))
+print("Pattern complexity 2:", calculate_pattern_complexity(movement_pattern_data_2))
+
+# Benchmark on long traces (10^5 samples) where only the movement pattern decides
+num_particles = 100
+num_samples = 10**5
+frequency_batch = np.full((num_particles, 3), [1e9, 1e11, 5e11])  # Low mean but wide range: inconclusive
+movement_batch = rng.normal(size=(num_particles, num_samples))
+movement_batch[::2] = np.sin(np.linspace(0, 2000 * np.pi, num_samples))  # Half of them regular
+
+start = time.perf_counter()
+single_trace_complexity = calculate_pattern_complexity(movement_batch[0])
+single_elapsed = time.perf_counter() - start
+
+start = time.perf_counter()
+batch_types = discern_particles_batch(frequency_batch, movement_batch)
+batch_elapsed = time.perf_counter() - start
+
+print(f"Single trace of {num_samples} samples: {single_elapsed * 1e3:.2f} ms")
+print(f"Batch of {num_particles} traces: {batch_elapsed * 1e3:.2f} ms "
+      f"({num_particles * num_samples / batch_elapsed / 1e6:.1f} M samples/s)")
+print("Batch particle types:", dict(zip(*np.unique(batch_types, return_counts=True))))
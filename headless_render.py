@@ -0,0 +1,200 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d import Axes3D
+from sklearn.decomposition import PCA
+from out_of_core_pca import project_to_3d
+
+def new_figure(**kwargs):
+    """
+    Create a figure rendered by the Agg backend, independent of pyplot and of
+    any display, so it works on headless workers.
+
+    Returns:
+        Figure: The new figure.
+    """
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+def save_figure(fig, output_path, dpi=100):
+    """
+    Render a figure to a file; the format (PNG, SVG, ...) follows the file extension.
+
+    Args:
+        fig (Figure): The figure to render.
+        output_path (str): The output file.
+        dpi (int): The resolution of raster formats.
+    """
+    fig.savefig(output_path, dpi=dpi)
+
+def cap_points(num_points, max_points, seed=0):
+    """
+    Choose at most `max_points` of `num_points` points to draw, uniformly at random.
+
+    Args:
+        num_points (int): The number of available points.
+        max_points (int): The maximum number of points to draw.
+        seed (int): Seed of the random choice, so repeated renders match.
+
+    Returns:
+        np.array or slice: Sorted indices of the chosen points, or a slice of all of them.
+    """
+    if num_points <= max_points:
+        return slice(None)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(num_points, max_points, replace=False))
+
+def decimate_min_max(values, num_bins):
+    """
+    Decimate time series by keeping the minimum and maximum of each of `num_bins`
+    bins, in time order, which preserves the visible envelope of the series.
+
+    Args:
+        values (np.array): The series, with time along the last axis; leading axes
+                           hold independent series.
+        num_bins (int): The number of bins per series.
+
+    Returns:
+        tuple: The kept time indices and values, each with 2 * num_bins entries per series.
+    """
+    values = np.asarray(values)
+    num_samples = values.shape[-1]
+    if 2 * num_bins >= num_samples:
+        indices = np.broadcast_to(np.arange(num_samples), values.shape)
+        return indices, values
+
+    # Pad with the last sample so the series splits into equal bins
+    bin_size = -(-num_samples // num_bins)
+    padding = bin_size * num_bins - num_samples
+    padded = np.concatenate((values, np.repeat(values[..., -1:], padding, axis=-1)), axis=-1)
+    bins = padded.reshape(values.shape[:-1] + (num_bins, bin_size))
+
+    starts = np.arange(num_bins) * bin_size
+    minimum_index = np.minimum(starts + np.argmin(bins, axis=-1), num_samples - 1)
+    maximum_index = np.minimum(starts + np.argmax(bins, axis=-1), num_samples - 1)
+
+    indices = np.sort(np.stack((minimum_index, maximum_index), axis=-1), axis=-1)
+    indices = indices.reshape(values.shape[:-1] + (2 * num_bins,))
+    return indices, np.take_along_axis(values, indices, axis=-1)
+
+def lttb(x, y, num_points):
+    """
+    Decimate a time series with Largest-Triangle-Three-Buckets, which keeps the
+    points that contribute most to the visual shape of the line.
+
+    Args:
+        x (np.array): The time values.
+        y (np.array): The series values.
+        num_points (int): The number of points to keep (at least 3).
+
+    Returns:
+        tuple: The kept x and y values.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if num_points >= len(x) or num_points < 3:
+        return x, y
+
+    # The first and last points are always kept; the rest are split into buckets
+    edges = np.linspace(1, len(x) - 1, num_points - 1).astype(np.intp)
+    selected = np.empty(num_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = len(x) - 1
+
+    for bucket in range(num_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else len(x)
+        next_x = np.mean(x[end:next_end])
+        next_y = np.mean(y[end:next_end])
+
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's mean
+        previous = selected[bucket]
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        selected[bucket + 1] = start + np.argmax(areas)
+
+    return x[selected], y[selected]
+
+class ProjectionPlot:
+    """
+    The data behind a 3D principal-component scatter plot, kept so the plot can
+    be rendered later or in another process (it pickles). Building one costs
+    nothing; PCA only runs when it is rendered.
+    """
+
+    def __init__(self, columns, colors, title=None):
+        self.columns = columns
+        self.colors = np.atleast_2d(colors)
+        self.title = title
+
+    def render(self, output_path=None, max_points=100_000, embedding_path=None, sample_size=None):
+        """
+        Project the columns onto three principal components and draw them.
+
+        Args:
+            output_path (str, optional): If given, render headlessly with Agg to this 
+                                         file (PNG, SVG, ...) instead of showing the figure.
+            max_points (int): The maximum number of points drawn.
+            embedding_path (str, optional): Where to store the projection as a float32 
+                                            .npy memmap, computed out of core. With only
+                                            `sample_size`, it is kept in an anonymous
+                                            temporary file freed with the returned memmap.
+            sample_size (int, optional): The number of points (a reservoir sample) 
+                                         plotted from an out-of-core projection.
+
+        Returns:
+            np.memmap or None: The out-of-core projection, if one was computed.
+        """
+        embedding = None
+        colors = self.colors
+        if embedding_path is None and sample_size is None:
+            pca = PCA(n_components=3)
+            reduced_data = pca.fit_transform(np.column_stack(self.columns))
+        else:
+            embedding, sample_indices, reduced_data = project_to_3d(self.columns, embedding_path,
+                                                                    sample_size=sample_size or 100_000)
+            if len(colors) > 1:
+                colors = colors[sample_indices]
+
+        plotted = cap_points(len(reduced_data), max_points)
+        if len(colors) > 1:
+            colors = colors[plotted]
+
+        fig = new_figure() if output_path else plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+        ax.scatter(reduced_data[plotted, 0], reduced_data[plotted, 1], reduced_data[plotted, 2], c=colors, marker='o')
+        ax.set_xlabel('Principal Component 1')
+        ax.set_ylabel('Principal Component 2')
+        ax.set_zlabel('Principal Component 3')
+        if self.title:
+            ax.set_title(self.title)
+
+        if output_path:
+            save_figure(fig, output_path)
+        else:
+            plt.show()
+        return embedding
+
+if __name__ == "__main__":
+    # Example usage: decimate a long noisy series and render it headlessly
+    import os
+    import tempfile
+
+    time = np.linspace(0, 100, 10**6)
+    series = np.sin(time) + np.random.normal(0, 0.1, len(time))
+
+    lttb_time, lttb_series = lttb(time, series, 2000)
+    indices, envelope = decimate_min_max(series, 1000)
+
+    fig = new_figure()
+    ax = fig.add_subplot(111)
+    ax.plot(time[indices], envelope, linewidth=0.5, label='Min/max envelope')
+    ax.plot(lttb_time, lttb_series, linewidth=0.5, label='LTTB')
+    ax.legend()
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "series.png")
+        save_figure(fig, output_path)
+        print(f"Rendered {len(lttb_time)} of {len(time)} points to {os.path.getsize(output_path)} bytes")
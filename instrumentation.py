@@ -0,0 +1,294 @@
+import contextlib
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Instrumentation is off unless enabled; disabled stages and counters cost a flag check
+ENABLED = False
+TRACE_ALLOCATIONS = False
+
+# Whether `enable` started tracemalloc, and so `disable` should stop it
+STARTED_TRACING = False
+
+class Metrics:
+    """
+    Stage timings, allocation peaks and call counts, aggregated across calls.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def record_stage(self, name, duration, peak_bytes=None):
+        """
+        Add one run of a stage.
+
+        Args:
+            name (str): The stage name.
+            duration (float): The wall time of the run (seconds).
+            peak_bytes (int, optional): The peak traced allocation of the run above its starting level.
+        """
+        with self.lock:
+            stage = self.stages.setdefault(name, {"count": 0, "total_s": 0.0, "min_s": float("inf"),
+                                                  "max_s": 0.0, "peak_bytes": 0})
+            stage["count"] += 1
+            stage["total_s"] += duration
+            stage["min_s"] = min(stage["min_s"], duration)
+            stage["max_s"] = max(stage["max_s"], duration)
+            if peak_bytes is not None:
+                stage["peak_bytes"] = max(stage["peak_bytes"], peak_bytes)
+
+    def count(self, name, calls=1):
+        """
+        Add to a call counter.
+
+        Args:
+            name (str): The counter name, e.g. "astral" or "ephem".
+            calls (int): The number of calls to add.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + calls
+
+    def reset(self):
+        """ Drop all recorded metrics. """
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def as_dict(self):
+        """
+        Returns:
+            dict: The stages (with mean durations) and counters.
+        """
+        with self.lock:
+            stages = {name: dict(stage, mean_s=stage["total_s"] / stage["count"]) for name, stage in self.stages.items()}
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def to_json(self, path=None):
+        """
+        Export the metrics as JSON.
+
+        Args:
+            path (str, optional): The file to write. If omitted, the JSON is returned.
+        """
+        text = json.dumps(self.as_dict(), indent=2)
+        if path is None:
+            return text
+        write_atomically(path, text)
+
+    def to_prometheus(self, path=None, prefix="analysis"):
+        """
+        Export the metrics in the Prometheus text format, e.g. for the node
+        exporter's textfile collector.
+
+        Args:
+            path (str, optional): The file to write. If omitted, the text is returned.
+            prefix (str): The prefix of the metric names.
+        """
+        metrics = self.as_dict()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Wall time spent in each stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {stage["total_s"]}'
+                  for name, stage in metrics["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_runs_total Number of runs of each stage.",
+            f"# TYPE {prefix}_stage_runs_total counter",
+        ]
+        lines += [f'{prefix}_stage_runs_total{{stage="{name}"}} {stage["count"]}'
+                  for name, stage in metrics["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_peak_bytes Peak traced allocation of each stage.",
+            f"# TYPE {prefix}_stage_peak_bytes gauge",
+        ]
+        lines += [f'{prefix}_stage_peak_bytes{{stage="{name}"}} {stage["peak_bytes"]}'
+                  for name, stage in metrics["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_calls_total Number of calls to external libraries.",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        lines += [f'{prefix}_calls_total{{name="{name}"}} {calls}' for name, calls in metrics["counters"].items()]
+
+        text = "\n".join(lines) + "\n"
+        if path is None:
+            return text
+        write_atomically(path, text)
+
+def write_atomically(path, text):
+    """
+    Write a file through a temporary file and a rename, so readers never see a partial file.
+    """
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(descriptor, "w") as file:
+        file.write(text)
+    os.replace(temporary_path, path)
+
+# Metrics of the whole process
+METRICS = Metrics()
+
+# Absolute allocation peaks of each thread's open stages, innermost last
+PEAK_STACK = threading.local()
+
+def peak_stack():
+    """
+    Returns:
+        list: The allocation peaks of the calling thread's open stages.
+    """
+    if not hasattr(PEAK_STACK, "peaks"):
+        PEAK_STACK.peaks = []
+    return PEAK_STACK.peaks
+
+class Stage:
+    """
+    Times one run of a named stage and, while allocations are traced, its peak
+    allocation. Stages nest: an inner stage's peak also counts for the outer one.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        # A stage pops exactly what it pushed, so the stack stays balanced across `disable`
+        self.traced = TRACE_ALLOCATIONS
+        if self.traced:
+            peaks = peak_stack()
+            current, peak = tracemalloc.get_traced_memory()
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self.start_bytes = current
+            peaks.append(current)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        peak_bytes = None
+        if self.traced:
+            peaks = peak_stack()
+            peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+            peak_bytes = peak - self.start_bytes
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak)
+        METRICS.record_stage(self.name, duration, peak_bytes)
+        return False
+
+# Shared context returned for stages while instrumentation is disabled
+NULL_STAGE = contextlib.nullcontext()
+
+def stage(name):
+    """
+    Context manager timing a named stage; a shared no-op while disabled.
+
+    Args:
+        name (str): The stage name, e.g. "quantum.transpile".
+    """
+    if not ENABLED:
+        return NULL_STAGE
+    return Stage(name)
+
+def instrumented(name=None):
+    """
+    Decorator timing every call of a function as a stage.
+
+    Args:
+        name (str, optional): The stage name. Defaults to the function's qualified name.
+    """
+    def decorator(function):
+        stage_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with Stage(stage_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, calls=1):
+    """
+    Count calls to an external library, e.g. astral or ephem; a no-op while disabled.
+
+    Args:
+        name (str): The counter name.
+        calls (int): The number of calls to add.
+    """
+    if ENABLED:
+        METRICS.count(name, calls)
+
+def enable(trace_allocations=False):
+    """
+    Start recording stages and counters.
+
+    Args:
+        trace_allocations (bool): Also record allocation peaks with tracemalloc,
+                                  which slows allocation-heavy code down noticeably.
+    """
+    global ENABLED, TRACE_ALLOCATIONS, STARTED_TRACING
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        STARTED_TRACING = True
+    ENABLED = True
+    TRACE_ALLOCATIONS = trace_allocations
+
+def disable():
+    """
+    Stop recording; the metrics recorded so far are kept. Allocation tracing is
+    only stopped if `enable` started it.
+    """
+    global ENABLED, TRACE_ALLOCATIONS, STARTED_TRACING
+    if STARTED_TRACING and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    ENABLED = False
+    TRACE_ALLOCATIONS = False
+    STARTED_TRACING = False
+
+@contextlib.contextmanager
+def instrumenting(trace_allocations=False):
+    """
+    Record stages and counters within a block.
+
+    Args:
+        trace_allocations (bool): Also record allocation peaks with tracemalloc.
+
+    Yields:
+        Metrics: The process-wide metrics.
+    """
+    enable(trace_allocations)
+    try:
+        yield METRICS
+    finally:
+        disable()
+
+if __name__ == "__main__":
+    # Example usage
+    import numpy as np
+
+    @instrumented("example.fft")
+    def spectrum(data):
+        return np.abs(np.fft.rfft(data))
+
+    with instrumenting(trace_allocations=True) as metrics:
+        for _ in range(5):
+            with stage("example.pipeline"):
+                with stage("example.generate"):
+                    data = np.random.normal(0, 1, 1_000_000)
+                spectrum(data)
+                count("example.calls")
+
+    print(metrics.to_json())
+    print(metrics.to_prometheus())
+
+    # Disabled stages cost a flag check
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        with stage("example.disabled"):
+            pass
+    print(f"Disabled stage overhead: {(time.perf_counter() - start) * 1000:.0f} ns per stage")
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+
+def iterate_chunks(columns, chunk_size, min_rows=3):
+    """
+    Yield (start, stop, chunk) blocks of rows from a list of equal-length columns,
+    stacking only one block at a time. A short final block is merged into the
+    previous one so every block has at least `min_rows` rows.
+
+    Args:
+        columns (list): 1-D arrays or memmaps, one per feature.
+        chunk_size (int): The number of rows per block.
+        min_rows (int): The minimum number of rows per block.
+    """
+    num_rows = len(columns[0])
+    boundaries = list(range(0, num_rows, chunk_size)) + [num_rows]
+    if len(boundaries) > 2 and boundaries[-1] - boundaries[-2] < min_rows:
+        del boundaries[-2]
+
+    for start, stop in zip(boundaries[:-1], boundaries[1:]):
+        yield start, stop, np.column_stack([np.asarray(column[start:stop], dtype=float) for column in columns])
+
+def project_to_3d(columns, output_path=None, chunk_size=1_000_000, sample_size=None, random_state=None):
+    """
+    Project rows of stacked columns onto their first three principal components
+    out of core: an IncrementalPCA is fitted one block of rows at a time, then
+    a second pass writes the embedding block by block to a float32 memmap.
+
+    Args:
+        columns (list): 1-D arrays or memmaps of equal length, one per feature.
+        output_path (str, optional): Where to store the embedding as a .npy file.
+                                     Defaults to an anonymous temporary file, which is
+                                     deleted once the returned embedding is released.
+        chunk_size (int): The number of rows held in memory at a time.
+        sample_size (int, optional): If given, also draw a uniform reservoir sample
+                                     of this many embedded rows, e.g. for plotting.
+        random_state (int, optional): Seed of the reservoir sample.
+
+    Returns:
+        np.memmap, or (np.memmap, np.array, np.array) with a sample: the (rows, 3)
+        embedding, plus the sampled row indices and their embedded rows.
+    """
+    num_rows = len(columns[0])
+    if any(len(column) != num_rows for column in columns):
+        raise ValueError("All columns must have the same length.")
+
+    # First pass: fit the principal components
+    pca = IncrementalPCA(n_components=3)
+    for _, _, chunk in iterate_chunks(columns, chunk_size):
+        pca.partial_fit(chunk)
+
+    if output_path is None:
+        # The file is unlinked as soon as it is created; the mapping keeps its pages alive
+        with tempfile.TemporaryFile() as file:
+            embedding = np.memmap(file, dtype=np.float32, mode="w+", shape=(num_rows, 3))
+    else:
+        embedding = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32, shape=(num_rows, 3))
+
+    # Second pass: project every block, keeping a reservoir of the rows with the smallest random keys
+    rng = np.random.default_rng(random_state)
+    sample_keys = np.empty(0)
+    sample_indices = np.empty(0, dtype=np.int64)
+    for start, stop, chunk in iterate_chunks(columns, chunk_size):
+        embedding[start:stop] = pca.transform(chunk)
+
+        if sample_size:
+            keys = np.concatenate((sample_keys, rng.random(stop - start)))
+            indices = np.concatenate((sample_indices, np.arange(start, stop)))
+            if len(keys) > sample_size:
+                keep = np.argpartition(keys, sample_size - 1)[:sample_size]
+                keys, indices = keys[keep], indices[keep]
+            sample_keys, sample_indices = keys, indices
+
+    embedding.flush()
+    if not sample_size:
+        return embedding
+
+    sample_indices = np.sort(sample_indices)
+    return embedding, sample_indices, np.asarray(embedding[sample_indices])
+
+if __name__ == "__main__":
+    # Example usage: ten million rows of three memory-mapped features
+    num_rows = 10_000_000
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        columns = []
+        for name, scale in (("particles", 1e14), ("light_flux", 0.1), ("sound", 1.0)):
+            column = np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+",
+                                               dtype=np.float32, shape=(num_rows,))
+            for start in range(0, num_rows, 1_000_000):
+                column[start:start + 1_000_000] = rng.normal(0, scale, min(1_000_000, num_rows - start))
+            columns.append(column)
+
+        embedding, sample_indices, sample = project_to_3d(columns, os.path.join(directory, "embedding.npy"),
+                                                          sample_size=10_000, random_state=0)
+        print("Embedding:", embedding.shape, embedding.dtype)
+        print("Plot sample:", sample.shape)
+        del embedding, columns
@@ -0,0 +1,247 @@
+import fcntl
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+# Binary layout of an entry: a fixed header, a JSON description of the result's
+# fields, then the raw bytes of its arrays, each aligned to ALIGNMENT bytes
+MAGIC = b"RESCACHE"
+VERSION = 1
+HEADER_FORMAT = "<8sII"
+ALIGNMENT = 64
+
+ENTRY_SUFFIX = ".res"
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of analysis results, keyed by a hash of the
+    input arrays (bytes, shape and dtype) and the analysis name and version.
+
+    Entries are written to a temporary file and renamed into place, so readers
+    in other processes see either the whole entry or none. Hits refresh the
+    entry's modification time, and once the cache exceeds `max_bytes` the least
+    recently used entries are evicted under an exclusive lock.
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, name, version, *arrays):
+        """
+        Compute the key of an analysis of some input arrays.
+
+        Args:
+            name (str): The name of the analysis.
+            version (int): The version of the analysis; bump it when its results change.
+            arrays: The input arrays (or sequences).
+
+        Returns:
+            str: The hex digest identifying the result.
+        """
+        digest = hashlib.blake2b(f"{name}:{version}".encode(), digest_size=20)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"|{array.dtype.str}{array.shape}|".encode())
+            digest.update(memoryview(array).cast("B"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """
+        Read a cached result.
+
+        Args:
+            key (str): The key from `key`.
+
+        Returns:
+            dict or None: The result, or None on a miss.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = bytearray(os.fstat(file.fileno()).st_size)
+                file.readinto(data)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return decode_result(data)
+
+    def put(self, key, result):
+        """
+        Store a result, then evict old entries if the cache is over its size cap.
+
+        Args:
+            key (str): The key from `key`.
+            result (dict): The result, with scalar, string, list or array values.
+        """
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(encode_result(result))
+            os.replace(temporary_path, self.path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        """
+        Read a cached result, or compute and store it on a miss.
+
+        Args:
+            key (str): The key from `key`.
+            compute (callable): Computes the result without arguments.
+
+        Returns:
+            dict: The result.
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache fits within `max_bytes`. """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+
+        # One process evicts at a time; the others skip, since it makes room for them too
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total_bytes -= size
+
+    def clear(self):
+        """ Remove all entries. """
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+def encode_result(result):
+    """
+    Serialize a result dictionary into the cache's binary format.
+
+    Args:
+        result (dict): Values may be None, bools, numbers, strings, numpy scalars,
+                       numpy arrays or lists of numbers.
+
+    Returns:
+        bytes: The encoded entry.
+    """
+    fields = []
+    blobs = []
+    offset = 0
+    for name, value in result.items():
+        # numpy scalars first, since np.float64 is also a Python float
+        if not isinstance(value, np.generic) and (value is None or isinstance(value, (bool, int, float, str))):
+            fields.append({"name": name, "kind": "value", "value": value})
+            continue
+
+        if isinstance(value, (np.ndarray, np.generic)):
+            kind = "array" if isinstance(value, np.ndarray) else "scalar"
+            array = np.asarray(value)
+        elif isinstance(value, (list, tuple)):
+            kind = "list"
+            array = np.asarray(value)
+        else:
+            raise TypeError(f"Cannot cache {name!r} of type {type(value).__name__}.")
+        if array.dtype.hasobject:
+            raise TypeError(f"Cannot cache {name!r} with object dtype.")
+
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        fields.append({"name": name, "kind": kind, "dtype": array.dtype.str, "shape": array.shape,
+                       "offset": offset})
+        blobs.append((offset, array.tobytes()))
+        offset += array.nbytes
+
+    metadata = json.dumps({"fields": fields}).encode()
+    data_start = -(-(struct.calcsize(HEADER_FORMAT) + len(metadata)) // ALIGNMENT) * ALIGNMENT
+    encoded = bytearray(data_start + offset)
+    struct.pack_into(HEADER_FORMAT, encoded, 0, MAGIC, VERSION, len(metadata))
+    encoded[struct.calcsize(HEADER_FORMAT):struct.calcsize(HEADER_FORMAT) + len(metadata)] = metadata
+    for blob_offset, blob in blobs:
+        encoded[data_start + blob_offset:data_start + blob_offset + len(blob)] = blob
+    return bytes(encoded)
+
+def decode_result(data):
+    """
+    Deserialize an entry written by `encode_result`. Arrays are views of `data`.
+
+    Args:
+        data (bytearray): The encoded entry.
+
+    Returns:
+        dict: The result.
+    """
+    magic, version, metadata_length = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} result cache entry.")
+
+    metadata_start = struct.calcsize(HEADER_FORMAT)
+    metadata = json.loads(bytes(data[metadata_start:metadata_start + metadata_length]))
+    data_start = -(-(metadata_start + metadata_length) // ALIGNMENT) * ALIGNMENT
+
+    result = {}
+    for field in metadata["fields"]:
+        if field["kind"] == "value":
+            result[field["name"]] = field["value"]
+            continue
+
+        dtype = np.dtype(field["dtype"])
+        shape = tuple(field["shape"])
+        count = int(np.prod(shape))
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=data_start + field["offset"]).reshape(shape)
+        if field["kind"] == "scalar":
+            result[field["name"]] = array[()]
+        elif field["kind"] == "list":
+            result[field["name"]] = array.tolist()
+        else:
+            result[field["name"]] = array
+    return result
+
+if __name__ == "__main__":
+    # Example usage
+    import time
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory, max_bytes=64 * 1024 * 1024)
+        capture = np.random.normal(1e15, 1e14, 10**7)
+
+        def analyze():
+            return {"mean": np.mean(capture), "spectrum": np.abs(np.fft.rfft(capture))[:1000],
+                    "anomalies": np.flatnonzero(np.abs(capture - 1e15) > 5e14).tolist(), "label": "example"}
+
+        for attempt in ("miss", "hit"):
+            start = time.perf_counter()
+            result = cache.get_or_compute(cache.key("example", 1, capture), analyze)
+            print(f"{attempt}: {time.perf_counter() - start:.3f} s, mean {result['mean']:.4g}")
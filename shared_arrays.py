@@ -0,0 +1,210 @@
+import os
+import tempfile
+import uuid
+from multiprocessing import shared_memory
+import numpy as np
+
+# Where shared arrays can live: POSIX shared memory, or memory-mapped .npy files
+STORAGES = ("shared_memory", "memmap")
+
+class SharedArrayHandle:
+    """
+    A small, picklable reference to a shared array. Workers attach to it to map
+    the same memory instead of receiving a copy of the array.
+    """
+
+    def __init__(self, storage, name, shape, dtype):
+        self.storage = storage
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    def attach(self, writable=True):
+        """
+        Map the shared array into this process.
+
+        Args:
+            writable (bool): Whether writes are allowed (and seen by every process).
+
+        Returns:
+            tuple: The array and the shared memory block backing it (None for memmaps),
+                   which must be kept alive as long as the array is used.
+        """
+        if self.storage == "memmap":
+            return np.load(self.name, mmap_mode="r+" if writable else "r"), None
+
+        block = shared_memory.SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf)
+        array.flags.writeable = writable
+        return array, block
+
+class SharedArrays:
+    """
+    The named arrays of one object (e.g. a network's weights and thresholds),
+    allocated in shared memory or in memory-mapped files so that other processes
+    can attach to them without copying.
+    """
+
+    def __init__(self, storage="shared_memory", directory=None):
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown storage: {storage}")
+        self.storage = storage
+        self.directory = directory or tempfile.gettempdir()
+        self.arrays = {}
+        self.handles = {}
+        self.blocks = []
+        self.owner = True
+
+    def allocate(self, name, values):
+        """
+        Allocate a shared array and fill it.
+
+        Args:
+            name (str): The name of the array, e.g. "weights".
+            values (np.array): The initial values, which fix the shape and dtype.
+
+        Returns:
+            np.array: The shared array.
+        """
+        values = np.asarray(values)
+        if self.storage == "memmap":
+            path = os.path.join(self.directory, f"{name}-{uuid.uuid4().hex}.npy")
+            array = np.lib.format.open_memmap(path, mode="w+", dtype=values.dtype, shape=values.shape)
+            handle = SharedArrayHandle("memmap", path, values.shape, values.dtype)
+        else:
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            array = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+            handle = SharedArrayHandle("shared_memory", block.name, values.shape, values.dtype)
+            self.blocks.append(block)
+
+        array[...] = values
+        self.arrays[name] = array
+        self.handles[name] = handle
+        return array
+
+    @classmethod
+    def attach(cls, handles, writable=True):
+        """
+        Map arrays allocated by another process.
+
+        Args:
+            handles (dict): The handles of the arrays, by name.
+            writable (bool): Whether writes are allowed.
+
+        Returns:
+            SharedArrays: The attached arrays; closing them leaves the originals in place.
+        """
+        attached = cls(next(iter(handles.values())).storage if handles else "shared_memory")
+        attached.owner = False
+        for name, handle in handles.items():
+            array, block = handle.attach(writable)
+            attached.arrays[name] = array
+            attached.handles[name] = handle
+            if block is not None:
+                attached.blocks.append(block)
+        return attached
+
+    def release(self):
+        """
+        Unmap the arrays. The allocating process also frees the shared memory and
+        deletes the files, so call it there only once no worker needs them.
+        """
+        self.arrays.clear()
+        for block in self.blocks:
+            block.close()
+            if self.owner:
+                block.unlink()
+        if self.owner and self.storage == "memmap":
+            for handle in self.handles.values():
+                try:
+                    os.unlink(handle.name)
+                except FileNotFoundError:
+                    pass
+        self.blocks = []
+
+def place(shared_arrays, name, values):
+    """
+    Place an attribute's initial values in shared storage, or keep them as a
+    private array when `shared_arrays` is None.
+
+    Args:
+        shared_arrays (SharedArrays or None): The shared storage of the object.
+        name (str): The attribute name, e.g. "weights".
+        values (np.array): The initial values.
+
+    Returns:
+        np.array: The array to store on the object.
+    """
+    if shared_arrays is None:
+        return values
+    return shared_arrays.allocate(name, values)
+
+class SharedObjectHandle:
+    """
+    A picklable handle to an object whose arrays live in shared storage, such as
+    a network created with `storage="shared_memory"`. It carries the object's
+    class, its other attributes and the handles of its shared arrays.
+    """
+
+    def __init__(self, obj):
+        if getattr(obj, "shared_arrays", None) is None:
+            raise ValueError(f"This {type(obj).__name__} does not use shared storage.")
+        self.cls = type(obj)
+        self.array_handles = dict(obj.shared_arrays.handles)
+        self.attributes = {name: value for name, value in vars(obj).items()
+                           if name != "shared_arrays" and name not in self.array_handles}
+
+    def attach(self, writable=True):
+        """
+        Rebuild the object in this process, with its arrays mapped rather than copied.
+
+        Args:
+            writable (bool): Whether writes to the shared arrays are allowed.
+        """
+        obj = self.cls.__new__(self.cls)
+        obj.__dict__.update(self.attributes)
+        obj.shared_arrays = SharedArrays.attach(self.array_handles, writable)
+        obj.__dict__.update(obj.shared_arrays.arrays)
+        return obj
+
+def share(obj):
+    """
+    Get a handle that worker processes can attach to, to use an object's shared
+    arrays without copying them.
+
+    Args:
+        obj: An object with a `shared_arrays` attribute, e.g. a network created
+             with `storage="shared_memory"` or `storage="memmap"`.
+
+    Returns:
+        SharedObjectHandle: The handle.
+    """
+    return SharedObjectHandle(obj)
+
+if __name__ == "__main__":
+    # Example usage: recall probes on many cores from one copy of a large network's weights
+    import concurrent.futures
+    import time
+    from LightParticleHopfieldNetwork import LightParticleHopfieldNetwork
+
+    def recall_chunk(handle, probes):
+        network = handle.attach(writable=False)
+        try:
+            return network.recall(probes)["converged"].sum()
+        finally:
+            network.shared_arrays.release()
+
+    num_neurons = 2000
+    network = LightParticleHopfieldNetwork(num_neurons, 3, storage="shared_memory")
+    stored_patterns = np.random.rand(100, num_neurons)
+    network.store_patterns(stored_patterns)
+
+    probes = network.to_states(stored_patterns[np.random.randint(0, 100, 4000)])
+    probes[np.random.rand(*probes.shape) < 0.1] *= -1
+
+    handle = share(network)
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        converged = sum(executor.map(recall_chunk, [handle] * 8, np.array_split(probes, 8)))
+    print(f"{converged} of {len(probes)} probes converged in {time.perf_counter() - start:.2f} s")
+    network.shared_arrays.release()
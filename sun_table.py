@@ -0,0 +1,240 @@
+import datetime
+import struct
+import numpy as np
+import timezones
+
+# Binary layout: a fixed-size header followed by float32 values of shape
+# (num_latitudes, num_longitudes, num_days, num_fields)
+MAGIC = b"SUNTABLE"
+VERSION = 1
+HEADER_FORMAT = "<8sIIIIIdddd"
+HEADER_SIZE = 64
+
+# Times are minutes after 00:00 UTC of the table day (the solar day around that
+# day's UTC noon), elevation is in degrees. `SunTable.sun_times` maps them onto
+# calendar days in a timezone, as astral does
+FIELDS = ("sunrise", "sunset", "solar_noon", "noon_elevation")
+NUM_DAYS = 366
+
+def calculate_sun_events(latitude, longitude, day_of_year, days_in_year=NUM_DAYS):
+    """
+    Calculate sunrise, sunset, solar noon and noon elevation with the NOAA solar
+    equations (the same approximations astral is built on), vectorized over
+    any broadcastable arrays of inputs.
+
+    During polar day the sun "rises" 12 hours before noon and "sets" 12 hours
+    after it; during polar night sunrise and sunset coincide with noon, so the
+    day length is 24 or 0 hours instead of undefined.
+
+    Args:
+        latitude (array): Latitudes (degrees).
+        longitude (array): Longitudes (degrees).
+        day_of_year (array): Days of the year, starting at 1.
+        days_in_year (int): The length of the year the days belong to.
+
+    Returns:
+        tuple: Sunrise, sunset and solar noon in minutes after 00:00 UTC, and the
+        noon elevation in degrees.
+    """
+    latitude = np.asarray(latitude, dtype=float)
+    longitude = np.asarray(longitude, dtype=float)
+
+    # Fractional year (radians) at noon
+    gamma = 2 * np.pi / days_in_year * (np.asarray(day_of_year, dtype=float) - 1)
+
+    equation_of_time = 229.18 * (0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+                                 - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma))
+    declination = (0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+                   - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+                   - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma))
+
+    # Hour angle of sunrise, with the standard 0.833 degree refraction correction
+    lat_rad = np.radians(latitude)
+    cos_hour_angle = (np.cos(np.radians(90.833)) / (np.cos(lat_rad) * np.cos(declination))
+                      - np.tan(lat_rad) * np.tan(declination))
+    hour_angle = np.degrees(np.arccos(np.clip(cos_hour_angle, -1, 1)))
+
+    solar_noon = 720 - 4 * longitude - equation_of_time
+    sunrise = solar_noon - 4 * hour_angle
+    sunset = solar_noon + 4 * hour_angle
+    noon_elevation = 90 - np.abs(latitude - np.degrees(declination))
+
+    return tuple(np.broadcast_arrays(sunrise, sunset, solar_noon, noon_elevation))
+
+def build_sun_table(path, resolution=1.0):
+    """
+    Precompute sun events for a global latitude/longitude grid and every day of
+    a (leap) year, and write them to a binary file for memory-mapped lookups.
+
+    The table is written one latitude row at a time, so building it only needs
+    memory for a single row.
+
+    Args:
+        path (str): The output file.
+        resolution (float): The grid spacing in degrees.
+    """
+    latitudes = np.linspace(-90, 90, int(round(180 / resolution)) + 1)
+    longitudes = np.linspace(-180, 180, int(round(360 / resolution)) + 1)
+    days = np.arange(1, NUM_DAYS + 1)
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(FIELDS), NUM_DAYS, len(latitudes), len(longitudes),
+                         latitudes[0], resolution, longitudes[0], resolution)
+    with open(path, "wb") as file:
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    table = np.memmap(path, dtype=np.float32, mode="r+", offset=HEADER_SIZE,
+                      shape=(len(latitudes), len(longitudes), NUM_DAYS, len(FIELDS)))
+    for i, latitude in enumerate(latitudes):
+        events = calculate_sun_events(latitude, longitudes[:, None], days[None, :])
+        table[i] = np.stack(events, axis=-1)
+    table.flush()
+
+class SunTable:
+    """
+    Read-only, memory-mapped view of a table written by `build_sun_table`, with
+    bilinear interpolation between grid points. Opening is O(1); pages are only
+    read when looked up, and processes mapping the same file share the page cache.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            header = struct.unpack(HEADER_FORMAT, file.read(struct.calcsize(HEADER_FORMAT)))
+
+        magic, version, num_fields, num_days, num_latitudes, num_longitudes, \
+            self.latitude_start, self.latitude_step, self.longitude_start, self.longitude_step = header
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} sun table.")
+
+        self.values = np.memmap(path, dtype=np.float32, mode="r", offset=HEADER_SIZE,
+                                shape=(num_latitudes, num_longitudes, num_days, num_fields))
+
+    def lookup(self, latitude, longitude, day_of_year):
+        """
+        Interpolate all sun event fields for one or many locations and days.
+
+        Args:
+            latitude (array): Latitudes (degrees).
+            longitude (array): Longitudes (degrees).
+            day_of_year (array): Days of the year, starting at 1.
+
+        Returns:
+            np.array: The fields in `FIELDS` order along the last axis.
+        """
+        num_latitudes, num_longitudes, num_days, _ = self.values.shape
+
+        row = np.clip((np.asarray(latitude, dtype=float) - self.latitude_start) / self.latitude_step,
+                      0, num_latitudes - 1)
+        column = np.clip((np.asarray(longitude, dtype=float) - self.longitude_start) / self.longitude_step,
+                         0, num_longitudes - 1)
+        day = np.clip(np.asarray(day_of_year) - 1, 0, num_days - 1)
+
+        row0 = np.minimum(row.astype(np.intp), num_latitudes - 2)
+        column0 = np.minimum(column.astype(np.intp), num_longitudes - 2)
+        row_weight = (row - row0)[..., None]
+        column_weight = (column - column0)[..., None]
+
+        values = self.values
+        top = (values[row0, column0, day] * (1 - column_weight) + values[row0, column0 + 1, day] * column_weight)
+        bottom = (values[row0 + 1, column0, day] * (1 - column_weight)
+                  + values[row0 + 1, column0 + 1, day] * column_weight)
+        return top * (1 - row_weight) + bottom * row_weight
+
+    def sun_times(self, latitude, longitude, date, timezone_name="UTC"):
+        """
+        Get the sunrise and sunset of a location on a calendar day in a timezone:
+        like astral, the sunrise and sunset falling within that day, which may
+        come from the solar days of the neighbouring table days.
+
+        Args:
+            latitude (float): The latitude of the location (degrees).
+            longitude (float): The longitude of the location (degrees).
+            date (datetime.date): The date of the sunrise and sunset.
+            timezone_name (str, optional): The timezone in which `date` is a calendar day.
+
+        Returns:
+            tuple: The sunrise and sunset as UTC epoch seconds.
+        """
+        # The table days before, on and after the date, as UTC epoch seconds
+        days = [date + datetime.timedelta(days=offset) for offset in (-1, 0, 1)]
+        fields = self.lookup(latitude, longitude, np.array([day.timetuple().tm_yday for day in days]))
+        midnights = np.array([datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc).timestamp()
+                              for day in days])
+        sunrises = midnights + fields[:, 0].astype(float) * 60
+        sunsets = midnights + fields[:, 1].astype(float) * 60
+
+        # Bounds of the calendar day in the timezone
+        timezone = timezones.get_timezone(timezone_name)
+        start, end = (timezone.localize(datetime.datetime.combine(day, datetime.time())).timestamp()
+                      for day in days[1:])
+
+        # Polar days and nights have no real sunrise or sunset: keep the table day's
+        day_lengths = sunsets - sunrises
+        polar = (day_lengths < 60) | (day_lengths > 86400 - 60)
+        if polar[1]:
+            return float(sunrises[1]), float(sunsets[1])
+
+        # Otherwise take the events within the day
+        def within_day(times):
+            inside = np.flatnonzero((times >= start) & (times < end) & ~polar)
+            return float(times[inside[0]] if len(inside) else times[1])
+
+        return within_day(sunrises), within_day(sunsets)
+
+    def solar_noon(self, latitude, longitude, date):
+        """
+        Get the solar noon of a location on a date.
+
+        Args:
+            latitude (float): The latitude of the location (degrees).
+            longitude (float): The longitude of the location (degrees).
+            date (datetime.date): The date of the solar noon.
+
+        Returns:
+            float: The solar noon as UTC epoch seconds.
+        """
+        fields = self.lookup(latitude, longitude, date.timetuple().tm_yday)
+        midnight = datetime.datetime(date.year, date.month, date.day, tzinfo=datetime.timezone.utc).timestamp()
+        return midnight + float(fields[2]) * 60
+
+    def day_length_hours(self, latitude, longitude, date):
+        """
+        Get the day length of one or many locations on one or many dates.
+
+        Args:
+            latitude (array): Latitudes (degrees).
+            longitude (array): Longitudes (degrees).
+            date (array): Dates, as datetime.date or numpy datetime64 values.
+
+        Returns:
+            np.array: The time between sunrise and sunset in hours.
+        """
+        dates = np.asarray(date, dtype="datetime64[D]")
+        day_of_year = (dates - dates.astype("datetime64[Y]")).astype(np.intp) + 1
+
+        fields = self.lookup(latitude, longitude, day_of_year)
+        return (fields[..., 1] - fields[..., 0]) / 60
+
+if __name__ == "__main__":
+    # Example usage
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sun_table.bin")
+        build_sun_table(path, resolution=1.0)
+        table = SunTable(path)
+
+        latitude = 40.7128  # New York City
+        longitude = -74.0060
+        date = datetime.date(2023, 6, 21)
+        sunrise, sunset = table.sun_times(latitude, longitude, date, "America/New_York")
+        print("Sunrise:", datetime.datetime.fromtimestamp(sunrise, datetime.timezone.utc))
+        print("Sunset:", datetime.datetime.fromtimestamp(sunset, datetime.timezone.utc))
+        print(f"Day length: {table.day_length_hours(latitude, longitude, date):.2f} hours")
+
+        # Day lengths for a million random locations and dates
+        rng = np.random.default_rng(0)
+        day_lengths = table.day_length_hours(rng.uniform(-90, 90, 10**6), rng.uniform(-180, 180, 10**6),
+                                             np.datetime64("2023-01-01") + rng.integers(0, 365, 10**6))
+        print(f"Mean day length: {np.mean(day_lengths):.2f} hours")
+        del table
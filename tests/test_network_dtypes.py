@@ -0,0 +1,51 @@
+import importlib
+import numpy as np
+import pytest
+
+# Light patterns and rewards arrive as float64, which would upcast float32 updates
+PATTERNS = np.random.default_rng(0).random((3, 8))
+REWARDS = np.random.default_rng(1).random(3)
+
+def neural_network_class(module_name):
+    if module_name == "analyze_light_particle_neural_network_quantum":
+        for dependency in ("cupy", "qiskit", "qiskit_aer"):
+            pytest.importorskip(dependency)
+    return importlib.import_module(module_name).LightParticleNeuralNetwork
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_neuroplasticity_updates_keep_dtype(dtype):
+    network = neural_network_class("LightParticleNeuralNetwork")(8, dtype=dtype)
+
+    for light_pattern, reward in zip(PATTERNS, REWARDS):
+        assert network.calculate_pattern_update(light_pattern).dtype == dtype
+        assert network.calculate_reward_update(reward).dtype == dtype
+
+    network.induce_neuroplasticity(PATTERNS, REWARDS)
+    assert network.weights.dtype == dtype
+    assert all(weights.dtype == dtype for weights in network.weight_history)
+
+@pytest.mark.parametrize("module_name", ["analyze_light_particle_neural_network",
+                                         "analyze_light_particle_neural_network_quantum"])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_pattern_updates_keep_dtype(module_name, dtype):
+    network = neural_network_class(module_name)(8, dtype=dtype)
+
+    for light_pattern in PATTERNS:
+        weight_update, threshold_update = network.calculate_updates(light_pattern)
+        assert weight_update.dtype == threshold_update.dtype == dtype
+        network.process_light_pattern(light_pattern)
+    assert network.weights.dtype == network.thresholds.dtype == dtype
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_hopfield_updates_and_recall_keep_dtype(dtype):
+    network = importlib.import_module("LightParticleHopfieldNetwork").LightParticleHopfieldNetwork(8, 2, dtype=dtype)
+
+    for light_pattern in PATTERNS:
+        weight_update, threshold_update = network.calculate_updates(light_pattern)
+        assert weight_update.dtype == np.asarray(threshold_update).dtype == dtype
+    network.store_patterns(PATTERNS)
+    assert network.weights.dtype == network.thresholds.dtype == dtype
+
+    recalled = network.recall(PATTERNS)
+    assert recalled["states"].dtype == recalled["energy"].dtype == dtype
+    assert network.energy(network.to_states(PATTERNS)).dtype == dtype
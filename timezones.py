@@ -0,0 +1,176 @@
+import functools
+import os
+import numpy as np
+import pytz
+
+# Default location of a precomputed timezone grid, next to this module
+DEFAULT_GRID_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timezone_grid.npz")
+
+class TimezoneGrid:
+    """
+    Offline coordinate-to-timezone index: a regular latitude/longitude grid whose
+    cells hold codes into a table of timezone names. Lookups are a pair of
+    divisions and an array index, so they work on whole coordinate arrays.
+    """
+
+    def __init__(self, codes, names, resolution):
+        self.codes = codes
+        self.names = names
+        self.resolution = resolution
+
+    @classmethod
+    def nautical(cls, resolution=1.0):
+        """
+        Build a grid of nautical timezones (whole-hour UTC offsets by longitude).
+        Used when no precomputed grid of civil timezones is available.
+
+        Args:
+            resolution (float): The cell size in degrees.
+        """
+        offsets = np.arange(-12, 13)
+        names = np.array([f"Etc/GMT{-offset:+d}" for offset in offsets])
+
+        longitudes = -180 + (np.arange(int(round(360 / resolution))) + 0.5) * resolution
+        row = np.clip(np.round(longitudes / 15).astype(np.int16), -12, 12) + 12
+        codes = np.tile(row, (int(round(180 / resolution)), 1))
+
+        return cls(codes, names, resolution)
+
+    @classmethod
+    def build(cls, resolve_point, resolution=0.25):
+        """
+        Precompute a grid by resolving the timezone at the center of every cell,
+        for example with an offline polygon lookup such as timezonefinder.
+
+        Args:
+            resolve_point (callable): Maps (latitude, longitude) to a timezone name, or None.
+            resolution (float): The cell size in degrees.
+        """
+        latitudes = -90 + (np.arange(int(round(180 / resolution))) + 0.5) * resolution
+        longitudes = -180 + (np.arange(int(round(360 / resolution))) + 0.5) * resolution
+
+        names = []
+        name_codes = {}
+        codes = np.empty((len(latitudes), len(longitudes)), dtype=np.uint16)
+        for i, latitude in enumerate(latitudes):
+            for j, longitude in enumerate(longitudes):
+                name = resolve_point(latitude, longitude) or nautical_timezone_name(longitude)
+                if name not in name_codes:
+                    name_codes[name] = len(names)
+                    names.append(name)
+                codes[i, j] = name_codes[name]
+
+        return cls(codes, np.array(names), resolution)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a grid saved with `save`.
+
+        Args:
+            path (str): The path of the .npz file.
+        """
+        with np.load(path) as data:
+            return cls(data["codes"], data["names"], float(data["resolution"]))
+
+    def save(self, path):
+        """
+        Save the grid as a compressed .npz file.
+
+        Args:
+            path (str): The path of the .npz file.
+        """
+        np.savez_compressed(path, codes=self.codes, names=self.names, resolution=self.resolution)
+
+    def lookup(self, latitude, longitude):
+        """
+        Look up the timezone names of one or many coordinates.
+
+        Args:
+            latitude (float or array): The latitudes (degrees).
+            longitude (float or array): The longitudes (degrees).
+
+        Returns:
+            str or np.array: The timezone name of each coordinate.
+        """
+        rows = np.clip(((np.asarray(latitude) + 90) // self.resolution).astype(np.intp), 0, self.codes.shape[0] - 1)
+        columns = ((np.asarray(longitude) + 180) // self.resolution).astype(np.intp) % self.codes.shape[1]
+        names = self.names[self.codes[rows, columns]]
+        return str(names) if names.ndim == 0 else names
+
+def nautical_timezone_name(longitude):
+    """
+    Name the nautical timezone of a longitude, e.g. "Etc/GMT+5" for UTC-5.
+
+    Args:
+        longitude (float): The longitude (degrees).
+
+    Returns:
+        str: The IANA name of the whole-hour timezone.
+    """
+    offset = int(np.clip(np.round(longitude / 15), -12, 12))
+    return f"Etc/GMT{-offset:+d}"
+
+@functools.lru_cache(maxsize=1)
+def default_grid():
+    """
+    Load the precomputed timezone grid if present, otherwise fall back to nautical timezones.
+
+    Returns:
+        TimezoneGrid: The grid used by `timezone_name_at`.
+    """
+    if os.path.exists(DEFAULT_GRID_PATH):
+        return TimezoneGrid.load(DEFAULT_GRID_PATH)
+    return TimezoneGrid.nautical()
+
+@functools.lru_cache(maxsize=65536)
+def timezone_name_at(latitude, longitude):
+    """
+    Resolve the timezone name of a location, memoized per coordinate pair.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+
+    Returns:
+        str: The IANA timezone name.
+    """
+    return default_grid().lookup(latitude, longitude)
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name):
+    """
+    Get a timezone object by name, creating each one only once.
+
+    Args:
+        name (str): The IANA timezone name.
+
+    Returns:
+        datetime.tzinfo: The pytz timezone.
+    """
+    return pytz.timezone(name)
+
+def timezone_at(latitude, longitude):
+    """
+    Resolve the timezone of a location through the cached grid lookup.
+
+    Args:
+        latitude (float): The latitude of the location (degrees).
+        longitude (float): The longitude of the location (degrees).
+
+    Returns:
+        datetime.tzinfo: The pytz timezone.
+    """
+    return get_timezone(timezone_name_at(latitude, longitude))
+
+if __name__ == "__main__":
+    # Example usage
+    print("New York City:", timezone_at(40.7128, -74.0060))
+    print("Tokyo:", timezone_at(35.6762, 139.6503))
+
+    # Vectorized lookup over many coordinates
+    rng = np.random.default_rng(0)
+    latitudes = rng.uniform(-90, 90, 1_000_000)
+    longitudes = rng.uniform(-180, 180, 1_000_000)
+    names, counts = np.unique(default_grid().lookup(latitudes, longitudes), return_counts=True)
+    print(f"{len(names)} timezones across {len(latitudes)} coordinates")